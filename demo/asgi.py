@@ -5,6 +5,11 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+
+Aplikacja działa przez ASGI (uvicorn, zob. Procfile), bo strumień postępu scrapowania
+(views.task_progress_stream) jest widokiem asynchronicznym - pod WSGI każde otwarte
+połączenie Server-Sent Events zajmowałoby osobny wątek serwera. Pozostałe odpowiedzi
+strumieniowane (eksport ofert) dostają pod ASGI iterator asynchroniczny (export.async_chunks).
 """
 
 import os
@@ -79,10 +79,12 @@ WSGI_APPLICATION = 'demo.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Pod ASGI (uvicorn) każde zapytanie synchronicznego kodu może trafić do innego wątku, a trwałe połączenia
+# są trzymane per wątek, więc przy conn_max_age > 0 mnożyłyby się otwarte połączenia z bazą.
 DATABASES = {
     'default': dj_database_url.config(
         default='sqlite:///' + os.path.join(BASE_DIR, 'db.sqlite3'),
-        conn_max_age=600,
+        conn_max_age=int(os.getenv("DB_CONN_MAX_AGE", "0")),
     )
 }
 
@@ -147,3 +149,104 @@ CELERY_RESULT_SERIALIZER = 'json'
 # Poniższe ustawienia są przydatne w dewelopmencie. Na produkcji warto zmienić na 'INFO' lub 'WARNING'.
 CELERY_WORKER_LOG_LEVEL = 'INFO'
 CELERY_TASK_LOG_LEVEL = 'INFO'
+# Start Chromium przy starcie procesu workera może trwać dłużej niż domyślne 4 s.
+CELERY_WORKER_PROC_ALIVE_TIMEOUT = 30
+
+# Konfiguracja scraperów
+# Każdy proces workera trzyma jedną ciepłą przeglądarkę, restartowaną po N stronach lub po przekroczeniu limitu RSS.
+SCRAPER_BROWSER_PREWARM = os.getenv("SCRAPER_BROWSER_PREWARM", "True") == "True"
+SCRAPER_BROWSER_HEADLESS = os.getenv("SCRAPER_BROWSER_HEADLESS", "True") == "True"
+SCRAPER_BROWSER_MAX_PAGES = int(os.getenv("SCRAPER_BROWSER_MAX_PAGES", "200"))
+SCRAPER_BROWSER_MAX_RSS_MB = int(os.getenv("SCRAPER_BROWSER_MAX_RSS_MB", "1024"))
+# Strony szczegółów ofert pobieramy po HTTP z ograniczoną liczbą równoległych żądań.
+SCRAPER_DETAIL_CONCURRENCY = int(os.getenv("SCRAPER_DETAIL_CONCURRENCY", "8"))
+SCRAPER_HTTP_TIMEOUT = float(os.getenv("SCRAPER_HTTP_TIMEOUT", "15"))
+# Tryb pracy scraperów per platforma: 'browser' (Chromium) albo 'api' (dane JSON bez przeglądarki, tylko JustJoin.it).
+SCRAPER_MODES = {
+    'justjoinit': os.getenv("SCRAPER_JJIT_MODE", "browser"),
+    'nofluffjobs': 'browser',
+}
+# Adresy bazowe portali. Benchmark podmienia je na lokalny serwer z nagranymi stronami.
+SCRAPER_JJIT_BASE_URL = os.getenv("SCRAPER_JJIT_BASE_URL", "https://justjoin.it")
+SCRAPER_NFJ_BASE_URL = os.getenv("SCRAPER_NFJ_BASE_URL", "https://nofluffjobs.com")
+SCRAPER_JJIT_API_URL = os.getenv("SCRAPER_JJIT_API_URL", "https://api.justjoin.it/v2/user-panel/offers")
+SCRAPER_JJIT_API_MAX_PAGES = int(os.getenv("SCRAPER_JJIT_API_MAX_PAGES", "20"))
+# Cache wyników stron szczegółów ofert (data publikacji dla danego URL się nie zmienia).
+SCRAPER_DETAIL_CACHE_ENABLED = os.getenv("SCRAPER_DETAIL_CACHE_ENABLED", "True") == "True"
+SCRAPER_DETAIL_CACHE_TTL_HOURS = int(os.getenv("SCRAPER_DETAIL_CACHE_TTL_HOURS", str(24 * 30)))
+SCRAPER_DETAIL_CACHE_MAX_ENTRIES = int(os.getenv("SCRAPER_DETAIL_CACHE_MAX_ENTRIES", "50000"))
+# Blokowanie obrazków, fontów, CSS i skryptów analitycznych w kontekstach scraperów.
+SCRAPER_BLOCK_RESOURCES = os.getenv("SCRAPER_BLOCK_RESOURCES", "True") == "True"
+# Tryb przyrostowy: po tylu znanych ofertach z rzędu w listingu posortowanym po dacie przestajemy go przeglądać.
+SCRAPER_INCREMENTAL_STOP_AFTER = int(os.getenv("SCRAPER_INCREMENTAL_STOP_AFTER", "10"))
+# Liczba ofert zapisywanych do bazy w jednej paczce w trakcie scrapowania.
+SCRAPER_PERSIST_CHUNK_SIZE = int(os.getenv("SCRAPER_PERSIST_CHUNK_SIZE", "25"))
+# Ta sama oferta na obu portalach: minimalne podobieństwo Jaccarda (firma, tytuł, lokalizacje),
+# od którego oferta jest łączona z kanoniczną, oraz pomijanie stron szczegółów znanych duplikatów.
+SCRAPER_DEDUP_THRESHOLD = float(os.getenv("SCRAPER_DEDUP_THRESHOLD", "0.8"))
+# Osobny próg dla samych tytułów: wspólna firma i długa lista miast nie mogą przeważyć różnych stanowisk.
+SCRAPER_DEDUP_TITLE_THRESHOLD = float(os.getenv("SCRAPER_DEDUP_TITLE_THRESHOLD", "0.7"))
+SCRAPER_DEDUP_SKIP_DETAILS = os.getenv("SCRAPER_DEDUP_SKIP_DETAILS", "True") == "True"
+# Wspólne dla wszystkich workerów limity ruchu do portali, trzymane w Redis brokera Celery.
+# Jeśli Redis jest niedostępny, scrapery działają bez limitów.
+SCRAPER_THROTTLE_REDIS_URL = os.getenv("SCRAPER_THROTTLE_REDIS_URL", CELERY_BROKER_URL)
+SCRAPER_RATE_LIMIT_ENABLED = os.getenv("SCRAPER_RATE_LIMIT_ENABLED", "True") == "True"
+# Limit żądań per host: (żądania na sekundę, maksymalny zryw).
+SCRAPER_DEFAULT_RATE_LIMIT = (float(os.getenv("SCRAPER_RATE_LIMIT_PER_SECOND", "5")),
+                              int(os.getenv("SCRAPER_RATE_LIMIT_BURST", "10")))
+SCRAPER_RATE_LIMITS = {
+    'api.justjoin.it': (2.0, 4),
+}
+# Ponawianie żądań po 429/5xx i timeoutach: wykładnicze opóźnienie z losowym rozrzutem.
+SCRAPER_RETRY_ATTEMPTS = int(os.getenv("SCRAPER_RETRY_ATTEMPTS", "3"))
+SCRAPER_RETRY_BASE_DELAY = float(os.getenv("SCRAPER_RETRY_BASE_DELAY", "1"))
+SCRAPER_RETRY_MAX_DELAY = float(os.getenv("SCRAPER_RETRY_MAX_DELAY", "30"))
+# Maksymalna liczba jednocześnie pracujących przeglądarek we wszystkich workerach (0 = bez limitu).
+SCRAPER_BROWSER_MAX_CONCURRENCY = int(os.getenv("SCRAPER_BROWSER_MAX_CONCURRENCY", "2"))
+SCRAPER_BROWSER_SLOT_TTL = int(os.getenv("SCRAPER_BROWSER_SLOT_TTL", "900"))
+SCRAPER_BROWSER_SLOT_WAIT = int(os.getenv("SCRAPER_BROWSER_SLOT_WAIT", "600"))
+# Postęp scrapowania wysyłany do przeglądarki przez Server-Sent Events (Redis pub/sub).
+# Czas przechowywania ostatniego stanu zadania, odstęp komentarzy podtrzymujących połączenie
+# i maksymalny czas jednego strumienia (s) - po nim przeglądarka łączy się ponownie.
+SCRAPER_PROGRESS_REDIS_URL = os.getenv("SCRAPER_PROGRESS_REDIS_URL", CELERY_BROKER_URL)
+SCRAPER_PROGRESS_TTL = int(os.getenv("SCRAPER_PROGRESS_TTL", "3600"))
+SCRAPER_PROGRESS_HEARTBEAT = float(os.getenv("SCRAPER_PROGRESS_HEARTBEAT", "15"))
+SCRAPER_PROGRESS_STREAM_TIMEOUT = float(os.getenv("SCRAPER_PROGRESS_STREAM_TIMEOUT", "300"))
+
+# Cache Django (m.in. gotowe dane wykresów). Z REDIS_URL jest wspólny dla serwera WWW i workerów Celery,
+# więc dane odświeżone po scrapowaniu od razu widzą wszystkie procesy; bez niego działa w pamięci procesu.
+if os.getenv("REDIS_URL"):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv("REDIS_URL"),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+# Czas życia danych wykresów w cache (s). Po scrapowaniu są przeliczane od razu.
+CHART_CACHE_TIMEOUT = int(os.getenv("CHART_CACHE_TIMEOUT", "3600"))
+
+# Eksport ofert (CSV/NDJSON): liczba wierszy pobieranych z kursora bazy naraz.
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "2000"))
+
+# Przeliczanie widełek płacowych na wspólną jednostkę (miesięczne PLN) do statystyk wynagrodzeń.
+# Lokalna tabela kursów (PLN za jednostkę waluty), aktualizowana ręcznie.
+SALARY_EXCHANGE_RATES = {
+    'PLN': 1.0,
+    'EUR': float(os.getenv("SALARY_RATE_EUR", "4.25")),
+    'USD': float(os.getenv("SALARY_RATE_USD", "3.65")),
+    'GBP': float(os.getenv("SALARY_RATE_GBP", "4.90")),
+    'CHF': float(os.getenv("SALARY_RATE_CHF", "4.55")),
+}
+# Mnożnik stawki do stawki miesięcznej dla każdego okresu rozliczeniowego.
+SALARY_PERIODS_PER_MONTH = {
+    'hour': 168,
+    'day': 21,
+    'month': 1,
+    'year': 1 / 12,
+}
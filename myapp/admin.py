@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import PersonalInfo, Project, Skill, JourneyStep, ScraperTechnology
+from .models import (PersonalInfo, Project, Skill, JourneyStep, ScraperTechnology, ScrapeRun, OfferSkill, SearchQuery,
+                     DailyOfferStats, City)
 
 # Register your models here.
 
@@ -23,3 +24,40 @@ class JourneyStepAdmin(admin.ModelAdmin):
 class ScraperTechnologyAdmin(admin.ModelAdmin):
     list_display = ('name',)
     search_fields = ('name',)
+
+
+@admin.register(ScrapeRun)
+class ScrapeRunAdmin(admin.ModelAdmin):
+    list_display = ('started_at', 'technology', 'experience', 'status', 'duration_seconds',
+                    'offers_found', 'offers_added', 'error_count')
+    list_filter = ('status', 'technology', 'incremental')
+    search_fields = ('technology', 'task_id')
+    date_hierarchy = 'started_at'
+    readonly_fields = [field.name for field in ScrapeRun._meta.fields]
+
+
+@admin.register(OfferSkill)
+class OfferSkillAdmin(admin.ModelAdmin):
+    list_display = ('name', 'key')
+    search_fields = ('name', 'key')
+
+
+@admin.register(City)
+class CityAdmin(admin.ModelAdmin):
+    list_display = ('name', 'key')
+    search_fields = ('name', 'key')
+
+
+@admin.register(SearchQuery)
+class SearchQueryAdmin(admin.ModelAdmin):
+    list_display = ('technology', 'experience', 'platforms', 'last_run_at')
+    list_filter = ('technology', 'experience')
+
+
+@admin.register(DailyOfferStats)
+class DailyOfferStatsAdmin(admin.ModelAdmin):
+    list_display = ('date', 'source', 'main_technology', 'experience_level', 'active_offers',
+                    'new_offers', 'expired_offers', 'offers_with_salary')
+    list_filter = ('source', 'main_technology')
+    date_hierarchy = 'date'
+    readonly_fields = [field.name for field in DailyOfferStats._meta.fields]
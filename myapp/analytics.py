@@ -0,0 +1,212 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q, Value
+from django.db.models.functions import Coalesce
+from .charts import platform_chart
+from .filters import filter_offers
+from .models import JobOffer, OfferSkill
+from itertools import chain
+import hashlib
+import json
+import logging
+
+import numpy as np
+import redis
+
+logger = logging.getLogger(__name__)
+
+# Wymiary, po których można grupować raporty: nazwa parametru -> pole JobOffer.
+GROUP_FIELDS = {
+    'technology': 'main_technology',
+    'experience': 'experience_level',
+    'source': 'source',
+    'contract': 'salary_contract',
+}
+DEFAULT_SALARY_GROUP_BY = ['experience']
+DEFAULT_SKILLS_GROUP_BY = ['technology', 'experience']
+TOP_SKILLS_DEFAULT_LIMIT = 10
+TOP_SKILLS_MAX_LIMIT = 50
+PERCENTILES = (10, 50, 90)
+HISTOGRAM_BIN_PLN = 2500
+# Pojedyncze bardzo wysokie (albo źle sparsowane) widełki nie rozciągają histogramu:
+# ostatni przedział zbiera wszystko powyżej tego percentyla.
+HISTOGRAM_MAX_PERCENTILE = 99
+
+
+def parse_group_by(value: str, default: list) -> list:
+    """Lista wymiarów z parametru 'technology,experience'. ValueError dla nieznanego wymiaru."""
+    names = [name.strip() for name in (value or '').split(',') if name.strip()] or list(default)
+    unknown = [name for name in names if name not in GROUP_FIELDS]
+    if unknown:
+        raise ValueError(f"Nieznany wymiar grupowania: {', '.join(unknown)}")
+    return list(dict.fromkeys(names))
+
+
+def _factorize(column):
+    """
+    Kody wartości kolumny (0, 1, ... w kolejności pierwszego wystąpienia) i lista tych wartości.
+    Słownik jest kilka razy szybszy niż np.unique na tablicy napisów (sortowanie obiektów Pythona).
+    """
+    lookup = {}
+    codes = np.fromiter((lookup.setdefault(value, len(lookup)) for value in column), dtype=np.int64,
+                        count=len(column))
+    return codes, list(lookup)
+
+
+def _group_order(counts, keys: list) -> list:
+    """Numery grup od najliczniejszych; przy równej liczbie według wartości wymiarów."""
+    return sorted(range(len(keys)), key=lambda index: (-counts[index], list(keys[index].values())))
+
+
+def _offer_columns(offers, group_by: list, *fields):
+    """
+    Jedno zapytanie o oferty: numer grupy każdej oferty, klucze grup ({wymiar: wartość})
+    i kolumny `fields` jako tablice NumPy (liczby jako float, NULL jako NaN).
+    """
+    aliases = {f'group_{name}': Coalesce(GROUP_FIELDS[name], Value('')) for name in group_by}
+    rows = list(offers.annotate(**aliases).values_list(*aliases, *fields))
+    columns = list(zip(*rows)) or [()] * (len(aliases) + len(fields))
+
+    combined = np.zeros(len(rows), dtype=np.int64)
+    uniques = []
+    for column in columns[:len(aliases)]:
+        codes, values = _factorize(column)
+        combined = combined * len(values) + codes
+        uniques.append(values)
+    groups, group_ids = np.unique(combined, return_inverse=True)
+    codes = np.unravel_index(groups, [len(values) for values in uniques])
+    keys = [{name: uniques[position][codes[position][index]] for position, name in enumerate(group_by)}
+            for index in range(len(groups))]
+    return group_ids, keys, [np.array(column, dtype=float) for column in columns[len(aliases):]]
+
+
+def grouped_percentiles(values, group_ids, group_count: int, percentiles=PERCENTILES):
+    """
+    Percentyle `values` w każdej grupie naraz (interpolacja liniowa, jak np.percentile).
+    Wartości są sortowane raz według (grupa, wartość), a pozycje percentyli liczone dla wszystkich grup wektorowo.
+
+    Returns:
+        np.ndarray: tablica [grupa, percentyl].
+    """
+    order = np.lexsort((values, group_ids))
+    ordered = values[order]
+    counts = np.bincount(group_ids, minlength=group_count)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    positions = starts[:, None] + (np.asarray(percentiles) / 100.0)[None, :] * (counts[:, None] - 1)
+    lower = np.floor(positions).astype(np.int64)
+    upper = np.ceil(positions).astype(np.int64)
+    fraction = positions - lower
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * fraction
+
+
+def salary_histogram(values, bin_size: int = HISTOGRAM_BIN_PLN) -> dict:
+    if not len(values):
+        return {'bins': [], 'data': [], 'bin_size': bin_size}
+    top = np.percentile(values, HISTOGRAM_MAX_PERCENTILE)
+    edges = np.arange(0, (np.floor(top / bin_size) + 2) * bin_size, bin_size)
+    counts, _ = np.histogram(np.clip(values, 0, edges[-1]), bins=edges)
+    return {'bins': edges[:-1].astype(int).tolist(), 'data': counts.tolist(), 'bin_size': bin_size}
+
+
+def salary_report(offers, group_by: list) -> dict:
+    """
+    Percentyle (PERCENTILES) i histogram miesięcznych widełek w PLN ofert z `offers`, w grupach `group_by`.
+    Wynagrodzeniem oferty jest środek widełek (albo jedyna podana granica).
+    """
+    offers = offers.filter(Q(salary_min_monthly_pln__isnull=False) | Q(salary_max_monthly_pln__isnull=False))
+    group_ids, keys, (salary_min, salary_max) = _offer_columns(
+        offers, group_by, 'salary_min_monthly_pln', 'salary_max_monthly_pln')
+    salaries = np.where(np.isnan(salary_min), salary_max,
+                        np.where(np.isnan(salary_max), salary_min, (salary_min + salary_max) / 2))
+
+    report = {'group_by': group_by, 'percentiles': list(PERCENTILES), 'offers': len(salaries),
+              'groups': [], 'histogram': salary_histogram(salaries)}
+    if not len(salaries):
+        return report
+    report['overall'] = dict(zip([f'p{p}' for p in PERCENTILES],
+                                 np.round(np.percentile(salaries, PERCENTILES)).astype(int).tolist()))
+
+    counts = np.bincount(group_ids, minlength=len(keys))
+    values = np.round(grouped_percentiles(salaries, group_ids, len(keys))).astype(int)
+    for index in _group_order(counts, keys):
+        report['groups'].append({
+            **keys[index],
+            'offers': int(counts[index]),
+            **{f'p{p}': int(value) for p, value in zip(PERCENTILES, values[index])},
+        })
+    return report
+
+
+def top_skills_report(offers, group_by: list, limit: int) -> dict:
+    """
+    `limit` najczęściej wymaganych umiejętności w każdej grupie ofert (np. technologia i poziom).
+    Trzy zapytania: oferty (id i wymiary grup), pary (oferta, umiejętność) z tabeli powiązań
+    jako liczby oraz słownik nazw umiejętności. Zliczanie przez np.bincount na macierzy [grupa, umiejętność].
+    """
+    report = {'group_by': group_by, 'groups': []}
+    group_of_offer, keys, (offer_ids,) = _offer_columns(offers, group_by, 'id')
+    offer_ids = offer_ids.astype(np.int64)
+    pairs = list(JobOffer.skill_tags.through.objects.filter(joboffer__in=offers)
+                 .values_list('joboffer_id', 'offerskill_id'))
+    links = np.fromiter(chain.from_iterable(pairs), dtype=np.int64, count=2 * len(pairs)).reshape(-1, 2)
+    if not len(links):
+        return report
+
+    # Grupa każdego powiązania: pozycja jego oferty w posortowanej tablicy id ofert.
+    offer_order = np.argsort(offer_ids)
+    link_offers = offer_order[np.searchsorted(offer_ids, links[:, 0], sorter=offer_order)]
+    group_ids = group_of_offer[link_offers]
+
+    skill_values, skill_codes = np.unique(links[:, 1], return_inverse=True)
+    # Słownik umiejętności jest mały (znormalizowane nazwy), więc pobieramy go w całości.
+    names = dict(OfferSkill.objects.values_list('id', 'name'))
+    # Umiejętności w kolejności alfabetycznej, więc przy równej liczbie ofert o kolejności decyduje nazwa.
+    alphabetical = np.argsort(np.array([names[skill] for skill in skill_values.tolist()], dtype=object), kind='stable')
+    skill_ids = np.argsort(alphabetical)[skill_codes]
+    skill_names = [names[skill] for skill in skill_values[alphabetical].tolist()]
+
+    counts = np.bincount(group_ids * len(skill_names) + skill_ids,
+                         minlength=len(keys) * len(skill_names)).reshape(len(keys), len(skill_names))
+    # Oferty z przynajmniej jedną umiejętnością w grupie.
+    offers_per_group = np.bincount(group_of_offer[np.unique(link_offers)], minlength=len(keys))
+
+    top = np.argsort(-counts, axis=1, kind='stable')[:, :limit]
+    for index in _group_order(offers_per_group, keys):
+        if not offers_per_group[index]:
+            continue
+        skills = [{'name': skill_names[skill], 'count': int(counts[index, skill])}
+                  for skill in top[index] if counts[index, skill]]
+        report['groups'].append({**keys[index], 'offers': int(offers_per_group[index]), 'skills': skills})
+    return report
+
+
+def cached_report(name: str, params: dict, build) -> dict:
+    """
+    Wynik raportu z cache. Klucz zawiera czas ostatniego przeliczenia danych wykresów
+    (charts.refresh_platform_chart po każdym scrapowaniu), więc nowe dane dają nowy klucz.
+    """
+    generation = platform_chart()['last_modified'].isoformat()
+    payload = json.dumps([name, generation, params], sort_keys=True).encode('utf-8')
+    key = f"analytics:{name}:{hashlib.sha1(payload).hexdigest()}"
+    try:
+        report = cache.get(key)
+    except redis.RedisError as e:
+        logger.warning(f"Cache niedostępny, liczę raport {name} bez cache: {e}")
+        return build()
+    if report is None:
+        report = build()
+        try:
+            cache.set(key, report, settings.CHART_CACHE_TIMEOUT)
+        except redis.RedisError as e:
+            logger.warning(f"Nie udało się zapisać raportu {name} w cache: {e}")
+    return report
+
+
+def warm_reports():
+    """
+    Przelicza domyślne raporty (bez parametrów, jak pobiera je strona analizy) po odświeżeniu statystyk,
+    żeby pierwsze żądanie po scrapowaniu nie czekało na zapytania do bazy.
+    """
+    cached_report('salary', {}, lambda: salary_report(filter_offers({}), DEFAULT_SALARY_GROUP_BY))
+    cached_report('top-skills', {}, lambda: top_skills_report(filter_offers({}), DEFAULT_SKILLS_GROUP_BY,
+                                                               TOP_SKILLS_DEFAULT_LIMIT))
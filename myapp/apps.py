@@ -1,6 +1,13 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_save
 
 
 class MyappConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'myapp'
+
+    def ready(self):
+        from .context_processors import forget_personal_info
+        from .models import PersonalInfo
+        post_save.connect(forget_personal_info, sender=PersonalInfo)
+        post_delete.connect(forget_personal_info, sender=PersonalInfo)
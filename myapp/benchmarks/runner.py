@@ -0,0 +1,172 @@
+from django.conf import settings
+from django.db import transaction
+from django.test.utils import override_settings
+from pathlib import Path
+import json
+import logging
+import os
+import resource
+import threading
+import time
+
+from ..ingest import chunked, persist_offers
+from ..scrapers.browser import _process_tree_rss_mb, get_browser_pool
+from ..scrapers.justjoinit import scrape_justjoinit
+from ..scrapers.nofluff import scrape_nofluffjobs
+from ..scrapers.profiling import profiling
+
+logger = logging.getLogger(__name__)
+
+BASELINE_PATH = Path(__file__).resolve().parent / 'baseline.json'
+
+# Scenariusz: (platforma, tryb scrapera).
+SCENARIOS = {
+    'justjoinit-browser': ('justjoinit', 'browser'),
+    'justjoinit-api': ('justjoinit', 'api'),
+    'nofluffjobs-browser': ('nofluffjobs', 'browser'),
+}
+
+# Metryki zapisywane w baseline i porównywane przy kolejnych uruchomieniach.
+BASELINE_METRICS = ['offers', 'offers_per_sec', 'peak_rss_mb', 'browser_pages']
+
+
+def _own_rss_mb() -> float:
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, IndexError, ValueError):
+        # Poza Linuksem bierzemy szczytowe RSS procesu (ru_maxrss jest w KB na Linuksie, w B na macOS).
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class RssSampler:
+    """Co `interval` sekund mierzy RSS procesu razem z procesami Playwright/Chromium i zapamiętuje maksimum."""
+
+    def __init__(self, interval: float = 0.2):
+        self.interval = interval
+        self.peak_mb = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def sample(self):
+        self.peak_mb = max(self.peak_mb, _own_rss_mb() + _process_tree_rss_mb(os.getpid()))
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def __enter__(self):
+        self.sample()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        self.sample()
+
+
+def _scraper_for(platform: str, mode: str):
+    if platform == 'justjoinit':
+        return lambda technology, experience: scrape_justjoinit(technology, experience, mode=mode)
+    return scrape_nofluffjobs
+
+
+def run_scenario(name: str, server, technology: str = 'python') -> dict:
+    """
+    Uruchamia scraper na lokalnym serwerze z nagranymi stronami i zwraca metryki przebiegu.
+    Oferty są zapisywane do bazy (faza db_write), ale transakcja jest na końcu wycofywana.
+    Cache stron szczegółów i limity ruchu są wyłączone, żeby każdy przebieg pobierał te same strony.
+    """
+    platform, mode = SCENARIOS[name]
+    overrides = {
+        'SCRAPER_JJIT_BASE_URL': server.url,
+        'SCRAPER_NFJ_BASE_URL': server.url,
+        'SCRAPER_JJIT_API_URL': f"{server.url}/api/offers",
+        'SCRAPER_DETAIL_CACHE_ENABLED': False,
+        'SCRAPER_DEDUP_SKIP_DETAILS': False,
+        # Mierzymy sam scraper, bez limitów ruchu przeznaczonych dla prawdziwych portali.
+        'SCRAPER_RATE_LIMIT_ENABLED': False,
+        'SCRAPER_BROWSER_MAX_CONCURRENCY': 0,
+        'SCRAPER_MODES': {**settings.SCRAPER_MODES, platform: mode},
+    }
+    scraper = _scraper_for(platform, mode)
+    server.hits = {}
+
+    with override_settings(**overrides), profiling() as profile, RssSampler() as sampler:
+        pool = get_browser_pool()
+        if mode == 'browser':
+            # Worker Celery ma przeglądarkę uruchomioną zawczasu, więc jej start mierzymy osobno.
+            pool.start()
+        pages_before = pool.stats['pages']
+
+        offers = 0
+        started = time.perf_counter()
+        with transaction.atomic():
+            for chunk in chunked(scraper(technology, 'all'), settings.SCRAPER_PERSIST_CHUNK_SIZE):
+                offers += len(chunk)
+                persist_offers(chunk, technology, 'all')
+            transaction.set_rollback(True)
+        elapsed = time.perf_counter() - started
+
+    return {
+        'scenario': name,
+        'offers': offers,
+        'seconds': round(elapsed, 3),
+        'offers_per_sec': round(offers / elapsed, 2) if elapsed else 0.0,
+        'peak_rss_mb': round(sampler.peak_mb, 1),
+        'browser_pages': pool.stats['pages'] - pages_before,
+        'phases': profile.summary(),
+        'requests': dict(server.hits),
+    }
+
+
+def load_baseline(path=BASELINE_PATH) -> dict:
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def save_baseline(results: list, path=BASELINE_PATH, previous: dict = None):
+    """Zapisuje metryki przebiegów jako nowy baseline, zachowując scenariusze, których nie uruchamiano."""
+    baseline = dict(previous or {})
+    for result in results:
+        baseline[result['scenario']] = {metric: result[metric] for metric in BASELINE_METRICS}
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def compare_with_baseline(results: list, baseline: dict, tolerance: float = 0.25) -> list:
+    """
+    Porównuje wyniki z baseline i zwraca listę opisów regresji (pustą, gdy wszystko w normie).
+    Przepustowość i RSS mają margines `tolerance` (ułamek), liczba ofert i stron przeglądarki musi się zgadzać.
+    """
+    regressions = []
+    for result in results:
+        name = result['scenario']
+        expected = baseline.get(name)
+        if not expected:
+            continue
+        if result['offers'] != expected['offers']:
+            regressions.append(f"{name}: znaleziono {result['offers']} ofert zamiast {expected['offers']}")
+        min_throughput = expected['offers_per_sec'] * (1 - tolerance)
+        if result['offers_per_sec'] < min_throughput:
+            regressions.append(
+                f"{name}: {result['offers_per_sec']} ofert/s, poniżej progu {min_throughput:.2f} "
+                f"(baseline {expected['offers_per_sec']})"
+            )
+        max_rss = expected['peak_rss_mb'] * (1 + tolerance)
+        if result['peak_rss_mb'] > max_rss:
+            regressions.append(
+                f"{name}: szczytowe RSS {result['peak_rss_mb']} MB, powyżej progu {max_rss:.1f} MB "
+                f"(baseline {expected['peak_rss_mb']} MB)"
+            )
+        if result['browser_pages'] > expected['browser_pages']:
+            regressions.append(
+                f"{name}: {result['browser_pages']} stron przeglądarki zamiast {expected['browser_pages']}"
+            )
+    return regressions
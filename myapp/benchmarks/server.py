@@ -0,0 +1,242 @@
+from datetime import date, timedelta
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from string import Template
+from urllib.parse import parse_qs, urlparse
+import json
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+FIXTURES_DIR = Path(__file__).resolve().parent / 'fixtures'
+
+CITIES = ['Warszawa', 'Kraków', 'Wrocław', 'Gdańsk', 'Poznań', 'Łódź', 'Katowice']
+COMPANIES = ['Acme Software', 'Nordic Data', 'Vistula Labs', 'Baltic Cloud', 'Tatra Systems', 'Odra Fintech']
+SKILLS = ['Python', 'Django', 'PostgreSQL', 'Docker', 'AWS', 'Celery', 'Redis', 'Kubernetes', 'React']
+LEVELS = ['Junior', 'Mid', 'Senior']
+# Data, od której liczymy daty publikacji ofert. Stała, żeby wyniki były powtarzalne.
+FIXTURE_TODAY = date(2025, 10, 15)
+
+
+def _template(name: str) -> Template:
+    return Template((FIXTURES_DIR / name).read_text(encoding='utf-8'))
+
+
+def fixture_offers(count: int, technology: str = 'python') -> list:
+    """
+    Zwraca deterministyczną listę ofert, na podstawie której serwer buduje listingi,
+    strony szczegółów i odpowiedzi API. Co czwarta oferta ma kilka lokalizacji,
+    a co dziesiąta dokłada JSON-LD dopiero skryptem (wymaga awaryjnej ścieżki przez przeglądarkę).
+    """
+    offers = []
+    for number in range(count):
+        company = COMPANIES[number % len(COMPANIES)]
+        level = LEVELS[number % len(LEVELS)]
+        cities = [CITIES[number % len(CITIES)]]
+        if number % 4 == 0:
+            cities += [CITIES[(number + 2) % len(CITIES)], CITIES[(number + 4) % len(CITIES)]]
+        salary_from = 10000 + (number % 10) * 1500
+        offers.append({
+            'slug': f"{company.lower().replace(' ', '-')}-{level.lower()}-{technology.lower()}-developer-{number}",
+            'title': f"{level} {technology.capitalize()} Developer",
+            'company': company,
+            'cities': cities,
+            'remote': number % 3 == 0,
+            'salary_from': salary_from,
+            'salary_to': salary_from + 6000,
+            'skills': [SKILLS[(number + shift) % len(SKILLS)] for shift in range(3)],
+            'published': FIXTURE_TODAY - timedelta(days=number % 30),
+            'client_side_json_ld': number % 10 == 9,
+        })
+    return offers
+
+
+def _salary_text(offer: dict) -> str:
+    amounts = [f"{value:,}".replace(',', ' ') for value in (offer['salary_from'], offer['salary_to'])]
+    return f"{' - '.join(amounts)} PLN"
+
+
+class FixtureRenderer:
+    """Buduje treść stron obu portali z szablonów w katalogu fixtures."""
+
+    def __init__(self, offers: list, technology: str = 'python'):
+        self.offers = offers
+        self.technology = technology
+        self.by_slug = {offer['slug']: offer for offer in offers}
+        self.templates = {
+            name: _template(f"{name}.html")
+            for name in ('justjoinit_listing', 'justjoinit_card', 'justjoinit_detail',
+                         'nofluffjobs_listing', 'nofluffjobs_card', 'nofluffjobs_detail')
+        }
+
+    def justjoinit_listing(self) -> str:
+        cards = []
+        for number, offer in enumerate(self.offers):
+            multilocation = ''
+            if len(offer['cities']) > 1:
+                multilocation = (
+                    f'<button name="multilocation_button" data-locations="{escape("|".join(offer["cities"]))}">'
+                    f'+{len(offer["cities"]) - 1}</button>'
+                )
+            skills = list(offer['skills'])
+            if number % 5 == 0:
+                skills.append('1-click Apply')
+            cards.append(self.templates['justjoinit_card'].substitute(
+                slug=offer['slug'],
+                title=escape(offer['title']),
+                salary=escape(f"{_salary_text(offer)}/month"),
+                company=escape(offer['company']),
+                location=escape(f"{offer['cities'][0]}, Polska"),
+                multilocation=multilocation,
+                skills=''.join(f'<div class="mui-jikuwi">{escape(skill)}</div>' for skill in skills),
+            ))
+        return self.templates['justjoinit_listing'].substitute(
+            technology=escape(self.technology), cards='\n'.join(cards))
+
+    def nofluffjobs_listing(self) -> str:
+        cards = []
+        for number, offer in enumerate(self.offers):
+            cities = offer['cities']
+            location = cities[0] if len(cities) == 1 else f"{cities[0]} +{len(cities) - 1}"
+            cards.append(self.templates['nofluffjobs_card'].substitute(
+                slug=offer['slug'],
+                title=escape(offer['title']),
+                new_badge=' NOWA' if number % 7 == 0 else '',
+                company=escape(offer['company']),
+                location=escape(location),
+                locations=escape('|'.join(cities)),
+                salary=escape(_salary_text(offer)),
+                skills=''.join(f'<span>{escape(skill)}</span>' for skill in offer['skills']),
+            ))
+        return self.templates['nofluffjobs_listing'].substitute(
+            technology=escape(self.technology), cards='\n'.join(cards), promoted='')
+
+    def detail(self, platform: str, slug: str):
+        offer = self.by_slug.get(slug)
+        if offer is None:
+            return None
+        job_posting = {'@type': 'JobPosting', 'title': offer['title'], 'datePosted': f"{offer['published']}T08:00:00Z"}
+        if platform == 'justjoinit':
+            # JustJoin.IT zwraca listę obiektów, NoFluffJobs obiekt z kluczem '@graph'.
+            structured_data = [{'@type': 'Organization', 'name': offer['company']}, job_posting]
+        else:
+            structured_data = {'@graph': [{'@type': 'WebPage'}, job_posting]}
+        payload = json.dumps(structured_data, ensure_ascii=False)
+
+        json_ld, client_script = f'<script type="application/ld+json">{payload}</script>', ''
+        if offer['client_side_json_ld']:
+            json_ld = ''
+            client_script = (
+                "<script>const s = document.createElement('script'); s.type = 'application/ld+json'; "
+                f"s.textContent = {json.dumps(payload)}; document.head.appendChild(s);</script>"
+            )
+        return self.templates[f'{platform}_detail'].substitute(
+            title=escape(offer['title']), company=escape(offer['company']),
+            location=escape(', '.join(offer['cities'])), json_ld=json_ld, client_script=client_script)
+
+    def justjoinit_api_page(self, page: int, per_page: int) -> dict:
+        start = (page - 1) * per_page
+        items = [
+            {
+                'slug': offer['slug'],
+                'title': offer['title'],
+                'companyName': offer['company'],
+                'city': offer['cities'][0],
+                'multilocation': [{'city': city} for city in offer['cities']],
+                'workplaceType': 'remote' if offer['remote'] else 'hybrid',
+                'employmentTypes': [{'from': offer['salary_from'], 'to': offer['salary_to'],
+                                     'currency': 'pln', 'unit': 'month'}],
+                'requiredSkills': offer['skills'],
+                'publishedAt': f"{offer['published']}T08:00:00.000Z",
+            }
+            for offer in self.offers[start:start + per_page]
+        ]
+        has_next = start + per_page < len(self.offers)
+        return {'data': items, 'meta': {'page': page, 'nextPage': page + 1 if has_next else None}}
+
+
+class _FixtureHandler(BaseHTTPRequestHandler):
+    server_version = 'FixtureServer/1.0'
+
+    def do_GET(self):
+        fixture_server = self.server.fixture_server
+        if fixture_server.latency:
+            time.sleep(fixture_server.latency)
+        parsed = urlparse(self.path)
+        path = parsed.path.rstrip('/')
+        renderer = fixture_server.renderer
+
+        if path.startswith('/job-offers/all-locations'):
+            self._send('justjoinit_listing', renderer.justjoinit_listing())
+        elif path.startswith('/job-offer/'):
+            self._send('justjoinit_detail', renderer.detail('justjoinit', path.rsplit('/', 1)[1]))
+        elif path.startswith('/pl/job/'):
+            self._send('nofluffjobs_detail', renderer.detail('nofluffjobs', path.rsplit('/', 1)[1]))
+        elif path.startswith('/pl/'):
+            self._send('nofluffjobs_listing', renderer.nofluffjobs_listing())
+        elif path == '/api/offers':
+            query = parse_qs(parsed.query)
+            page = int(query.get('page', ['1'])[0])
+            per_page = int(query.get('perPage', ['100'])[0])
+            self._send('justjoinit_api', json.dumps(renderer.justjoinit_api_page(page, per_page)),
+                       content_type='application/json')
+        elif path.startswith('/static/'):
+            # Zasoby, które polityka przechwytywania powinna zablokować, zanim tu dotrą.
+            self._send('static', 'body { color: #222; }', content_type='text/css')
+        else:
+            self._send('not_found', None)
+
+    def _send(self, kind: str, body, content_type: str = 'text/html; charset=utf-8'):
+        self.server.fixture_server.count(kind)
+        if body is None:
+            self.send_error(404)
+            return
+        encoded = body.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(encoded)))
+        self.end_headers()
+        self.wfile.write(encoded)
+
+    def log_message(self, format, *args):
+        logger.debug(f"FixtureServer: {format % args}")
+
+
+class FixtureServer:
+    """
+    Lokalny serwer HTTP z nagranymi stronami listingów i ofert obu portali oraz API JustJoin.it.
+    Pozwala mierzyć wydajność scraperów bez ruchu do prawdziwych serwisów.
+
+    Args:
+        offers (int): liczba ofert w listingach.
+        latency (float): sztuczne opóźnienie (w sekundach) każdej odpowiedzi.
+    """
+
+    def __init__(self, offers: int = 40, latency: float = 0.0, technology: str = 'python'):
+        self.latency = latency
+        self.renderer = FixtureRenderer(fixture_offers(offers, technology), technology)
+        self.hits = {}
+        self._lock = threading.Lock()
+        self._httpd = None
+
+    def count(self, kind: str):
+        with self._lock:
+            self.hits[kind] = self.hits.get(kind, 0) + 1
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._httpd.server_port}"
+
+    def __enter__(self):
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', 0), _FixtureHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.fixture_server = self
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._httpd.shutdown()
+        self._httpd.server_close()
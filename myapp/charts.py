@@ -0,0 +1,64 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Subquery, Sum
+from django.utils import timezone
+from .models import DailyOfferStats
+import hashlib
+import json
+import logging
+
+import redis
+
+logger = logging.getLogger(__name__)
+
+PLATFORM_CHART_KEY = 'charts:platforms'
+
+
+def build_platform_chart() -> dict:
+    """
+    Liczba aktywnych ofert na platformę według najnowszego dziennego podsumowania (jedno zapytanie).
+
+    Returns:
+        dict: body (dane wykresu), etag (skrót danych) i last_modified (czas przeliczenia).
+    """
+    latest_date = DailyOfferStats.objects.order_by('-date').values('date')[:1]
+    platform_data = (DailyOfferStats.objects.filter(date=Subquery(latest_date))
+                     .values('source').annotate(count=Sum('active_offers'))
+                     .order_by('-count').values_list('source', 'count'))
+
+    labels, data = zip(*platform_data) if platform_data else ([], [])
+    body = {
+        'labels': list(labels),
+        'data': list(data),
+    }
+    return {
+        'body': body,
+        'etag': hashlib.sha1(json.dumps(body, sort_keys=True).encode('utf-8')).hexdigest(),
+        'last_modified': timezone.now().replace(microsecond=0),
+    }
+
+
+def refresh_platform_chart() -> dict:
+    """Przelicza dane wykresu i zapisuje je w cache. Wywoływane po każdym scrapowaniu."""
+    chart = build_platform_chart()
+    try:
+        cache.set(PLATFORM_CHART_KEY, chart, settings.CHART_CACHE_TIMEOUT)
+    except redis.RedisError as e:
+        logger.warning(f"Nie udało się zapisać danych wykresu w cache: {e}")
+    return chart
+
+
+def platform_chart() -> dict:
+    """
+    Dane wykresu z cache; baza jest odpytywana tylko, gdy cache jest pusty (albo niedostępny).
+    Bez wspólnego cache (REDIS_URL) odświeżenie w workerze Celery nie trafia do procesów serwera WWW
+    i dane mogą być nieaktualne najwyżej przez CHART_CACHE_TIMEOUT sekund.
+    """
+    try:
+        chart = cache.get(PLATFORM_CHART_KEY)
+    except redis.RedisError as e:
+        logger.warning(f"Cache niedostępny, liczę dane wykresu z bazy: {e}")
+        return build_platform_chart()
+    if chart is None:
+        chart = refresh_platform_chart()
+    return chart
@@ -1,12 +1,34 @@
+from django.core.cache import cache
+from django.utils.functional import SimpleLazyObject
 from .models import PersonalInfo
+import redis
 
+# PersonalInfo jest w stopce każdej strony, a zmienia się tylko w panelu admina (wtedy czyścimy cache).
+# Czas życia ogranicza nieaktualność w innych procesach, gdy cache nie jest wspólny (bez REDIS_URL).
+PERSONAL_INFO_CACHE_KEY = 'personal-info'
+PERSONAL_INFO_CACHE_TIMEOUT = 3600
+_MISSING = object()
 
-def add_personal_info_to_context(request):
+
+def get_personal_info():
+    """PersonalInfo ze stopki (z cache, jeśli jest)."""
     try:
+        personal_info = cache.get(PERSONAL_INFO_CACHE_KEY, _MISSING)
+        if personal_info is _MISSING:
+            personal_info = PersonalInfo.objects.first()
+            cache.set(PERSONAL_INFO_CACHE_KEY, personal_info, PERSONAL_INFO_CACHE_TIMEOUT)
+    except redis.RedisError:
         personal_info = PersonalInfo.objects.first()
-    except PersonalInfo.DoesNotExist:
-        personal_info = None
+    return personal_info
+
 
+def forget_personal_info(**kwargs):
+    """Odbiornik post_save/post_delete PersonalInfo (podłączany w MyappConfig.ready)."""
+    cache.delete(PERSONAL_INFO_CACHE_KEY)
+
+
+def add_personal_info_to_context(request):
+    # Zapytanie (albo odczyt z cache) dopiero wtedy, gdy szablon użyje personal_info.
     return {
-        'personal_info': personal_info,
-    }
\ No newline at end of file
+        'personal_info': SimpleLazyObject(get_personal_info),
+    }
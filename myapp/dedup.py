@@ -0,0 +1,169 @@
+from django.conf import settings
+from .locations import fold, parse_locations
+from .models import JobOffer
+import hashlib
+import random
+import re
+
+# Sygnatura MinHash ma NUM_BANDS * ROWS_PER_BAND wartości. Oferty trafiają do porównania,
+# jeśli mają wspólny choć jeden pas (LSH). Przy 10 pasach po 5 wierszy para o podobieństwie
+# 0.8 zostaje kandydatem z prawdopodobieństwem ~98%, a para o podobieństwie 0.4 tylko ~10%.
+NUM_BANDS = 10
+ROWS_PER_BAND = 5
+NUM_PERMUTATIONS = NUM_BANDS * ROWS_PER_BAND
+_PRIME = (1 << 61) - 1
+# Stałe ziarno: sygnatury zapisane w bazie muszą być takie same w każdym procesie.
+_random = random.Random(20251015)
+_PERMUTATIONS = [(_random.randrange(1, _PRIME), _random.randrange(0, _PRIME)) for _ in range(NUM_PERMUTATIONS)]
+
+_TOKEN_RE = re.compile(r'[a-z0-9+#]+')
+_COMPANY_SUFFIX_RE = re.compile(
+    r'[\s,]+(sp\.?\s*z\s*o\.?\s*o\.?|s\.?\s*a\.?|sp\.?\s*k\.?|sp\.?\s*j\.?|ltd\.?|inc\.?|gmbh|llc)\s*$')
+# Oznaczenia w rodzaju '(k/m)' albo '(m/f/x)' w tytułach ogłoszeń.
+_GENDER_RE = re.compile(r'\(\s*[kmfx](\s*/\s*[kmfx])+\s*\)')
+# Słowa poziomu stanowiska w tytule. Tytuły różniące się tylko nimi ('Python Developer' i 'Senior Python
+# Developer') mają podobieństwo około 0.8, a to różne oferty, więc poziom musi się zgadzać.
+LEVEL_TOKENS = {'intern', 'trainee', 'junior', 'mid', 'regular', 'medior', 'senior', 'lead', 'principal', 'staff',
+                'expert', 'head'}
+
+
+def company_tokens(company: str) -> list:
+    return _TOKEN_RE.findall(_COMPANY_SUFFIX_RE.sub('', fold(company).strip()))
+
+
+def title_tokens(title: str) -> list:
+    return sorted(set(_TOKEN_RE.findall(_GENDER_RE.sub(' ', fold(title)))))
+
+
+def level_tokens(title: str) -> frozenset:
+    return frozenset(title_tokens(title)) & LEVEL_TOKENS
+
+
+def locations(location: str) -> list:
+    """Klucze miast oferty (myapp.locations) i 'remote' dla pracy zdalnej."""
+    cities, remote = parse_locations(location)
+    return sorted([key for key, _ in cities] + (['remote'] if remote else []))
+
+
+def offer_fingerprint(company: str, title: str, location: str) -> str:
+    """Skrót znormalizowanych (firma, tytuł, lokalizacje) - równy dla tej samej oferty na obu portalach."""
+    key = f"{' '.join(company_tokens(company))}|{' '.join(title_tokens(title))}|{','.join(locations(location))}"
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+def offer_shingles(company: str, title: str, location: str) -> set:
+    """Zbiór cech oferty, na którym liczymy podobieństwo Jaccarda."""
+    return ({f'c:{token}' for token in company_tokens(company)}
+            | {f't:{token}' for token in title_tokens(title)}
+            | {f'l:{name}' for name in locations(location)})
+
+
+def jaccard(first: set, second: set) -> float:
+    if not first or not second:
+        return 0.0
+    return len(first & second) / len(first | second)
+
+
+def _token_hash(token: str) -> int:
+    return int.from_bytes(hashlib.blake2b(token.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+def minhash(shingles: set) -> list:
+    hashes = [_token_hash(shingle) for shingle in shingles]
+    if not hashes:
+        return []
+    return [min((a * value + b) % _PRIME for value in hashes) for a, b in _PERMUTATIONS]
+
+
+def band_keys(signature: list) -> list:
+    """Klucze pasów LSH sygnatury (numer pasu jest częścią klucza)."""
+    keys = []
+    for band in range(len(signature) // ROWS_PER_BAND):
+        rows = signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]
+        payload = f"{band}:{','.join(map(str, rows))}".encode('ascii')
+        keys.append(hashlib.blake2b(payload, digest_size=8).hexdigest())
+    return keys
+
+
+def link_duplicates(offers: list, offer_model, band_model) -> int:
+    """
+    Zapisuje pasy LSH ofert i łączy je z ofertą kanoniczną, jeśli na innym portalu (innym source)
+    jest już oferta o tym samym poziomie stanowiska (LEVEL_TOKENS), podobieństwie co najmniej
+    SCRAPER_DEDUP_THRESHOLD i podobieństwie samych tytułów co najmniej SCRAPER_DEDUP_TITLE_THRESHOLD
+    (przy długiej liście wspólnych miast 'Python Developer' i 'Java Developer' tej samej firmy
+    przekraczają próg całości). Oferty z jednego portalu nigdy nie są duplikatami - podobne ogłoszenia
+    jednej firmy to zwykle różne stanowiska. Kanoniczną jest zawsze najstarsza (o najmniejszym id)
+    oferta z grupy, więc łańcuchy duplikatów się nie tworzą.
+    Przyjmuje modele jako argumenty, żeby działało także w migracji (historyczne modele).
+
+    Args:
+        offers (list): słowniki z kluczami id, company, title, location, source (oferty nowe lub zmienione).
+
+    Returns:
+        int: liczba ofert oznaczonych jako duplikaty.
+    """
+    if not offers:
+        return 0
+    shingles = {offer['id']: offer_shingles(offer['company'], offer['title'], offer['location']) for offer in offers}
+    # Portal, poziom stanowiska i słowa tytułu ofert z paczki i kandydatów.
+    kinds = {offer['id']: (offer['source'], level_tokens(offer['title'])) for offer in offers}
+    titles = {offer['id']: set(title_tokens(offer['title'])) for offer in offers}
+    bands = {offer_id: band_keys(minhash(tokens)) for offer_id, tokens in shingles.items()}
+
+    band_model.objects.filter(offer_id__in=list(bands)).delete()
+    band_model.objects.bulk_create([band_model(offer_id=offer_id, key=key)
+                                    for offer_id, keys in bands.items() for key in keys])
+
+    all_keys = {key for keys in bands.values() for key in keys}
+    offers_by_key = {}
+    for offer_id, key in band_model.objects.filter(key__in=all_keys).values_list('offer_id', 'key'):
+        offers_by_key.setdefault(key, set()).add(offer_id)
+    candidate_ids = {offer_id for ids in offers_by_key.values() for offer_id in ids} - set(bands)
+    candidates = {row['id']: row for row in offer_model.objects.filter(id__in=candidate_ids)
+                  .values('id', 'company', 'title', 'location', 'source', 'canonical_id')}
+    kinds.update({row['id']: (row['source'], level_tokens(row['title'])) for row in candidates.values()})
+    titles.update({row['id']: set(title_tokens(row['title'])) for row in candidates.values()})
+
+    threshold = settings.SCRAPER_DEDUP_THRESHOLD
+    title_threshold = settings.SCRAPER_DEDUP_TITLE_THRESHOLD
+    canonical = {}
+    # Od najstarszych: oferta z paczki może być duplikatem starszej oferty z tej samej paczki.
+    for offer_id in sorted(bands):
+        source, levels = kinds[offer_id]
+        matches = {other for key in bands[offer_id] for other in offers_by_key.get(key, ())
+                   if other < offer_id and other in kinds and kinds[other][0] != source and kinds[other][1] == levels
+                   and jaccard(titles[offer_id], titles[other]) >= title_threshold}
+        best = None
+        for other in matches:
+            if other in canonical:
+                other_shingles, root = shingles[other], canonical[other]
+            elif other in candidates:
+                row = candidates[other]
+                other_shingles, root = offer_shingles(row['company'], row['title'], row['location']), row['canonical_id']
+            else:
+                continue
+            if jaccard(shingles[offer_id], other_shingles) >= threshold:
+                root = root or other
+                best = root if best is None else min(best, root)
+        canonical[offer_id] = best
+
+    offer_model.objects.bulk_update([offer_model(id=offer_id, canonical_id=canonical_id)
+                                     for offer_id, canonical_id in canonical.items()], ['canonical'])
+    return sum(1 for canonical_id in canonical.values() if canonical_id)
+
+
+def known_duplicate_dates(offers) -> dict:
+    """
+    Daty publikacji ofert, które już mamy w bazie pod innym URL-em (np. z drugiego portalu)
+    z tym samym odciskiem. Dla nich nie trzeba pobierać strony szczegółów.
+
+    Returns:
+        dict: {url: data publikacji}
+    """
+    fingerprints = {offer['url']: offer_fingerprint(offer.get('company'), offer.get('title'), offer.get('location'))
+                    for offer in offers}
+    if not fingerprints:
+        return {}
+    dates = dict(JobOffer.objects.filter(fingerprint__in=set(fingerprints.values()), date_posted__isnull=False)
+                 .exclude(url__in=list(fingerprints)).values_list('fingerprint', 'date_posted'))
+    return {url: dates[fingerprint] for url, fingerprint in fingerprints.items() if fingerprint in dates}
@@ -0,0 +1,98 @@
+from asgiref.sync import sync_to_async
+from datetime import date
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+import csv
+import json
+import zlib
+
+# Kolumny eksportu ofert (w tej kolejności w CSV).
+EXPORT_FIELDS = ['id', 'title', 'company', 'location', 'is_remote', 'url', 'source', 'main_technology',
+                 'experience_level', 'skills', 'salary', 'salary_min', 'salary_max', 'salary_currency',
+                 'salary_period', 'salary_contract', 'salary_min_monthly_pln', 'salary_max_monthly_pln',
+                 'date_posted', 'scraped_date', 'last_seen', 'expired_at', 'canonical_id']
+# Format: typ MIME.
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+# Wiersze wysyłamy kawałkami tej wielkości (w znakach przed kompresją), a nie pojedynczo.
+EXPORT_BUFFER_SIZE = 64 * 1024
+
+
+class _Echo:
+    """Bufor dla csv.writer, który zamiast zapisywać od razu zwraca sformatowany wiersz."""
+
+    def write(self, value):
+        return value
+
+
+def _csv_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+def _csv_lines(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        yield writer.writerow([_csv_value(value) for value in row])
+
+
+def _ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(dict(zip(EXPORT_FIELDS, row)), cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+
+
+_LINES = {'csv': _csv_lines, 'ndjson': _ndjson_lines}
+
+
+def export_chunks(offers, export_format: str, compress: bool = False):
+    """
+    Generator kolejnych kawałków (bytes) pliku eksportu ofert z `offers` w formacie CSV albo NDJSON,
+    opcjonalnie skompresowanych gzipem w locie.
+
+    Wiersze są czytane kursorem po EXPORT_CHUNK_SIZE (w PostgreSQL kursorem po stronie serwera),
+    więc zużycie pamięci nie zależy od liczby eksportowanych ofert.
+    """
+    rows = (offers.order_by('id').values_list(*EXPORT_FIELDS)
+            .iterator(chunk_size=settings.EXPORT_CHUNK_SIZE))
+    # wbits=31: nagłówek i suma kontrolna gzip, a nie surowy strumień zlib.
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS) if compress else None
+
+    def encode(lines):
+        data = ''.join(lines).encode('utf-8')
+        return compressor.compress(data) if compressor else data
+
+    buffer, size = [], 0
+    for line in _LINES[export_format](rows):
+        buffer.append(line)
+        size += len(line)
+        if size >= EXPORT_BUFFER_SIZE:
+            chunk = encode(buffer)
+            buffer, size = [], 0
+            if chunk:
+                yield chunk
+    chunk = encode(buffer)
+    if compressor:
+        chunk += compressor.flush()
+    if chunk:
+        yield chunk
+
+
+async def async_chunks(chunks):
+    """
+    Asynchroniczna nakładka na generator export_chunks dla serwera ASGI. Zwykły iterator Django pod ASGI
+    czyta w całości (do listy) przed wysłaniem pierwszego bajtu, a tu każdy kawałek pobieramy osobno
+    w wątku synchronicznym żądania (sync_to_async), więc odpowiedź nadal płynie w trakcie czytania z bazy.
+    """
+    done = object()
+    try:
+        while (chunk := await sync_to_async(next)(chunks, done)) is not done:
+            yield chunk
+    finally:
+        # Zamyka kursor bazy także wtedy, gdy klient przerwie pobieranie.
+        await sync_to_async(chunks.close)()
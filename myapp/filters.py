@@ -0,0 +1,44 @@
+from datetime import date, datetime, time, timedelta
+from django.utils import timezone
+from .locations import city_key
+from .models import JobOffer
+
+
+def day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def filter_offers(params):
+    """
+    Buduje zapytanie o oferty z parametrów GET. Wszystkie filtry to porównania na kolumnach
+    z indeksami. Dla błędnych wartości zgłasza ValueError.
+    """
+    offers = JobOffer.objects.all()
+    if params.get('include_expired') != '1':
+        offers = offers.filter(expired_at__isnull=True)
+    # Domyślnie bez duplikatów tej samej oferty z drugiego portalu.
+    if params.get('include_duplicates') != '1':
+        offers = offers.filter(canonical__isnull=True)
+    if params.get('source'):
+        offers = offers.filter(source=params['source'])
+    if params.get('technology'):
+        offers = offers.filter(main_technology=params['technology'].lower())
+    if params.get('experience'):
+        offers = offers.filter(experience_level=params['experience'])
+    if params.get('city'):
+        offers = offers.filter(cities__key=city_key(params['city']))
+    if params.get('remote') == '1':
+        offers = offers.filter(is_remote=True)
+    if params.get('search', '').isdigit():
+        offers = offers.filter(search_results__search_id=params['search'], search_results__expired_at__isnull=True)
+    # Zakres dat zescrapowania (YYYY-MM-DD, oba końce włącznie) jako przedział czasu, żeby użyć indeksu.
+    if params.get('date_from'):
+        offers = offers.filter(scraped_date__gte=day_start(date.fromisoformat(params['date_from'])))
+    if params.get('date_to'):
+        offers = offers.filter(scraped_date__lt=day_start(date.fromisoformat(params['date_to']) + timedelta(days=1)))
+    # Widełki w PLN miesięcznie: oferty, których przedział nachodzi na podany zakres.
+    if params.get('salary_min'):
+        offers = offers.filter(salary_max_monthly_pln__gte=int(params['salary_min']))
+    if params.get('salary_max'):
+        offers = offers.filter(salary_min_monthly_pln__lte=int(params['salary_max']))
+    return offers
@@ -0,0 +1,141 @@
+from django.db import transaction
+from django.utils import timezone
+from itertools import islice
+from .dedup import link_duplicates, offer_fingerprint
+from .locations import parse_locations, sync_offer_cities
+from .models import City, JobOffer, OfferSignatureBand, OfferSkill, SearchResult
+from .salary import SALARY_FIELDS, parse_salary
+from .scrapers.profiling import phase
+from .skills import parse_skills, sync_offer_skills
+import hashlib
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Pola oferty zapisywane przy scrapowaniu. Przy konflikcie URL-a aktualizujemy wszystkie
+# poza datą pierwszego zescrapowania.
+OFFER_FIELDS = ['title', 'company', 'location', 'salary', 'skills', 'source',
+                'main_technology', 'experience_level', 'date_posted']
+# Liczbowe widełki, flaga pracy zdalnej i odcisk oferty wynikają z pozostałych pól, więc nie wchodzą do skrótu.
+UPSERT_FIELDS = OFFER_FIELDS + SALARY_FIELDS + ['is_remote', 'fingerprint', 'content_hash']
+
+
+def chunked(iterable, size: int):
+    """Dzieli dowolny iterowalny zbiór (również generator) na listy po `size` elementów."""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def content_hash(row: dict) -> str:
+    """Skrót zapisywanych pól oferty. Jeśli się nie zmienił, oferta w bazie jest aktualna."""
+    payload = json.dumps([row.get(field) for field in OFFER_FIELDS], ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _prepare_row(offer_data: dict, technology: str, experience: str) -> dict:
+    row = {field: offer_data.get(field) for field in OFFER_FIELDS}
+    # Małymi literami, żeby filtr po technologii był zwykłym porównaniem korzystającym z indeksu.
+    row['main_technology'] = technology.lower()
+    row['experience_level'] = experience if experience != 'all' else "Nie określono"
+    row['url'] = offer_data['url']
+    row['content_hash'] = content_hash(row)
+    row.update(parse_salary(row['salary']))
+    row['is_remote'] = parse_locations(row['location'])[1]
+    row['fingerprint'] = offer_fingerprint(row['company'], row['title'], row['location'])
+    return row
+
+
+def persist_offers(offers: list, technology: str, experience: str, search=None) -> int:
+    """
+    Zapisuje paczkę ofert do bazy danych razem z powiązaniami do znormalizowanych umiejętności i miast.
+    Cała paczka to kilka zapytań w jednej transakcji: odczyt skrótów istniejących ofert
+    i jeden zbiorczy upsert (INSERT ... ON CONFLICT) tylko dla ofert nowych lub zmienionych.
+    Nowe i zmienione oferty są też łączone z ofertą kanoniczną, jeśli to duplikat (myapp.dedup).
+    Wszystkim ofertom z paczki (także niezmienionym) odświeżamy last_seen, a jeśli podano
+    wyszukiwanie, dopisujemy je do jego zbioru wyników.
+
+    Returns:
+        int: liczba nowo dodanych ofert.
+    """
+    with phase('db_write'):
+        # Ten sam URL może wystąpić w paczce kilka razy, zostawiamy ostatnie wystąpienie.
+        rows = {offer_data['url']: _prepare_row(offer_data, technology, experience) for offer_data in offers}
+        if not rows:
+            return 0
+
+        now = timezone.now()
+        with transaction.atomic():
+            known = {url: (offer_id, offer_hash) for url, offer_id, offer_hash in
+                     JobOffer.objects.filter(url__in=list(rows)).values_list('url', 'id', 'content_hash')}
+            changed = [row for url, row in rows.items() if url not in known or known[url][1] != row['content_hash']]
+            offers_added = sum(1 for url in rows if url not in known)
+            logger.debug(f"Paczka {len(rows)} ofert: {offers_added} nowych, "
+                         f"{len(changed) - offers_added} zmienionych, {len(rows) - len(changed)} bez zmian.")
+
+            if changed:
+                JobOffer.objects.bulk_create(
+                    [JobOffer(**row, last_seen=now) for row in changed],
+                    update_conflicts=True,
+                    unique_fields=['url'],
+                    update_fields=UPSERT_FIELDS + ['last_seen', 'expired_at'],
+                )
+                # Umiejętności i miasta zmieniają się tylko razem z treścią oferty, więc synchronizujemy je dla zmienionych.
+                offer_ids = dict(JobOffer.objects.filter(url__in=[row['url'] for row in changed])
+                                 .values_list('url', 'id'))
+                sync_offer_skills(
+                    {offer_ids[row['url']]: parse_skills(row['skills']) for row in changed},
+                    OfferSkill, JobOffer.skill_tags.through,
+                )
+                sync_offer_cities(
+                    {offer_ids[row['url']]: parse_locations(row['location'])[0] for row in changed},
+                    City, JobOffer.cities.through,
+                )
+                link_duplicates(
+                    [{'id': offer_ids[row['url']], 'company': row['company'], 'title': row['title'],
+                      'location': row['location'], 'source': row['source']} for row in changed],
+                    JobOffer, OfferSignatureBand,
+                )
+            else:
+                offer_ids = {}
+
+            unchanged_ids = [known[url][0] for url in rows if url in known and url not in offer_ids]
+            if unchanged_ids:
+                # Niezmienione oferty tylko oznaczamy jako widziane - jedno wąskie UPDATE.
+                JobOffer.objects.filter(id__in=unchanged_ids).update(last_seen=now, expired_at=None)
+
+            if search is not None:
+                all_ids = list(offer_ids.values()) + unchanged_ids
+                SearchResult.objects.bulk_create(
+                    [SearchResult(search=search, offer_id=offer_id, last_seen=now) for offer_id in all_ids],
+                    update_conflicts=True,
+                    unique_fields=['search', 'offer'],
+                    update_fields=['last_seen', 'expired_at'],
+                )
+    return offers_added
+
+
+def expire_unseen(search, source: str, seen_since) -> int:
+    """
+    Oznacza jako wygasłe oferty ze zbioru wyników wyszukiwania (dla jednego źródła),
+    których nie widzieliśmy od `seen_since`. Oferta jest wygaszana całkowicie dopiero wtedy,
+    gdy nie występuje już w żadnym aktywnym wyszukiwaniu. Nic nie jest usuwane.
+
+    Returns:
+        int: liczba ofert usuniętych ze zbioru wyników wyszukiwania.
+    """
+    now = timezone.now()
+    with phase('db_write'), transaction.atomic():
+        expired = SearchResult.objects.filter(
+            search=search, offer__source=source, expired_at__isnull=True, last_seen__lt=seen_since,
+        ).update(expired_at=now)
+        if expired:
+            (JobOffer.objects
+             .filter(source=source, expired_at__isnull=True, last_seen__lt=seen_since, search_results__search=search)
+             .exclude(search_results__expired_at__isnull=True)
+             .update(expired_at=now))
+    return expired
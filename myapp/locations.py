@@ -0,0 +1,102 @@
+import re
+import unicodedata
+
+# Nazwy oznaczające pracę zdalną. Nie są miastami, tylko ustawiają JobOffer.is_remote.
+REMOTE_NAMES = {'remote', 'zdalnie', 'zdalna', 'praca zdalna', 'fully remote', 'hybrid remote'}
+
+# Różne zapisy tego samego miasta (angielskie nazwy, brak polskich znaków) sprowadzamy do jednej nazwy.
+# Klucze są już po normalizacji funkcją fold.
+CITY_ALIASES = {
+    'warszawa': 'Warszawa',
+    'warsaw': 'Warszawa',
+    'krakow': 'Kraków',
+    'cracow': 'Kraków',
+    'wroclaw': 'Wrocław',
+    'gdansk': 'Gdańsk',
+    'gdynia': 'Gdynia',
+    'sopot': 'Sopot',
+    'trojmiasto': 'Trójmiasto',
+    'poznan': 'Poznań',
+    'lodz': 'Łódź',
+    'katowice': 'Katowice',
+    'szczecin': 'Szczecin',
+    'lublin': 'Lublin',
+    'bialystok': 'Białystok',
+    'bydgoszcz': 'Bydgoszcz',
+    'torun': 'Toruń',
+    'rzeszow': 'Rzeszów',
+    'gliwice': 'Gliwice',
+    'bielsko biala': 'Bielsko-Biała',
+}
+
+_LETTER_MAP = str.maketrans({'ł': 'l', 'Ł': 'L'})
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+_WHITESPACE_RE = re.compile(r'\s+')
+# Klucz jest używany jako unikalny indeks, więc musi mieścić się w kolumnie City.key.
+MAX_CITY_LENGTH = 100
+
+
+def fold(text: str) -> str:
+    """Małe litery bez polskich znaków i akcentów ('Łódź' -> 'lodz')."""
+    text = unicodedata.normalize('NFKD', (text or '').translate(_LETTER_MAP))
+    return ''.join(char for char in text if not unicodedata.combining(char)).lower()
+
+
+def city_key(raw: str) -> str:
+    """Klucz porównania miasta: same litery i cyfry rozdzielone pojedynczymi spacjami."""
+    return ' '.join(_TOKEN_RE.findall(fold(raw)))[:MAX_CITY_LENGTH]
+
+
+def parse_locations(location_text: str):
+    """
+    Rozbija tekst lokalizacji z listingów ('Gdańsk, Kraków, Warszawa', 'Zdalnie +5', 'Kraków +2')
+    na listę unikalnych par (klucz, nazwa) miast i flagę pracy zdalnej.
+    Dopiski '+N' (liczba pozostałych lokalizacji w skróconej karcie NFJ) są pomijane.
+
+    Returns:
+        tuple: ([(klucz, nazwa), ...], czy praca zdalna)
+    """
+    cities = {}
+    remote = False
+    for part in (location_text or '').split(','):
+        raw = _WHITESPACE_RE.sub(' ', part.split('+')[0]).strip()
+        key = city_key(raw)
+        if not key:
+            continue
+        if key in REMOTE_NAMES:
+            remote = True
+            continue
+        name = CITY_ALIASES.get(key)
+        if name is None:
+            name = raw[:MAX_CITY_LENGTH]
+        else:
+            key = city_key(name)
+        cities.setdefault(key, name)
+    return list(cities.items()), remote
+
+
+def sync_offer_cities(offer_cities: dict, city_model, through_model):
+    """
+    Zapisuje powiązania ofert z miastami kilkoma zapytaniami zbiorczymi.
+    Przyjmuje modele jako argumenty, żeby działało także w migracji (historyczne modele).
+
+    Args:
+        offer_cities (dict): {id oferty: [(klucz, nazwa), ...]} - dotychczasowe powiązania tych ofert są zastępowane.
+    """
+    if not offer_cities:
+        return
+    names = {key: name for pairs in offer_cities.values() for key, name in pairs}
+    if names:
+        city_model.objects.bulk_create(
+            [city_model(key=key, name=name) for key, name in names.items()],
+            ignore_conflicts=True,
+        )
+    city_ids = dict(city_model.objects.filter(key__in=list(names)).values_list('key', 'id'))
+
+    through_model.objects.filter(joboffer_id__in=list(offer_cities)).delete()
+    through_model.objects.bulk_create([
+        through_model(joboffer_id=offer_id, city_id=city_ids[key])
+        for offer_id, pairs in offer_cities.items()
+        for key, _ in pairs
+        if key in city_ids
+    ])
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from myapp.models import JobOffer
+from myapp.salary import SALARY_FIELDS, parse_salary
+
+
+class Command(BaseCommand):
+    help = 'Wypełnia liczbowe kolumny widełek (salary_min, salary_max, ...) na podstawie tekstu salary.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--all', action='store_true',
+                            help='Przelicz wszystkie oferty, także te z już wypełnionymi kolumnami.')
+
+    def handle(self, *args, **options):
+        offers = JobOffer.objects.exclude(salary__isnull=True).exclude(salary='')
+        if not options['all']:
+            offers = offers.filter(salary_currency='')
+        batch_size = options['batch_size']
+
+        updated = 0
+        last_id = 0
+        while True:
+            # Paczki po kluczu głównym, żeby nie trzymać w pamięci całej tabeli.
+            batch = list(offers.filter(pk__gt=last_id).order_by('pk').only('pk', 'salary')[:batch_size])
+            if not batch:
+                break
+            for offer in batch:
+                for field, value in parse_salary(offer.salary).items():
+                    setattr(offer, field, value)
+            JobOffer.objects.bulk_update(batch, SALARY_FIELDS)
+            updated += len(batch)
+            last_id = batch[-1].pk
+
+        self.stdout.write(self.style.SUCCESS(f"Przetworzono widełki {updated} ofert."))
@@ -0,0 +1,69 @@
+from django.core.management.base import BaseCommand, CommandError
+from myapp.benchmarks.runner import (
+    BASELINE_PATH, SCENARIOS, compare_with_baseline, load_baseline, run_scenario, save_baseline,
+)
+from myapp.benchmarks.server import FixtureServer
+from myapp.scrapers.browser import shutdown_browser_pool
+import json
+
+
+class Command(BaseCommand):
+    help = ('Mierzy wydajność scraperów na nagranych stronach serwowanych lokalnie '
+            'i porównuje wyniki z zapisanym baseline.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scenario', action='append', choices=sorted(SCENARIOS),
+                            help='Scenariusz do uruchomienia (można podać wiele razy). Domyślnie wszystkie.')
+        parser.add_argument('--offers', type=int, default=40, help='Liczba ofert w listingach.')
+        parser.add_argument('--latency-ms', type=int, default=0, help='Sztuczne opóźnienie każdej odpowiedzi.')
+        parser.add_argument('--technology', default='python')
+        parser.add_argument('--baseline', default=str(BASELINE_PATH), help='Plik JSON z baseline.')
+        parser.add_argument('--tolerance', type=float, default=0.25,
+                            help='Dopuszczalny spadek przepustowości / wzrost RSS względem baseline (ułamek).')
+        parser.add_argument('--update-baseline', action='store_true',
+                            help='Zapisuje wyniki jako nowy baseline zamiast porównywać.')
+        parser.add_argument('--json', action='store_true', help='Wypisuje wyniki jako JSON.')
+
+    def handle(self, *args, **options):
+        scenarios = options['scenario'] or list(SCENARIOS)
+        results, errors = [], []
+        try:
+            with FixtureServer(offers=options['offers'], latency=options['latency_ms'] / 1000,
+                               technology=options['technology']) as server:
+                for name in scenarios:
+                    try:
+                        results.append(run_scenario(name, server, options['technology']))
+                    except Exception as e:
+                        errors.append(f"{name}: {e}")
+        finally:
+            shutdown_browser_pool()
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+        else:
+            for result in results:
+                self._write_result(result)
+        for error in errors:
+            self.stderr.write(self.style.ERROR(f"Scenariusz nie powiódł się: {error}"))
+
+        baseline = load_baseline(options['baseline'])
+        if options['update_baseline']:
+            save_baseline(results, options['baseline'], previous=baseline)
+            self.stdout.write(self.style.SUCCESS(f"Zapisano baseline do {options['baseline']}."))
+        else:
+            regressions = compare_with_baseline(results, baseline, options['tolerance'])
+            if regressions:
+                raise CommandError("Wykryto regresję wydajności:\n" + "\n".join(regressions))
+            self.stdout.write(self.style.SUCCESS("Wyniki w normie względem baseline."))
+
+        if errors:
+            raise CommandError(f"{len(errors)} scenariuszy zakończyło się błędem.")
+
+    def _write_result(self, result: dict):
+        self.stdout.write(self.style.MIGRATE_HEADING(f"--- {result['scenario']} ---"))
+        self.stdout.write(
+            f"Oferty: {result['offers']} w {result['seconds']} s ({result['offers_per_sec']} ofert/s), "
+            f"szczytowe RSS: {result['peak_rss_mb']} MB, strony przeglądarki: {result['browser_pages']}"
+        )
+        for name, timing in sorted(result['phases'].items(), key=lambda item: -item[1]['total']):
+            self.stdout.write(f"  {name:<24} {timing['total']:>8.3f} s  ({timing['count']}x, max {timing['max']:.3f} s)")
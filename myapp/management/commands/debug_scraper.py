@@ -1,7 +1,9 @@
 # /Users/jakublanda/Desktop/web_app/demo/myapp/management/commands/debug_scraper.py
 
 from django.core.management.base import BaseCommand
-from myapp.scrapers import scrape_nofluffjobs
+from django.test.utils import override_settings
+from myapp.scrapers.browser import shutdown_browser_pool
+from myapp.scrapers.nofluff import scrape_nofluffjobs
 import logging
 
 # Ustawiamy logger, aby widzieć komunikaty w terminalu
@@ -15,12 +17,16 @@ class Command(BaseCommand):
         self.stdout.write(self.style.SUCCESS("--- Uruchamiam scraper w trybie podglądu... ---"))
         self.stdout.write("Obserwuj otwierające się okno przeglądarki!")
 
-        # Ta linia otworzy widoczne okno przeglądarki.
+        # Ta linia otworzy widoczne okno przeglądarki. Scraper jest generatorem,
+        # więc dopiero list() faktycznie uruchamia scrapowanie.
         try:
-            offers = scrape_nofluffjobs(technology='python', experience='all')
+            with override_settings(SCRAPER_BROWSER_HEADLESS=False):
+                offers = list(scrape_nofluffjobs(technology='python', experience='all'))
         except Exception as e:
             self.stderr.write(self.style.ERROR(f"Wystąpił błąd podczas scrapowania: {e}"))
             return
+        finally:
+            shutdown_browser_pool()
 
         self.stdout.write(self.style.SUCCESS("--- Scraper zakończył pracę. Analizuję wyniki... ---"))
 
@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand, CommandError
+from myapp.export import EXPORT_FORMATS, export_chunks
+from myapp.filters import filter_offers
+
+# Opcje komendy przekazywane do filter_offers (te same nazwy co parametry GET eksportu w API).
+FILTER_OPTIONS = ['source', 'technology', 'experience', 'city', 'date_from', 'date_to', 'salary_min', 'salary_max']
+FLAG_OPTIONS = ['remote', 'include_expired', 'include_duplicates']
+
+
+class Command(BaseCommand):
+    help = 'Eksportuje oferty do pliku CSV lub NDJSON (opcjonalnie gzip), strumieniowo - bez ładowania wszystkich do pamięci.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=sorted(EXPORT_FORMATS), default='csv')
+        parser.add_argument('--gzip', action='store_true', help='Kompresuj wynik gzipem.')
+        parser.add_argument('--output', default='-', help="Ścieżka pliku wynikowego ('-' = standardowe wyjście).")
+        for name in FILTER_OPTIONS:
+            parser.add_argument(f"--{name.replace('_', '-')}", dest=name)
+        for name in FLAG_OPTIONS:
+            parser.add_argument(f"--{name.replace('_', '-')}", dest=name, action='store_true')
+
+    def handle(self, *args, **options):
+        params = {name: options[name] for name in FILTER_OPTIONS if options[name]}
+        params.update({name: '1' for name in FLAG_OPTIONS if options[name]})
+        try:
+            offers = filter_offers(params)
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        if options['output'] == '-':
+            self._write_stdout(export_chunks(offers, options['format'], options['gzip']), options['gzip'])
+            return
+        chunks = export_chunks(offers, options['format'], options['gzip'])
+        written = 0
+        with open(options['output'], 'wb') as f:
+            for chunk in chunks:
+                f.write(chunk)
+                written += len(chunk)
+        self.stdout.write(self.style.SUCCESS(f"Zapisano eksport ofert do {options['output']} ({written} B)."))
+
+    def _write_stdout(self, chunks, compressed):
+        """
+        Pisze eksport przez self.stdout, żeby call_command(..., stdout=...) dostał wynik.
+        Nieskompresowane kawałki to całe wiersze UTF-8, więc można je dekodować osobno; gzip wymaga
+        wyjścia binarnego (prawdziwego stdout z atrybutem buffer) albo --output.
+        """
+        if compressed:
+            binary = getattr(self.stdout, 'buffer', None)
+            if binary is None:
+                raise CommandError("Eksport z --gzip wymaga wyjścia binarnego albo ścieżki --output.")
+            for chunk in chunks:
+                binary.write(chunk)
+            binary.flush()
+            return
+        for chunk in chunks:
+            self.stdout.write(chunk.decode('utf-8'), ending='')
+        self.stdout.flush()
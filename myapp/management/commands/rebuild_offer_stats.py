@@ -0,0 +1,20 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from myapp.charts import refresh_platform_chart
+from myapp.rollups import refresh_daily_stats
+
+
+class Command(BaseCommand):
+    help = 'Przelicza dzienne statystyki ofert (DailyOfferStats) dla ostatnich N dni.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=30, help='Liczba dni wstecz, łącznie z dzisiejszym.')
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        total = 0
+        for offset in range(options['days'] - 1, -1, -1):
+            total += refresh_daily_stats(today - timedelta(days=offset))
+        refresh_platform_chart()
+        self.stdout.write(self.style.SUCCESS(f"Przeliczono {options['days']} dni ({total} wierszy)."))
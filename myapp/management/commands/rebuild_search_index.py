@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from myapp.search import install_search_index
+
+
+class Command(BaseCommand):
+    help = ('Odtwarza indeks pełnotekstowy ofert (kolumnę tsvector w PostgreSQL albo tabelę FTS5 z wyzwalaczami '
+            'w SQLite) i indeksuje zapisane oferty.')
+
+    def handle(self, *args, **options):
+        with connection.schema_editor() as schema_editor:
+            install_search_index(schema_editor)
+        self.stdout.write(self.style.SUCCESS(f"Indeks wyszukiwania odtworzony ({connection.vendor})."))
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-18 02:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0002_joboffer_main_technology'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OfferDetailCache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('url', models.URLField(max_length=500, unique=True)),
+                ('date_posted', models.DateField(blank=True, null=True)),
+                ('etag', models.CharField(blank=True, max_length=255)),
+                ('last_modified', models.CharField(blank=True, max_length=100)),
+                ('fetched_at', models.DateTimeField(help_text='kiedy dane zostały ostatnio pobrane lub potwierdzone przez serwer')),
+                ('last_used', models.DateTimeField(db_index=True, help_text='używane do usuwania najdawniej używanych wpisów')),
+            ],
+            options={
+                'verbose_name': 'Cache strony oferty',
+                'verbose_name_plural': 'Cache stron ofert',
+            },
+        ),
+    ]
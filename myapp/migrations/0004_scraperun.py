@@ -0,0 +1,38 @@
+# Generated by Django 5.2.7 on 2026-10-18 02:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0003_offerdetailcache'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScrapeRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task_id', models.CharField(blank=True, db_index=True, max_length=255)),
+                ('technology', models.CharField(max_length=100)),
+                ('experience', models.CharField(default='all', max_length=100)),
+                ('platforms', models.JSONField(default=list)),
+                ('incremental', models.BooleanField(default=False)),
+                ('status', models.CharField(choices=[('running', 'W trakcie'), ('success', 'Zakończony'), ('partial', 'Zakończony z błędami'), ('failed', 'Nieudany')], default='running', max_length=20)),
+                ('started_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('duration_seconds', models.FloatField(blank=True, null=True)),
+                ('offers_found', models.PositiveIntegerField(default=0)),
+                ('offers_added', models.PositiveIntegerField(default=0)),
+                ('error_count', models.PositiveIntegerField(default=0)),
+                ('platform_stats', models.JSONField(blank=True, default=dict, help_text='liczby ofert, błędy i czasy faz per platforma')),
+                ('phase_timings', models.JSONField(blank=True, default=dict, help_text='czasy faz zsumowane dla wszystkich platform (w sekundach)')),
+            ],
+            options={
+                'verbose_name': 'Uruchomienie scrapera',
+                'verbose_name_plural': 'Uruchomienia scrapera',
+                'ordering': ['-started_at'],
+            },
+        ),
+    ]
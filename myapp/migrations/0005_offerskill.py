@@ -0,0 +1,31 @@
+# Generated by Django 5.2.7 on 2026-10-18 02:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0004_scraperun'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OfferSkill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(help_text='nazwa po normalizacji, używana do wyszukiwania', max_length=100, unique=True)),
+                ('name', models.CharField(help_text='nazwa wyświetlana', max_length=100)),
+            ],
+            options={
+                'verbose_name': 'Umiejętność z ofert',
+                'verbose_name_plural': 'Umiejętności z ofert',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='joboffer',
+            name='skill_tags',
+            field=models.ManyToManyField(blank=True, help_text='umiejętności z pola skills po normalizacji', related_name='offers', to='myapp.offerskill'),
+        ),
+    ]
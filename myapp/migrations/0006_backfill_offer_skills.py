@@ -0,0 +1,162 @@
+from django.db import migrations
+import re
+
+BATCH_SIZE = 500
+
+# Zamrożona kopia myapp.skills z chwili dodania tej migracji: migracja danych musi dawać ten sam wynik
+# niezależnie od późniejszych zmian aliasów i normalizacji w kodzie aplikacji.
+
+# Różne zapisy tej samej umiejętności sprowadzamy do jednej nazwy.
+# Klucze są już po normalizacji (małe litery, pojedyncze spacje).
+SKILL_ALIASES = {
+    'js': 'JavaScript',
+    'javascript': 'JavaScript',
+    'ts': 'TypeScript',
+    'typescript': 'TypeScript',
+    'python': 'Python',
+    'python3': 'Python',
+    'python 3': 'Python',
+    'golang': 'Go',
+    'go': 'Go',
+    'postgres': 'PostgreSQL',
+    'postgresql': 'PostgreSQL',
+    'postgre sql': 'PostgreSQL',
+    'mysql': 'MySQL',
+    'mssql': 'MS SQL',
+    'ms sql': 'MS SQL',
+    'sql server': 'MS SQL',
+    'sql': 'SQL',
+    'k8s': 'Kubernetes',
+    'kubernetes': 'Kubernetes',
+    'react': 'React',
+    'react.js': 'React',
+    'reactjs': 'React',
+    'vue': 'Vue.js',
+    'vue.js': 'Vue.js',
+    'vuejs': 'Vue.js',
+    'angular': 'Angular',
+    'angularjs': 'Angular',
+    'node': 'Node.js',
+    'node.js': 'Node.js',
+    'nodejs': 'Node.js',
+    'c#': 'C#',
+    'c sharp': 'C#',
+    '.net': '.NET',
+    'dotnet': '.NET',
+    'c++': 'C++',
+    'cpp': 'C++',
+    'aws': 'AWS',
+    'amazon web services': 'AWS',
+    'gcp': 'GCP',
+    'google cloud': 'GCP',
+    'google cloud platform': 'GCP',
+    'azure': 'Azure',
+    'ms azure': 'Azure',
+    'docker': 'Docker',
+    'git': 'Git',
+    'rest': 'REST API',
+    'rest api': 'REST API',
+    'restful api': 'REST API',
+    'ci/cd': 'CI/CD',
+    'django': 'Django',
+    'django rest framework': 'Django REST Framework',
+    'drf': 'Django REST Framework',
+    'fastapi': 'FastAPI',
+    'flask': 'Flask',
+    'spring boot': 'Spring Boot',
+    'springboot': 'Spring Boot',
+    'java': 'Java',
+    'kotlin': 'Kotlin',
+    'linux': 'Linux',
+    'redis': 'Redis',
+    'celery': 'Celery',
+    'english': 'English',
+    'angielski': 'English',
+    'język angielski': 'English',
+}
+
+_WHITESPACE_RE = re.compile(r'\s+')
+# Klucz jest używany jako unikalny indeks, więc musi mieścić się w kolumnie OfferSkill.key.
+MAX_SKILL_LENGTH = 100
+
+
+def skill_key(raw: str) -> str:
+    """Klucz porównania umiejętności: małe litery i pojedyncze spacje, bez znaków na brzegach."""
+    return _WHITESPACE_RE.sub(' ', raw or '').strip(' \t\n,;').lower()[:MAX_SKILL_LENGTH]
+
+
+def normalize_skill(raw: str):
+    """
+    Zwraca parę (klucz, nazwa wyświetlana) dla umiejętności albo None dla pustego wpisu.
+    Znane aliasy mapujemy na wspólną nazwę (np. 'JS' -> 'JavaScript'), a pozostałe
+    zostawiamy w oryginalnym zapisie, porównując je bez względu na wielkość liter.
+    """
+    key = skill_key(raw)
+    if not key:
+        return None
+    name = SKILL_ALIASES.get(key)
+    if name is None:
+        return key, _WHITESPACE_RE.sub(' ', raw).strip(' \t\n,;')[:MAX_SKILL_LENGTH]
+    return skill_key(name), name
+
+
+def parse_skills(skills_text: str) -> list:
+    """Rozbija tekst 'Python, Django, JS' na listę unikalnych par (klucz, nazwa) w kolejności wystąpienia."""
+    parsed = {}
+    for raw in (skills_text or '').split(','):
+        normalized = normalize_skill(raw)
+        if normalized and normalized[0] not in parsed:
+            parsed[normalized[0]] = normalized[1]
+    return list(parsed.items())
+
+
+def sync_offer_skills(offer_skills: dict, skill_model, through_model):
+    """
+    Zapisuje powiązania ofert z umiejętnościami kilkoma zapytaniami zbiorczymi.
+    Przyjmuje modele jako argumenty, żeby działało także w migracji (historyczne modele).
+
+    Args:
+        offer_skills (dict): {id oferty: [(klucz, nazwa), ...]} - dotychczasowe powiązania tych ofert są zastępowane.
+    """
+    if not offer_skills:
+        return
+    names = {key: name for pairs in offer_skills.values() for key, name in pairs}
+    if names:
+        skill_model.objects.bulk_create(
+            [skill_model(key=key, name=name) for key, name in names.items()],
+            ignore_conflicts=True,
+        )
+    skill_ids = dict(skill_model.objects.filter(key__in=list(names)).values_list('key', 'id'))
+
+    through_model.objects.filter(joboffer_id__in=list(offer_skills)).delete()
+    through_model.objects.bulk_create([
+        through_model(joboffer_id=offer_id, offerskill_id=skill_ids[key])
+        for offer_id, pairs in offer_skills.items()
+        for key, _ in pairs
+        if key in skill_ids
+    ])
+
+
+def backfill_offer_skills(apps, schema_editor):
+    JobOffer = apps.get_model('myapp', 'JobOffer')
+    OfferSkill = apps.get_model('myapp', 'OfferSkill')
+    through_model = JobOffer.skill_tags.through
+
+    batch = {}
+    for offer_id, skills in JobOffer.objects.exclude(skills__isnull=True).values_list('id', 'skills').iterator():
+        batch[offer_id] = parse_skills(skills)
+        if len(batch) >= BATCH_SIZE:
+            sync_offer_skills(batch, OfferSkill, through_model)
+            batch = {}
+    sync_offer_skills(batch, OfferSkill, through_model)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0005_offerskill'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_offer_skills, migrations.RunPython.noop),
+    ]
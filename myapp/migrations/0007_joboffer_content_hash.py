@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 02:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0006_backfill_offer_skills'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='joboffer',
+            name='content_hash',
+            field=models.CharField(blank=True, help_text='skrót danych oferty; niezmienione oferty nie są ponownie zapisywane', max_length=64),
+        ),
+    ]
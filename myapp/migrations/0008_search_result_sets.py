@@ -0,0 +1,79 @@
+# Generated by Django 5.2.7 on 2026-10-18 02:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def set_last_seen_from_scraped_date(apps, schema_editor):
+    JobOffer = apps.get_model('myapp', 'JobOffer')
+    JobOffer.objects.filter(last_seen__isnull=True).update(last_seen=models.F('scraped_date'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0007_joboffer_content_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchQuery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('technology', models.CharField(max_length=100)),
+                ('experience', models.CharField(default='all', max_length=100)),
+                ('platforms', models.CharField(help_text='posortowane platformy rozdzielone przecinkami', max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_run_at', models.DateTimeField(blank=True, db_index=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Wyszukiwanie',
+                'verbose_name_plural': 'Wyszukiwania',
+                'ordering': ['-last_run_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='joboffer',
+            name='expired_at',
+            field=models.DateTimeField(blank=True, help_text='kiedy oferta zniknęła ze wszystkich wyszukiwań, w których występowała', null=True),
+        ),
+        migrations.AddField(
+            model_name='joboffer',
+            name='last_seen',
+            field=models.DateTimeField(blank=True, db_index=True, help_text='kiedy oferta była ostatnio widoczna na portalu', null=True),
+        ),
+        migrations.AddField(
+            model_name='scraperun',
+            name='search',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='runs', to='myapp.searchquery'),
+        ),
+        migrations.CreateModel(
+            name='SearchResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('first_seen', models.DateTimeField(auto_now_add=True)),
+                ('last_seen', models.DateTimeField()),
+                ('expired_at', models.DateTimeField(blank=True, null=True)),
+                ('offer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_results', to='myapp.joboffer')),
+                ('search', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='results', to='myapp.searchquery')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='searchquery',
+            name='offers',
+            field=models.ManyToManyField(related_name='searches', through='myapp.SearchResult', to='myapp.joboffer'),
+        ),
+        migrations.AddIndex(
+            model_name='searchresult',
+            index=models.Index(fields=['search', 'expired_at'], name='search_result_active_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='searchresult',
+            constraint=models.UniqueConstraint(fields=('search', 'offer'), name='unique_search_result'),
+        ),
+        migrations.AddConstraint(
+            model_name='searchquery',
+            constraint=models.UniqueConstraint(fields=('technology', 'experience', 'platforms'), name='unique_search_query'),
+        ),
+        migrations.RunPython(set_last_seen_from_scraped_date, migrations.RunPython.noop),
+    ]
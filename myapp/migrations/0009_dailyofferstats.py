@@ -0,0 +1,35 @@
+# Generated by Django 5.2.7 on 2026-10-18 03:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0008_search_result_sets'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyOfferStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('source', models.CharField(max_length=100)),
+                ('main_technology', models.CharField(blank=True, max_length=100)),
+                ('experience_level', models.CharField(blank=True, max_length=100)),
+                ('active_offers', models.PositiveIntegerField(default=0, help_text='oferty aktywne na koniec dnia')),
+                ('new_offers', models.PositiveIntegerField(default=0, help_text='oferty zescrapowane po raz pierwszy tego dnia')),
+                ('expired_offers', models.PositiveIntegerField(default=0, help_text='oferty wygaszone tego dnia')),
+                ('offers_with_salary', models.PositiveIntegerField(default=0, help_text='aktywne oferty z podanymi widełkami')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Dzienne statystyki ofert',
+                'verbose_name_plural': 'Dzienne statystyki ofert',
+                'ordering': ['-date', 'source'],
+                'indexes': [models.Index(fields=['main_technology', 'date'], name='daily_stats_tech_date_idx')],
+                'constraints': [models.UniqueConstraint(fields=('date', 'source', 'main_technology', 'experience_level'), name='unique_daily_offer_stats')],
+            },
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.7 on 2026-10-18 03:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0009_dailyofferstats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dailyofferstats',
+            name='salary_max_sum',
+            field=models.PositiveBigIntegerField(default=0, help_text='suma górnych granic widełek (PLN/mies.)'),
+        ),
+        migrations.AddField(
+            model_name='dailyofferstats',
+            name='salary_min_sum',
+            field=models.PositiveBigIntegerField(default=0, help_text='suma dolnych granic widełek (PLN/mies.)'),
+        ),
+        migrations.AddField(
+            model_name='joboffer',
+            name='salary_contract',
+            field=models.CharField(blank=True, choices=[('b2b', 'B2B'), ('permanent', 'Umowa o pracę'), ('mandate', 'Umowa zlecenie'), ('specific_task', 'Umowa o dzieło')], max_length=20),
+        ),
+        migrations.AddField(
+            model_name='joboffer',
+            name='salary_currency',
+            field=models.CharField(blank=True, max_length=3),
+        ),
+        migrations.AddField(
+            model_name='joboffer',
+            name='salary_max',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True),
+        ),
+        migrations.AddField(
+            model_name='joboffer',
+            name='salary_max_monthly_pln',
+            field=models.PositiveIntegerField(blank=True, db_index=True, help_text='górna granica widełek w PLN miesięcznie', null=True),
+        ),
+        migrations.AddField(
+            model_name='joboffer',
+            name='salary_min',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True),
+        ),
+        migrations.AddField(
+            model_name='joboffer',
+            name='salary_min_monthly_pln',
+            field=models.PositiveIntegerField(blank=True, db_index=True, help_text='dolna granica widełek w PLN miesięcznie', null=True),
+        ),
+        migrations.AddField(
+            model_name='joboffer',
+            name='salary_period',
+            field=models.CharField(blank=True, choices=[('hour', 'Godzinowo'), ('day', 'Dziennie'), ('month', 'Miesięcznie'), ('year', 'Rocznie')], max_length=10),
+        ),
+    ]
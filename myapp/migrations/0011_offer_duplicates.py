@@ -0,0 +1,32 @@
+# Generated by Django 5.2.7 on 2026-10-18 03:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0010_joboffer_salary_columns'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='joboffer',
+            name='canonical',
+            field=models.ForeignKey(blank=True, help_text='najstarsza oferta z tą samą pracą, np. z drugiego portalu', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='duplicates', to='myapp.joboffer'),
+        ),
+        migrations.AddField(
+            model_name='joboffer',
+            name='fingerprint',
+            field=models.CharField(blank=True, db_index=True, help_text='skrót znormalizowanych firmy, tytułu i lokalizacji (myapp.dedup)', max_length=40),
+        ),
+        migrations.CreateModel(
+            name='OfferSignatureBand',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(db_index=True, max_length=16)),
+                ('offer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='signature_bands', to='myapp.joboffer')),
+            ],
+        ),
+    ]
@@ -0,0 +1,176 @@
+from django.db import migrations
+import hashlib
+import random
+import re
+import unicodedata
+
+BATCH_SIZE = 500
+
+# Zamrożona kopia logiki myapp.dedup: migracja danych musi dawać ten sam wynik
+# niezależnie od późniejszych zmian normalizacji i progów w kodzie aplikacji.
+
+NUM_BANDS = 10
+ROWS_PER_BAND = 5
+NUM_PERMUTATIONS = NUM_BANDS * ROWS_PER_BAND
+_PRIME = (1 << 61) - 1
+# Stałe ziarno: sygnatury zapisane w bazie muszą być takie same w każdym procesie.
+_random = random.Random(20251015)
+_PERMUTATIONS = [(_random.randrange(1, _PRIME), _random.randrange(0, _PRIME)) for _ in range(NUM_PERMUTATIONS)]
+
+# Domyślne wartości SCRAPER_DEDUP_THRESHOLD i SCRAPER_DEDUP_TITLE_THRESHOLD.
+THRESHOLD = 0.8
+TITLE_THRESHOLD = 0.7
+
+_LETTER_MAP = str.maketrans({'ł': 'l', 'Ł': 'L'})
+_TOKEN_RE = re.compile(r'[a-z0-9+#]+')
+_COMPANY_SUFFIX_RE = re.compile(
+    r'[\s,]+(sp\.?\s*z\s*o\.?\s*o\.?|s\.?\s*a\.?|sp\.?\s*k\.?|sp\.?\s*j\.?|ltd\.?|inc\.?|gmbh|llc)\s*$')
+# Oznaczenia w rodzaju '(k/m)' albo '(m/f/x)' w tytułach ogłoszeń.
+_GENDER_RE = re.compile(r'\(\s*[kmfx](\s*/\s*[kmfx])+\s*\)')
+REMOTE_ALIASES = {'remote', 'zdalnie', 'praca zdalna', 'fully remote'}
+LEVEL_TOKENS = {'intern', 'trainee', 'junior', 'mid', 'regular', 'medior', 'senior', 'lead', 'principal', 'staff',
+                'expert', 'head'}
+
+
+def _ascii(text: str) -> str:
+    text = unicodedata.normalize('NFKD', (text or '').translate(_LETTER_MAP))
+    return ''.join(char for char in text if not unicodedata.combining(char)).lower()
+
+
+def company_tokens(company: str) -> list:
+    return _TOKEN_RE.findall(_COMPANY_SUFFIX_RE.sub('', _ascii(company).strip()))
+
+
+def title_tokens(title: str) -> list:
+    return sorted(set(_TOKEN_RE.findall(_GENDER_RE.sub(' ', _ascii(title)))))
+
+
+def level_tokens(title: str) -> frozenset:
+    return frozenset(title_tokens(title)) & LEVEL_TOKENS
+
+
+def locations(location: str) -> list:
+    normalized = set()
+    for part in (location or '').split(','):
+        name = ' '.join(_TOKEN_RE.findall(_ascii(part).split('+')[0]))
+        if name:
+            normalized.add('remote' if name in REMOTE_ALIASES else name)
+    return sorted(normalized)
+
+
+def offer_fingerprint(company: str, title: str, location: str) -> str:
+    key = f"{' '.join(company_tokens(company))}|{' '.join(title_tokens(title))}|{','.join(locations(location))}"
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+def offer_shingles(company: str, title: str, location: str) -> set:
+    return ({f'c:{token}' for token in company_tokens(company)}
+            | {f't:{token}' for token in title_tokens(title)}
+            | {f'l:{name}' for name in locations(location)})
+
+
+def jaccard(first: set, second: set) -> float:
+    if not first or not second:
+        return 0.0
+    return len(first & second) / len(first | second)
+
+
+def _token_hash(token: str) -> int:
+    return int.from_bytes(hashlib.blake2b(token.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+def minhash(shingles: set) -> list:
+    hashes = [_token_hash(shingle) for shingle in shingles]
+    if not hashes:
+        return []
+    return [min((a * value + b) % _PRIME for value in hashes) for a, b in _PERMUTATIONS]
+
+
+def band_keys(signature: list) -> list:
+    keys = []
+    for band in range(len(signature) // ROWS_PER_BAND):
+        rows = signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]
+        payload = f"{band}:{','.join(map(str, rows))}".encode('ascii')
+        keys.append(hashlib.blake2b(payload, digest_size=8).hexdigest())
+    return keys
+
+
+def link_duplicates(offers: list, offer_model, band_model) -> int:
+    if not offers:
+        return 0
+    shingles = {offer['id']: offer_shingles(offer['company'], offer['title'], offer['location']) for offer in offers}
+    kinds = {offer['id']: (offer['source'], level_tokens(offer['title'])) for offer in offers}
+    titles = {offer['id']: set(title_tokens(offer['title'])) for offer in offers}
+    bands = {offer_id: band_keys(minhash(tokens)) for offer_id, tokens in shingles.items()}
+
+    band_model.objects.filter(offer_id__in=list(bands)).delete()
+    band_model.objects.bulk_create([band_model(offer_id=offer_id, key=key)
+                                    for offer_id, keys in bands.items() for key in keys])
+
+    all_keys = {key for keys in bands.values() for key in keys}
+    offers_by_key = {}
+    for offer_id, key in band_model.objects.filter(key__in=all_keys).values_list('offer_id', 'key'):
+        offers_by_key.setdefault(key, set()).add(offer_id)
+    candidate_ids = {offer_id for ids in offers_by_key.values() for offer_id in ids} - set(bands)
+    candidates = {row['id']: row for row in offer_model.objects.filter(id__in=candidate_ids)
+                  .values('id', 'company', 'title', 'location', 'source', 'canonical_id')}
+    kinds.update({row['id']: (row['source'], level_tokens(row['title'])) for row in candidates.values()})
+    titles.update({row['id']: set(title_tokens(row['title'])) for row in candidates.values()})
+
+    canonical = {}
+    for offer_id in sorted(bands):
+        source, levels = kinds[offer_id]
+        matches = {other for key in bands[offer_id] for other in offers_by_key.get(key, ())
+                   if other < offer_id and other in kinds and kinds[other][0] != source and kinds[other][1] == levels
+                   and jaccard(titles[offer_id], titles[other]) >= TITLE_THRESHOLD}
+        best = None
+        for other in matches:
+            if other in canonical:
+                other_shingles, root = shingles[other], canonical[other]
+            elif other in candidates:
+                row = candidates[other]
+                other_shingles, root = offer_shingles(row['company'], row['title'], row['location']), row['canonical_id']
+            else:
+                continue
+            if jaccard(shingles[offer_id], other_shingles) >= THRESHOLD:
+                root = root or other
+                best = root if best is None else min(best, root)
+        canonical[offer_id] = best
+
+    offer_model.objects.bulk_update([offer_model(id=offer_id, canonical_id=canonical_id)
+                                     for offer_id, canonical_id in canonical.items()], ['canonical'])
+    return sum(1 for canonical_id in canonical.values() if canonical_id)
+
+
+def backfill_offer_duplicates(apps, schema_editor):
+    JobOffer = apps.get_model('myapp', 'JobOffer')
+    OfferSignatureBand = apps.get_model('myapp', 'OfferSignatureBand')
+
+    # Od najstarszych ofert, żeby kanoniczną w każdej grupie została ta zescrapowana najwcześniej.
+    offers = JobOffer.objects.order_by('id').values('id', 'company', 'title', 'location', 'source')
+    batch = []
+    for offer in offers.iterator():
+        batch.append(offer)
+        if len(batch) >= BATCH_SIZE:
+            _process(batch, JobOffer, OfferSignatureBand)
+            batch = []
+    _process(batch, JobOffer, OfferSignatureBand)
+
+
+def _process(batch, JobOffer, OfferSignatureBand):
+    JobOffer.objects.bulk_update([
+        JobOffer(id=offer['id'], fingerprint=offer_fingerprint(offer['company'], offer['title'], offer['location']))
+        for offer in batch
+    ], ['fingerprint'])
+    link_duplicates(batch, JobOffer, OfferSignatureBand)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0011_offer_duplicates'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_offer_duplicates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.7 on 2026-10-18 03:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0012_backfill_offer_duplicates'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='City',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(help_text='nazwa po normalizacji, używana do wyszukiwania', max_length=100, unique=True)),
+                ('name', models.CharField(help_text='nazwa wyświetlana', max_length=100)),
+            ],
+            options={
+                'verbose_name': 'Miasto z ofert',
+                'verbose_name_plural': 'Miasta z ofert',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='joboffer',
+            name='is_remote',
+            field=models.BooleanField(db_index=True, default=False, help_text='oferta dopuszcza pracę zdalną'),
+        ),
+        migrations.AddField(
+            model_name='joboffer',
+            name='cities',
+            field=models.ManyToManyField(blank=True, help_text='miasta z pola location po normalizacji', related_name='offers', to='myapp.city'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.7 on 2026-10-18 03:10
+
+from django.db import migrations, models
+from django.db.models.functions import Lower
+
+
+def lowercase_main_technology(apps, schema_editor):
+    # Nowe oferty zapisujemy z technologią małymi literami, starsze wyrównujemy jednym UPDATE.
+    JobOffer = apps.get_model('myapp', 'JobOffer')
+    JobOffer.objects.exclude(main_technology__isnull=True).update(main_technology=Lower('main_technology'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0014_backfill_offer_cities'),
+    ]
+
+    operations = [
+        migrations.RunPython(lowercase_main_technology, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='joboffer',
+            index=models.Index(fields=['-scraped_date', '-id'], name='offer_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='joboffer',
+            index=models.Index(fields=['main_technology', '-scraped_date', '-id'], name='offer_tech_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='joboffer',
+            index=models.Index(fields=['source', '-scraped_date', '-id'], name='offer_source_keyset_idx'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+from django.db import migrations
+import re
+import unicodedata
+
+# Zamrożona kopia poziomów stanowisk z myapp.dedup: migracja danych musi dawać ten sam wynik
+# niezależnie od późniejszych zmian normalizacji tytułów w kodzie aplikacji.
+_LETTER_MAP = str.maketrans({'ł': 'l', 'Ł': 'L'})
+_TOKEN_RE = re.compile(r'[a-z0-9+#]+')
+# Oznaczenia w rodzaju '(k/m)' albo '(m/f/x)' w tytułach ogłoszeń.
+_GENDER_RE = re.compile(r'\(\s*[kmfx](\s*/\s*[kmfx])+\s*\)')
+LEVEL_TOKENS = {'intern', 'trainee', 'junior', 'mid', 'regular', 'medior', 'senior', 'lead', 'principal', 'staff',
+                'expert', 'head'}
+
+
+def fold(text: str) -> str:
+    text = unicodedata.normalize('NFKD', (text or '').translate(_LETTER_MAP))
+    return ''.join(char for char in text if not unicodedata.combining(char)).lower()
+
+
+def level_tokens(title: str) -> frozenset:
+    return frozenset(_TOKEN_RE.findall(_GENDER_RE.sub(' ', fold(title)))) & LEVEL_TOKENS
+
+
+def unlink_same_source_duplicates(apps, schema_editor):
+    """
+    Odłącza od ofert kanonicznych oferty z tego samego portalu albo o innym poziomie stanowiska,
+    połączone przed zawężeniem link_duplicates do duplikatów między portalami.
+    """
+    JobOffer = apps.get_model('myapp', 'JobOffer')
+    linked = JobOffer.objects.filter(canonical__isnull=False).values_list(
+        'id', 'source', 'title', 'canonical__source', 'canonical__title')
+    wrong = [offer_id for offer_id, source, title, canonical_source, canonical_title in linked.iterator()
+             if source == canonical_source or level_tokens(title) != level_tokens(canonical_title)]
+    JobOffer.objects.filter(id__in=wrong).update(canonical=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0016_offer_search_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(unlink_same_source_duplicates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.7 on 2026-10-18 03:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0017_unlink_same_source_duplicates'),
+    ]
+
+    # Samo CREATE INDEX zamiast AlterField: w SQLite AlterField przebudowuje tabelę myapp_joboffer,
+    # a przebudowa usuwa wyzwalacze indeksu pełnotekstowego z migracji 0016.
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(
+                    'CREATE INDEX "myapp_joboffer_expired_at_5bbaa97a" ON "myapp_joboffer" ("expired_at")',
+                    'DROP INDEX "myapp_joboffer_expired_at_5bbaa97a"',
+                ),
+            ],
+            state_operations=[
+                migrations.AlterField(
+                    model_name='joboffer',
+                    name='expired_at',
+                    field=models.DateTimeField(blank=True, db_index=True, help_text='kiedy oferta zniknęła ze wszystkich wyszukiwań, w których występowała', null=True),
+                ),
+            ],
+        ),
+    ]
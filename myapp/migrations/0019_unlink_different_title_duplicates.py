@@ -0,0 +1,50 @@
+from django.db import migrations
+import re
+import unicodedata
+
+# Zamrożona kopia tokenizacji tytułów z myapp.dedup: migracja danych musi dawać ten sam wynik
+# niezależnie od późniejszych zmian normalizacji tytułów w kodzie aplikacji.
+_LETTER_MAP = str.maketrans({'ł': 'l', 'Ł': 'L'})
+_TOKEN_RE = re.compile(r'[a-z0-9+#]+')
+# Oznaczenia w rodzaju '(k/m)' albo '(m/f/x)' w tytułach ogłoszeń.
+_GENDER_RE = re.compile(r'\(\s*[kmfx](\s*/\s*[kmfx])+\s*\)')
+# Domyślna wartość SCRAPER_DEDUP_TITLE_THRESHOLD.
+TITLE_THRESHOLD = 0.7
+
+
+def fold(text: str) -> str:
+    text = unicodedata.normalize('NFKD', (text or '').translate(_LETTER_MAP))
+    return ''.join(char for char in text if not unicodedata.combining(char)).lower()
+
+
+def title_tokens(title: str) -> set:
+    return set(_TOKEN_RE.findall(_GENDER_RE.sub(' ', fold(title))))
+
+
+def jaccard(first: set, second: set) -> float:
+    if not first or not second:
+        return 0.0
+    return len(first & second) / len(first | second)
+
+
+def unlink_different_title_duplicates(apps, schema_editor):
+    """
+    Odłącza od ofert kanonicznych oferty o innym stanowisku (np. 'Python Developer' i 'Java Developer'
+    tej samej firmy z długą listą wspólnych miast), połączone przed dodaniem osobnego progu dla tytułów.
+    """
+    JobOffer = apps.get_model('myapp', 'JobOffer')
+    linked = JobOffer.objects.filter(canonical__isnull=False).values_list('id', 'title', 'canonical__title')
+    wrong = [offer_id for offer_id, title, canonical_title in linked.iterator()
+             if jaccard(title_tokens(title), title_tokens(canonical_title)) < TITLE_THRESHOLD]
+    JobOffer.objects.filter(id__in=wrong).update(canonical=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0018_offer_expired_at_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(unlink_different_title_duplicates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,189 @@
+from django.db import migrations
+import hashlib
+import random
+import re
+import unicodedata
+
+BATCH_SIZE = 500
+
+# Zamrożona kopia normalizacji z myapp.locations i myapp.dedup z chwili dodania tej migracji: migracja danych
+# musi dawać ten sam wynik niezależnie od późniejszych zmian w kodzie aplikacji.
+
+# Nazwy oznaczające pracę zdalną. Nie są miastami, tylko ustawiają JobOffer.is_remote.
+REMOTE_NAMES = {'remote', 'zdalnie', 'zdalna', 'praca zdalna', 'fully remote', 'hybrid remote'}
+
+# Różne zapisy tego samego miasta (angielskie nazwy, brak polskich znaków) sprowadzamy do jednej nazwy.
+# Klucze są już po normalizacji funkcją fold.
+CITY_ALIASES = {
+    'warszawa': 'Warszawa',
+    'warsaw': 'Warszawa',
+    'krakow': 'Kraków',
+    'cracow': 'Kraków',
+    'wroclaw': 'Wrocław',
+    'gdansk': 'Gdańsk',
+    'gdynia': 'Gdynia',
+    'sopot': 'Sopot',
+    'trojmiasto': 'Trójmiasto',
+    'poznan': 'Poznań',
+    'lodz': 'Łódź',
+    'katowice': 'Katowice',
+    'szczecin': 'Szczecin',
+    'lublin': 'Lublin',
+    'bialystok': 'Białystok',
+    'bydgoszcz': 'Bydgoszcz',
+    'torun': 'Toruń',
+    'rzeszow': 'Rzeszów',
+    'gliwice': 'Gliwice',
+    'bielsko biala': 'Bielsko-Biała',
+}
+
+_LETTER_MAP = str.maketrans({'ł': 'l', 'Ł': 'L'})
+_CITY_TOKEN_RE = re.compile(r'[a-z0-9]+')
+_WHITESPACE_RE = re.compile(r'\s+')
+# Klucz jest używany jako unikalny indeks, więc musi mieścić się w kolumnie City.key.
+MAX_CITY_LENGTH = 100
+
+
+def fold(text: str) -> str:
+    """Małe litery bez polskich znaków i akcentów ('Łódź' -> 'lodz')."""
+    text = unicodedata.normalize('NFKD', (text or '').translate(_LETTER_MAP))
+    return ''.join(char for char in text if not unicodedata.combining(char)).lower()
+
+
+def city_key(raw: str) -> str:
+    """Klucz porównania miasta: same litery i cyfry rozdzielone pojedynczymi spacjami."""
+    return ' '.join(_CITY_TOKEN_RE.findall(fold(raw)))[:MAX_CITY_LENGTH]
+
+
+def parse_locations(location_text: str):
+    """
+    Rozbija tekst lokalizacji z listingów ('Gdańsk, Kraków, Warszawa', 'Zdalnie +5', 'Kraków +2')
+    na listę unikalnych par (klucz, nazwa) miast i flagę pracy zdalnej.
+    Dopiski '+N' (liczba pozostałych lokalizacji w skróconej karcie NFJ) są pomijane.
+
+    Returns:
+        tuple: ([(klucz, nazwa), ...], czy praca zdalna)
+    """
+    cities = {}
+    remote = False
+    for part in (location_text or '').split(','):
+        raw = _WHITESPACE_RE.sub(' ', part.split('+')[0]).strip()
+        key = city_key(raw)
+        if not key:
+            continue
+        if key in REMOTE_NAMES:
+            remote = True
+            continue
+        name = CITY_ALIASES.get(key)
+        if name is None:
+            name = raw[:MAX_CITY_LENGTH]
+        else:
+            key = city_key(name)
+        cities.setdefault(key, name)
+    return list(cities.items()), remote
+
+
+NUM_BANDS = 10
+ROWS_PER_BAND = 5
+NUM_PERMUTATIONS = NUM_BANDS * ROWS_PER_BAND
+_PRIME = (1 << 61) - 1
+# Stałe ziarno: sygnatury zapisane w bazie muszą być takie same w każdym procesie.
+_random = random.Random(20251015)
+_PERMUTATIONS = [(_random.randrange(1, _PRIME), _random.randrange(0, _PRIME)) for _ in range(NUM_PERMUTATIONS)]
+
+_TOKEN_RE = re.compile(r'[a-z0-9+#]+')
+_COMPANY_SUFFIX_RE = re.compile(
+    r'[\s,]+(sp\.?\s*z\s*o\.?\s*o\.?|s\.?\s*a\.?|sp\.?\s*k\.?|sp\.?\s*j\.?|ltd\.?|inc\.?|gmbh|llc)\s*$')
+# Oznaczenia w rodzaju '(k/m)' albo '(m/f/x)' w tytułach ogłoszeń.
+_GENDER_RE = re.compile(r'\(\s*[kmfx](\s*/\s*[kmfx])+\s*\)')
+
+
+def company_tokens(company: str) -> list:
+    return _TOKEN_RE.findall(_COMPANY_SUFFIX_RE.sub('', fold(company).strip()))
+
+
+def title_tokens(title: str) -> list:
+    return sorted(set(_TOKEN_RE.findall(_GENDER_RE.sub(' ', fold(title)))))
+
+
+def locations(location: str) -> list:
+    """Klucze miast oferty (myapp.locations) i 'remote' dla pracy zdalnej."""
+    cities, remote = parse_locations(location)
+    return sorted([key for key, _ in cities] + (['remote'] if remote else []))
+
+
+def offer_fingerprint(company: str, title: str, location: str) -> str:
+    """Skrót znormalizowanych (firma, tytuł, lokalizacje) - równy dla tej samej oferty na obu portalach."""
+    key = f"{' '.join(company_tokens(company))}|{' '.join(title_tokens(title))}|{','.join(locations(location))}"
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+def offer_shingles(company: str, title: str, location: str) -> set:
+    """Zbiór cech oferty, na którym liczymy podobieństwo Jaccarda."""
+    return ({f'c:{token}' for token in company_tokens(company)}
+            | {f't:{token}' for token in title_tokens(title)}
+            | {f'l:{name}' for name in locations(location)})
+
+
+def _token_hash(token: str) -> int:
+    return int.from_bytes(hashlib.blake2b(token.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+def minhash(shingles: set) -> list:
+    hashes = [_token_hash(shingle) for shingle in shingles]
+    if not hashes:
+        return []
+    return [min((a * value + b) % _PRIME for value in hashes) for a, b in _PERMUTATIONS]
+
+
+def band_keys(signature: list) -> list:
+    """Klucze pasów LSH sygnatury (numer pasu jest częścią klucza)."""
+    keys = []
+    for band in range(len(signature) // ROWS_PER_BAND):
+        rows = signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]
+        payload = f"{band}:{','.join(map(str, rows))}".encode('ascii')
+        keys.append(hashlib.blake2b(payload, digest_size=8).hexdigest())
+    return keys
+
+
+def recompute_offer_fingerprints(apps, schema_editor):
+    """
+    Przelicza odciski i pasy LSH zapisanych ofert po przejściu na normalizację lokalizacji z myapp.locations
+    ('Warsaw' i 'Warszawa' to teraz to samo miasto). Bez tego known_duplicate_dates nie rozpoznałby starych
+    ofert, a nowe nie trafiałyby na nie jako kandydaci. Powiązania z ofertami kanonicznymi zostają bez zmian -
+    link_duplicates przelicza je przy każdej zmianie oferty.
+    """
+    JobOffer = apps.get_model('myapp', 'JobOffer')
+    OfferSignatureBand = apps.get_model('myapp', 'OfferSignatureBand')
+
+    batch = []
+    for offer in JobOffer.objects.order_by('id').values('id', 'company', 'title', 'location').iterator():
+        batch.append(offer)
+        if len(batch) >= BATCH_SIZE:
+            _process(batch, JobOffer, OfferSignatureBand)
+            batch = []
+    _process(batch, JobOffer, OfferSignatureBand)
+
+
+def _process(batch, JobOffer, OfferSignatureBand):
+    JobOffer.objects.bulk_update([
+        JobOffer(id=offer['id'], fingerprint=offer_fingerprint(offer['company'], offer['title'], offer['location']))
+        for offer in batch
+    ], ['fingerprint'])
+    OfferSignatureBand.objects.filter(offer_id__in=[offer['id'] for offer in batch]).delete()
+    OfferSignatureBand.objects.bulk_create([
+        OfferSignatureBand(offer_id=offer['id'], key=key)
+        for offer in batch
+        for key in band_keys(minhash(offer_shingles(offer['company'], offer['title'], offer['location'])))
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0019_unlink_different_title_duplicates'),
+    ]
+
+    operations = [
+        migrations.RunPython(recompute_offer_fingerprints, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 03:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0020_recompute_offer_fingerprints'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='personalinfo',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -1,6 +1,7 @@
 from django.db import models
 from django.urls import reverse
 from django.utils.text import slugify
+from .salary import CONTRACT_CHOICES, PERIOD_CHOICES
 
 
 # Create your models here.
@@ -18,6 +19,8 @@ class PersonalInfo(models.Model):
         null=True,
         help_text='Wgraj swoje zdjęcie profilowe',
     )
+    # Stopka jest częścią stron z nagłówkami ETag/Last-Modified, więc jej zmiana musi je unieważniać.
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f'{self.first_name} {self.last_name}'
@@ -84,27 +87,96 @@ class JourneyStep(models.Model):
         return f'Stage {self.order}: {self.title}'
 
 
+class OfferSkill(models.Model):
+    """Znormalizowana umiejętność z ofert pracy (np. 'JS' i 'javascript' to jedna pozycja 'JavaScript')."""
+    key = models.CharField(max_length=100, unique=True, help_text='nazwa po normalizacji, używana do wyszukiwania')
+    name = models.CharField(max_length=100, help_text='nazwa wyświetlana')
+
+    class Meta:
+        verbose_name = "Umiejętność z ofert"
+        verbose_name_plural = "Umiejętności z ofert"
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+
+class City(models.Model):
+    """Znormalizowane miasto z lokalizacji ofert (np. 'Krakow' i 'Cracow' to jedna pozycja 'Kraków')."""
+    key = models.CharField(max_length=100, unique=True, help_text='nazwa po normalizacji, używana do wyszukiwania')
+    name = models.CharField(max_length=100, help_text='nazwa wyświetlana')
+
+    class Meta:
+        verbose_name = "Miasto z ofert"
+        verbose_name_plural = "Miasta z ofert"
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+
 class JobOffer(models.Model):
     title = models.CharField(max_length=255)
     company = models.CharField(max_length=255, blank=True, null=True)
     location = models.CharField(max_length=255, blank=True, null=True)
     salary = models.CharField(max_length=100, blank=True, null=True)
+    # Widełki rozbite na liczby przy zapisie oferty (myapp.salary.parse_salary).
+    salary_min = models.DecimalField(max_digits=12, decimal_places=2, blank=True, null=True)
+    salary_max = models.DecimalField(max_digits=12, decimal_places=2, blank=True, null=True)
+    salary_currency = models.CharField(max_length=3, blank=True)
+    salary_period = models.CharField(max_length=10, choices=PERIOD_CHOICES, blank=True)
+    salary_contract = models.CharField(max_length=20, choices=CONTRACT_CHOICES, blank=True)
+    salary_min_monthly_pln = models.PositiveIntegerField(blank=True, null=True, db_index=True,
+                                                         help_text='dolna granica widełek w PLN miesięcznie')
+    salary_max_monthly_pln = models.PositiveIntegerField(blank=True, null=True, db_index=True,
+                                                         help_text='górna granica widełek w PLN miesięcznie')
     main_technology = models.CharField(max_length=100, blank=True, null=True,
                                        help_text='główna technologia z wyszukiwania')
     experience_level = models.CharField(max_length=100, blank=True, null=True)
     skills = models.TextField(blank=True, null=True)
+    skill_tags = models.ManyToManyField(OfferSkill, related_name='offers', blank=True,
+                                        help_text='umiejętności z pola skills po normalizacji')
+    cities = models.ManyToManyField(City, related_name='offers', blank=True,
+                                    help_text='miasta z pola location po normalizacji')
+    is_remote = models.BooleanField(default=False, db_index=True, help_text='oferta dopuszcza pracę zdalną')
     url = models.URLField(max_length=500, unique=True)
     source = models.CharField(max_length=100)
     scraped_date = models.DateTimeField(auto_now_add=True)
     date_posted = models.DateField(blank=True, null=True)
+    content_hash = models.CharField(max_length=64, blank=True,
+                                    help_text='skrót danych oferty; niezmienione oferty nie są ponownie zapisywane')
+    last_seen = models.DateTimeField(blank=True, null=True, db_index=True,
+                                     help_text='kiedy oferta była ostatnio widoczna na portalu')
+    expired_at = models.DateTimeField(blank=True, null=True, db_index=True,
+                                      help_text='kiedy oferta zniknęła ze wszystkich wyszukiwań, w których występowała')
+    fingerprint = models.CharField(max_length=40, blank=True, db_index=True,
+                                   help_text='skrót znormalizowanych firmy, tytułu i lokalizacji (myapp.dedup)')
+    canonical = models.ForeignKey('self', on_delete=models.SET_NULL, blank=True, null=True,
+                                  related_name='duplicates',
+                                  help_text='najstarsza oferta z tą samą pracą, np. z drugiego portalu')
 
     class Meta:
         ordering = ['-scraped_date']
+        # Indeksy pod stronicowanie po kluczu (scraped_date, id) w API ofert, także z filtrem technologii lub źródła.
+        indexes = [
+            models.Index(fields=['-scraped_date', '-id'], name='offer_keyset_idx'),
+            models.Index(fields=['main_technology', '-scraped_date', '-id'], name='offer_tech_keyset_idx'),
+            models.Index(fields=['source', '-scraped_date', '-id'], name='offer_source_keyset_idx'),
+        ]
 
     def __str__(self):
         return f'{self.title} at {self.company}'
 
 
+class OfferSignatureBand(models.Model):
+    """Pas sygnatury MinHash oferty. Oferty ze wspólnym pasem są kandydatami na duplikaty."""
+    offer = models.ForeignKey(JobOffer, on_delete=models.CASCADE, related_name='signature_bands')
+    key = models.CharField(max_length=16, db_index=True)
+
+    def __str__(self):
+        return f'{self.offer_id}: {self.key}'
+
+
 class ScraperTechnology(models.Model):
     name = models.CharField(max_length=100, unique=True, help_text="technology name for eg. python")
 
@@ -115,3 +187,145 @@ class ScraperTechnology(models.Model):
 
     def __str__(self):
         return self.name
+
+
+class OfferDetailCache(models.Model):
+    """Wynik pobrania strony szczegółów oferty, żeby nie pobierać jej przy każdym scrapowaniu."""
+    url = models.URLField(max_length=500, unique=True)
+    date_posted = models.DateField(blank=True, null=True)
+    etag = models.CharField(max_length=255, blank=True)
+    last_modified = models.CharField(max_length=100, blank=True)
+    fetched_at = models.DateTimeField(help_text='kiedy dane zostały ostatnio pobrane lub potwierdzone przez serwer')
+    last_used = models.DateTimeField(db_index=True, help_text='używane do usuwania najdawniej używanych wpisów')
+
+    class Meta:
+        verbose_name = "Cache strony oferty"
+        verbose_name_plural = "Cache stron ofert"
+
+    def __str__(self):
+        return self.url
+
+
+class SearchQuery(models.Model):
+    """Wyszukiwanie (technologia, poziom, platformy) i zbiór ofert, które ostatnio znalazło."""
+    technology = models.CharField(max_length=100)
+    experience = models.CharField(max_length=100, default='all')
+    platforms = models.CharField(max_length=255, help_text='posortowane platformy rozdzielone przecinkami')
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_run_at = models.DateTimeField(blank=True, null=True, db_index=True)
+    offers = models.ManyToManyField(JobOffer, through='SearchResult', related_name='searches')
+
+    class Meta:
+        verbose_name = "Wyszukiwanie"
+        verbose_name_plural = "Wyszukiwania"
+        ordering = ['-last_run_at']
+        constraints = [
+            models.UniqueConstraint(fields=['technology', 'experience', 'platforms'], name='unique_search_query'),
+        ]
+
+    def __str__(self):
+        return f'{self.technology} ({self.experience}) - {self.platforms}'
+
+    @classmethod
+    def for_params(cls, technology: str, experience: str, platforms) -> 'SearchQuery':
+        search, _ = cls.objects.get_or_create(
+            technology=technology.lower(), experience=experience, platforms=','.join(sorted(platforms)))
+        return search
+
+    def active_offers(self):
+        """Oferty z ostatniego zbioru wyników tego wyszukiwania (bez wygasłych)."""
+        return JobOffer.objects.filter(search_results__search=self, search_results__expired_at__isnull=True)
+
+
+class SearchResult(models.Model):
+    """Oferta znaleziona przez wyszukiwanie. Gdy przestaje się pojawiać, jest oznaczana jako wygasła."""
+    search = models.ForeignKey(SearchQuery, on_delete=models.CASCADE, related_name='results')
+    offer = models.ForeignKey(JobOffer, on_delete=models.CASCADE, related_name='search_results')
+    first_seen = models.DateTimeField(auto_now_add=True)
+    last_seen = models.DateTimeField()
+    expired_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['search', 'offer'], name='unique_search_result'),
+        ]
+        indexes = [
+            models.Index(fields=['search', 'expired_at'], name='search_result_active_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.search} -> {self.offer}'
+
+
+class ScrapeRun(models.Model):
+    """Historia uruchomień scrapera: liczby ofert i błędów per platforma oraz czasy poszczególnych faz."""
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCESS = 'success'
+    STATUS_PARTIAL = 'partial'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_RUNNING, 'W trakcie'),
+        (STATUS_SUCCESS, 'Zakończony'),
+        (STATUS_PARTIAL, 'Zakończony z błędami'),
+        (STATUS_FAILED, 'Nieudany'),
+    ]
+
+    task_id = models.CharField(max_length=255, blank=True, db_index=True)
+    search = models.ForeignKey(SearchQuery, on_delete=models.SET_NULL, blank=True, null=True, related_name='runs')
+    technology = models.CharField(max_length=100)
+    experience = models.CharField(max_length=100, default='all')
+    platforms = models.JSONField(default=list)
+    incremental = models.BooleanField(default=False)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_RUNNING)
+    started_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+    duration_seconds = models.FloatField(blank=True, null=True)
+    offers_found = models.PositiveIntegerField(default=0)
+    offers_added = models.PositiveIntegerField(default=0)
+    error_count = models.PositiveIntegerField(default=0)
+    platform_stats = models.JSONField(default=dict, blank=True,
+                                      help_text='liczby ofert, błędy i czasy faz per platforma')
+    phase_timings = models.JSONField(default=dict, blank=True,
+                                     help_text='czasy faz zsumowane dla wszystkich platform (w sekundach)')
+
+    class Meta:
+        verbose_name = "Uruchomienie scrapera"
+        verbose_name_plural = "Uruchomienia scrapera"
+        ordering = ['-started_at']
+
+    def __str__(self):
+        return f'{self.technology} ({self.experience}) {self.started_at:%Y-%m-%d %H:%M}'
+
+
+class DailyOfferStats(models.Model):
+    """
+    Dzienne podsumowanie rynku dla (źródło, technologia, poziom doświadczenia).
+    Aktualizowane na koniec każdego scrapowania, dzięki czemu wykresy nie liczą nic na tabeli ofert.
+    """
+    date = models.DateField()
+    source = models.CharField(max_length=100)
+    main_technology = models.CharField(max_length=100, blank=True)
+    experience_level = models.CharField(max_length=100, blank=True)
+    active_offers = models.PositiveIntegerField(default=0, help_text='oferty aktywne na koniec dnia')
+    new_offers = models.PositiveIntegerField(default=0, help_text='oferty zescrapowane po raz pierwszy tego dnia')
+    expired_offers = models.PositiveIntegerField(default=0, help_text='oferty wygaszone tego dnia')
+    offers_with_salary = models.PositiveIntegerField(default=0, help_text='aktywne oferty z podanymi widełkami')
+    # Sumy zamiast średnich, żeby średnią dało się policzyć poprawnie po dowolnym zgrupowaniu wierszy.
+    salary_min_sum = models.PositiveBigIntegerField(default=0, help_text='suma dolnych granic widełek (PLN/mies.)')
+    salary_max_sum = models.PositiveBigIntegerField(default=0, help_text='suma górnych granic widełek (PLN/mies.)')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Dzienne statystyki ofert"
+        verbose_name_plural = "Dzienne statystyki ofert"
+        ordering = ['-date', 'source']
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'source', 'main_technology', 'experience_level'],
+                                    name='unique_daily_offer_stats'),
+        ]
+        indexes = [
+            models.Index(fields=['main_technology', 'date'], name='daily_stats_tech_date_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.date} {self.source} {self.main_technology} {self.experience_level}'
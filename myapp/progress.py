@@ -0,0 +1,106 @@
+from django.conf import settings
+import asyncio
+import json
+import logging
+import os
+import time
+
+import redis
+import redis.asyncio as aioredis
+
+logger = logging.getLogger(__name__)
+
+# Zdarzenia postępu zadania scrapowania są publikowane na kanale Redis (pub/sub) zadania,
+# a ostatnie zdarzenie jest też zapisywane pod kluczem, żeby strona otwarta w trakcie
+# scrapowania od razu dostała aktualny stan.
+CHANNEL_PREFIX = 'scraper:progress:'
+SNAPSHOT_PREFIX = 'scraper:progress-last:'
+
+PHASE_STARTED = 'started'
+PHASE_SCRAPING = 'scraping'
+PHASE_PLATFORM_DONE = 'platform_done'
+PHASE_FINISHED = 'finished'
+PHASE_FAILED = 'failed'
+# Po tych fazach strumień się kończy.
+FINAL_PHASES = {PHASE_FINISHED, PHASE_FAILED}
+
+_client = None
+_client_pid = None
+
+
+def get_redis():
+    """Klient Redis do publikowania postępu, tworzony osobno w każdym procesie (jak w throttle)."""
+    global _client, _client_pid
+    if _client is None or _client_pid != os.getpid():
+        _client = redis.Redis.from_url(settings.SCRAPER_PROGRESS_REDIS_URL, socket_timeout=2,
+                                       socket_connect_timeout=2)
+        _client_pid = os.getpid()
+    return _client
+
+
+def get_async_redis():
+    """Klient asynchroniczny dla widoku SSE; każdy strumień ma własne połączenie pub/sub."""
+    return aioredis.Redis.from_url(settings.SCRAPER_PROGRESS_REDIS_URL, socket_connect_timeout=2)
+
+
+def publish_progress(task_id: str, phase: str, **data):
+    """
+    Publikuje zdarzenie postępu zadania `task_id` (faza, platforma, liczba ofert...).
+    Błąd Redis nie przerywa scrapowania - strona pokaże wtedy wynik dopiero po odświeżeniu.
+    """
+    if not task_id:
+        return
+    event = json.dumps({'phase': phase, 'time': time.time(), **data})
+    try:
+        with get_redis().pipeline() as pipe:
+            pipe.set(f'{SNAPSHOT_PREFIX}{task_id}', event, ex=settings.SCRAPER_PROGRESS_TTL)
+            pipe.publish(f'{CHANNEL_PREFIX}{task_id}', event)
+            pipe.execute()
+    except redis.RedisError as e:
+        logger.warning(f"Nie udało się opublikować postępu zadania {task_id}: {e}")
+
+
+def _sse(event: str, data: str) -> str:
+    return f"event: {event}\ndata: {data}\n\n"
+
+
+async def progress_stream(task_id: str, client=None):
+    """
+    Asynchroniczny generator wiadomości Server-Sent Events z postępem zadania `task_id`.
+    Najpierw wysyła ostatni zapisany stan, potem kolejne zdarzenia z kanału, aż do zakończenia zadania
+    albo upływu SCRAPER_PROGRESS_STREAM_TIMEOUT (przeglądarka sama połączy się ponownie).
+    Co SCRAPER_PROGRESS_HEARTBEAT sekund bez zdarzeń wysyła komentarz, żeby proxy nie zamknęło połączenia.
+    """
+    client = client or get_async_redis()
+    pubsub = client.pubsub()
+    try:
+        # Subskrypcja przed odczytem stanu, żeby nie zgubić zdarzenia opublikowanego pomiędzy.
+        await pubsub.subscribe(f'{CHANNEL_PREFIX}{task_id}')
+        snapshot = await client.get(f'{SNAPSHOT_PREFIX}{task_id}')
+    except redis.RedisError as e:
+        logger.warning(f"Redis niedostępny dla postępu zadania {task_id}: {e}")
+        yield _sse('unavailable', '{}')
+        await client.aclose()
+        return
+
+    try:
+        if snapshot:
+            yield _sse('progress', snapshot.decode('utf-8'))
+            if json.loads(snapshot)['phase'] in FINAL_PHASES:
+                return
+        deadline = asyncio.get_running_loop().time() + settings.SCRAPER_PROGRESS_STREAM_TIMEOUT
+        while asyncio.get_running_loop().time() < deadline:
+            message = await pubsub.get_message(ignore_subscribe_messages=True,
+                                               timeout=settings.SCRAPER_PROGRESS_HEARTBEAT)
+            if message is None:
+                yield ': keep-alive\n\n'
+                continue
+            data = message['data'].decode('utf-8')
+            yield _sse('progress', data)
+            if json.loads(data)['phase'] in FINAL_PHASES:
+                return
+    except redis.RedisError as e:
+        logger.warning(f"Przerwano strumień postępu zadania {task_id}: {e}")
+    finally:
+        await pubsub.aclose()
+        await client.aclose()
@@ -0,0 +1,95 @@
+from datetime import datetime, time, timedelta
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from .models import DailyOfferStats, JobOffer
+import logging
+
+logger = logging.getLogger(__name__)
+
+GROUP_FIELDS = ['source', 'main_technology', 'experience_level']
+
+
+def _day_bounds(day):
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    return start, start + timedelta(days=1)
+
+
+def _grouped(queryset, **annotations) -> dict:
+    """Zlicza oferty w grupach (źródło, technologia, poziom) jednym zapytaniem GROUP BY."""
+    grouped = {}
+    for row in queryset.values(*GROUP_FIELDS).annotate(**annotations).order_by():
+        key = tuple(row[field] or '' for field in GROUP_FIELDS)
+        grouped[key] = {name: row[name] for name in annotations}
+    return grouped
+
+
+def daily_snapshot(day, technologies=None) -> dict:
+    """
+    Liczy statystyki jednego dnia z tabeli ofert: {(źródło, technologia, poziom): {pole: wartość}}.
+    Z `technologies` liczy tylko oferty tych technologii zamiast całej tabeli.
+    """
+    start, end = _day_bounds(day)
+    # Duplikat (ta sama praca na drugim portalu) liczy się tylko wtedy, gdy jego oferta kanoniczna już wygasła.
+    offers = JobOffer.objects.filter(Q(canonical__isnull=True) | Q(canonical__expired_at__lt=end))
+    if technologies is not None:
+        offers = offers.filter(main_technology__in=technologies)
+    active = offers.filter(scraped_date__lt=end).filter(Q(expired_at__isnull=True) | Q(expired_at__gte=end))
+    with_salary = Q(salary_min_monthly_pln__isnull=False) | Q(salary_max_monthly_pln__isnull=False)
+    # Widełki otwarte ('od 9 000 PLN') liczymy tak, jakby obie granice były równe.
+    salary_min = Coalesce('salary_min_monthly_pln', 'salary_max_monthly_pln')
+    salary_max = Coalesce('salary_max_monthly_pln', 'salary_min_monthly_pln')
+
+    stats = {}
+    for counts in (
+        _grouped(active, active_offers=Count('id'), offers_with_salary=Count('id', filter=with_salary),
+                 salary_min_sum=Coalesce(Sum(salary_min), 0), salary_max_sum=Coalesce(Sum(salary_max), 0)),
+        _grouped(offers.filter(scraped_date__gte=start, scraped_date__lt=end), new_offers=Count('id')),
+        _grouped(offers.filter(expired_at__gte=start, expired_at__lt=end), expired_offers=Count('id')),
+    ):
+        for key, values in counts.items():
+            stats.setdefault(key, {}).update(values)
+    return stats
+
+
+def affected_technologies(technology: str, day=None) -> set:
+    """
+    Technologie, których statystyki dnia mogło zmienić scrapowanie `technology`: ona sama
+    oraz technologie duplikatów, których oferta kanoniczna tego dnia wygasła (wtedy duplikat zaczyna się liczyć).
+    """
+    start, end = _day_bounds(day or timezone.localdate())
+    technology = technology.lower()
+    duplicates = JobOffer.objects.filter(
+        canonical__main_technology=technology, canonical__expired_at__gte=start, canonical__expired_at__lt=end,
+        main_technology__isnull=False,
+    ).values_list('main_technology', flat=True).distinct()
+    return {technology, *duplicates}
+
+
+def refresh_daily_stats(day=None, technologies=None) -> int:
+    """
+    Przelicza wiersze podsumowania dla jednego dnia (domyślnie dzisiejszego).
+    Wywoływane na koniec każdego scrapowania, więc poprzednie dni pozostają nietknięte,
+    a zapytania wykresów czytają tylko małą tabelę podsumowań.
+    Scrapowanie przekazuje `technologies` z affected_technologies, więc przelicza tylko swoje grupy,
+    a nie całą tabelę ofert; bez `technologies` przeliczany jest cały dzień (rebuild_offer_stats).
+
+    Returns:
+        int: liczba zapisanych wierszy.
+    """
+    day = day or timezone.localdate()
+    stats = daily_snapshot(day, technologies)
+    rows = [
+        DailyOfferStats(date=day, source=source, main_technology=technology, experience_level=level, **values)
+        for (source, technology, level), values in stats.items()
+    ]
+    with transaction.atomic():
+        # Grupy, które tego dnia zniknęły, też muszą zniknąć z podsumowania.
+        stale = DailyOfferStats.objects.filter(date=day)
+        if technologies is not None:
+            stale = stale.filter(main_technology__in=technologies)
+        stale.delete()
+        DailyOfferStats.objects.bulk_create(rows)
+    logger.info(f"Zaktualizowano dzienne statystyki ofert za {day} ({len(rows)} wierszy).")
+    return len(rows)
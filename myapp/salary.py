@@ -0,0 +1,121 @@
+from decimal import Decimal, ROUND_HALF_UP
+from django.conf import settings
+import re
+
+PERIOD_HOUR = 'hour'
+PERIOD_DAY = 'day'
+PERIOD_MONTH = 'month'
+PERIOD_YEAR = 'year'
+PERIOD_CHOICES = [
+    (PERIOD_HOUR, 'Godzinowo'),
+    (PERIOD_DAY, 'Dziennie'),
+    (PERIOD_MONTH, 'Miesięcznie'),
+    (PERIOD_YEAR, 'Rocznie'),
+]
+
+CONTRACT_B2B = 'b2b'
+CONTRACT_PERMANENT = 'permanent'
+CONTRACT_MANDATE = 'mandate'
+CONTRACT_SPECIFIC_TASK = 'specific_task'
+CONTRACT_CHOICES = [
+    (CONTRACT_B2B, 'B2B'),
+    (CONTRACT_PERMANENT, 'Umowa o pracę'),
+    (CONTRACT_MANDATE, 'Umowa zlecenie'),
+    (CONTRACT_SPECIFIC_TASK, 'Umowa o dzieło'),
+]
+
+# Kolumny JobOffer wypełniane przez parse_salary.
+SALARY_FIELDS = ['salary_min', 'salary_max', 'salary_currency', 'salary_period', 'salary_contract',
+                 'salary_min_monthly_pln', 'salary_max_monthly_pln']
+
+# Kwota: '15 000', '15.000', '15,000', '120,50', '7500' albo '15k'.
+_AMOUNT_RE = re.compile(r'(?<![\w.,])(\d{1,3}(?:[ .,]\d{3})+|\d+)(?:[.,](\d{1,2}))?(?!\d)(?:\s*(k)(?![a-z]))?', re.I)
+_CURRENCY_PATTERNS = [
+    ('PLN', re.compile(r'pln|zł|\bzl\b', re.I)),
+    ('EUR', re.compile(r'eur|€', re.I)),
+    ('USD', re.compile(r'usd|\$', re.I)),
+    ('GBP', re.compile(r'gbp|£', re.I)),
+    ('CHF', re.compile(r'chf', re.I)),
+]
+_PERIOD_PATTERNS = [
+    (PERIOD_HOUR, re.compile(r'/\s*h\b|\bh\b|hour|godz', re.I)),
+    (PERIOD_DAY, re.compile(r'/\s*d\b|\bday\b|daily|dzie[nń]|dniówk', re.I)),
+    (PERIOD_YEAR, re.compile(r'/\s*y\b|year|annual|\brok|rocznie', re.I)),
+]
+_CONTRACT_PATTERNS = [
+    (CONTRACT_B2B, re.compile(r'b2b', re.I)),
+    (CONTRACT_PERMANENT, re.compile(r'\buop\b|o prac[eę]|permanent|employment|\betat', re.I)),
+    (CONTRACT_MANDATE, re.compile(r'zleceni|mandate|\buz\b', re.I)),
+    (CONTRACT_SPECIFIC_TASK, re.compile(r'o dzie[łl]o|\buod\b|specific', re.I)),
+]
+# Portale oddzielają tysiące także spacją nierozdzielającą (NBSP), wąską nierozdzielającą (U+202F)
+# albo cienką (U+2009); przed dopasowaniem kwot zamieniamy je na zwykłą spację.
+_SPACE_RE = re.compile(r'[\s\u00a0\u202f\u2009]+')
+_FROM_RE = re.compile(r'^\s*(od|from|min\.?)\b', re.I)
+_UP_TO_RE = re.compile(r'^\s*(do|up to|max\.?)\b', re.I)
+
+
+def _empty() -> dict:
+    parsed = dict.fromkeys(SALARY_FIELDS)
+    parsed.update(salary_currency='', salary_period='', salary_contract='')
+    return parsed
+
+
+def _amount(match) -> Decimal:
+    integer, fraction, thousands = match.groups()
+    value = Decimal(re.sub(r'\D', '', integer))
+    if fraction:
+        value += Decimal(fraction) / Decimal(10 ** len(fraction))
+    return value * 1000 if thousands else value
+
+
+def _first_match(patterns, text: str, default: str = '') -> str:
+    for value, pattern in patterns:
+        if pattern.search(text):
+            return value
+    return default
+
+
+def to_monthly_pln(amount, currency: str, period: str):
+    """Przelicza kwotę na miesięczne PLN według tabeli kursów z ustawień; None dla nieznanej waluty."""
+    rate = settings.SALARY_EXCHANGE_RATES.get(currency)
+    if amount is None or rate is None:
+        return None
+    monthly = Decimal(amount) * Decimal(str(rate)) * Decimal(str(settings.SALARY_PERIODS_PER_MONTH[period]))
+    return int(monthly.quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+
+
+def parse_salary(text: str) -> dict:
+    """
+    Rozbija tekst widełek ('15 000 - 20 000 PLN/month', '120 zł/h B2B', 'od 9 000 PLN', 'Nie podano')
+    na wartości kolumn z SALARY_FIELDS. Brak kwot oznacza brak wynagrodzenia (same None / puste napisy).
+    Widełki otwarte ('od', 'do') mają tylko jedną granicę, kwota bez waluty jest traktowana jako PLN.
+    """
+    parsed = _empty()
+    text = _SPACE_RE.sub(' ', text or '')
+    amounts = [_amount(match) for match in _AMOUNT_RE.finditer(text)]
+    amounts = [amount for amount in amounts if amount > 0][:2]
+    if not amounts:
+        return parsed
+
+    if len(amounts) == 2:
+        salary_min, salary_max = sorted(amounts)
+    elif _FROM_RE.search(text):
+        salary_min, salary_max = amounts[0], None
+    elif _UP_TO_RE.search(text):
+        salary_min, salary_max = None, amounts[0]
+    else:
+        salary_min = salary_max = amounts[0]
+
+    currency = _first_match(_CURRENCY_PATTERNS, text, default='PLN')
+    period = _first_match(_PERIOD_PATTERNS, text, default=PERIOD_MONTH)
+    parsed.update({
+        'salary_min': salary_min,
+        'salary_max': salary_max,
+        'salary_currency': currency,
+        'salary_period': period,
+        'salary_contract': _first_match(_CONTRACT_PATTERNS, text),
+        'salary_min_monthly_pln': to_monthly_pln(salary_min, currency, period),
+        'salary_max_monthly_pln': to_monthly_pln(salary_max, currency, period),
+    })
+    return parsed
@@ -0,0 +1,197 @@
+from contextlib import contextmanager
+from django.conf import settings
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError, sync_playwright
+import logging
+import os
+import threading
+
+from .profiling import phase
+from .throttle import RETRY_STATUSES, browser_slot, retrying
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/117.0.0.0 Safari/537.36"
+)
+LAUNCH_ARGS = ['--disable-blink-features=AutomationControlled']
+
+
+def _process_tree_rss_mb(root_pid: int) -> float:
+    """
+    Zwraca łączne RSS (w MB) wszystkich procesów potomnych `root_pid`,
+    czyli drivera Playwright i procesów Chromium. Działa tylko na Linuksie (/proc),
+    na innych systemach zwraca 0, więc recykling po RSS jest wtedy wyłączony.
+    """
+    try:
+        pids = [int(entry) for entry in os.listdir('/proc') if entry.isdigit()]
+    except OSError:
+        return 0.0
+
+    children = {}
+    for pid in pids:
+        try:
+            with open(f'/proc/{pid}/stat') as f:
+                # Nazwa procesu może zawierać spacje, dlatego dzielimy po ostatnim ')'.
+                ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(pid)
+
+    page_size = os.sysconf('SC_PAGE_SIZE')
+    total = 0
+    stack = list(children.get(root_pid, []))
+    while stack:
+        pid = stack.pop()
+        stack.extend(children.get(pid, []))
+        try:
+            with open(f'/proc/{pid}/statm') as f:
+                total += int(f.read().split()[1]) * page_size
+        except (OSError, IndexError, ValueError):
+            continue
+    return total / (1024 * 1024)
+
+
+class BrowserPool:
+    """
+    Ciepła instancja Chromium współdzielona przez wszystkie scrapery w jednym procesie.
+    Przeglądarka startuje raz (najlepiej przy starcie procesu workera), a scrapery
+    dostają od niej izolowane konteksty. Po `max_pages` otwartych stronach albo po
+    przekroczeniu `max_rss_mb` przeglądarka jest restartowana, żeby nie puchła w pamięci.
+    """
+
+    def __init__(self, headless=True, max_pages=200, max_rss_mb=1024):
+        self.headless = headless
+        self.max_pages = max_pages
+        self.max_rss_mb = max_rss_mb
+        self._playwright = None
+        self._browser = None
+        self._active_contexts = 0
+        self._pages_since_launch = 0
+        self.stats = {'launches': 0, 'recycles': 0, 'pages': 0}
+
+    @property
+    def is_running(self) -> bool:
+        return self._browser is not None and self._browser.is_connected()
+
+    def start(self):
+        """Uruchamia Playwright i przeglądarkę, jeśli jeszcze nie działają."""
+        if self._playwright is None:
+            with phase('playwright_start'):
+                self._playwright = sync_playwright().start()
+        if not self.is_running:
+            self._launch()
+
+    def _launch(self):
+        logger.info("Uruchamiam przeglądarkę Chromium dla puli scraperów.")
+        # Mierzymy także restarty po recyklingu, nie tylko pierwszy start.
+        with phase('browser_launch'):
+            self._browser = self._playwright.chromium.launch(headless=self.headless, args=LAUNCH_ARGS)
+        self._pages_since_launch = 0
+        self.stats['launches'] += 1
+
+    def _close_browser(self):
+        if self._browser is not None:
+            try:
+                self._browser.close()
+            except Exception as e:
+                logger.warning(f"Nie udało się poprawnie zamknąć przeglądarki: {e}")
+            self._browser = None
+
+    def stop(self):
+        """Zamyka przeglądarkę i Playwright (np. przy zamykaniu procesu workera)."""
+        self._close_browser()
+        if self._playwright is not None:
+            try:
+                self._playwright.stop()
+            except Exception as e:
+                logger.warning(f"Nie udało się zatrzymać Playwright: {e}")
+            self._playwright = None
+
+    def _needs_recycle(self) -> bool:
+        if self.max_pages and self._pages_since_launch >= self.max_pages:
+            logger.info(f"Przeglądarka obsłużyła {self._pages_since_launch} stron, restartuję ją.")
+            return True
+        if self.max_rss_mb:
+            rss = _process_tree_rss_mb(os.getpid())
+            if rss >= self.max_rss_mb:
+                logger.info(f"Przeglądarka zajmuje {rss:.0f} MB RSS, restartuję ją.")
+                return True
+        return False
+
+    def _maybe_recycle(self):
+        # Restartujemy tylko wtedy, gdy nikt nie korzysta z kontekstów tej przeglądarki
+        # i gdy przeglądarka zdążyła już cokolwiek obsłużyć.
+        if self._active_contexts or not self.is_running or not self._pages_since_launch:
+            return
+        if self._needs_recycle():
+            self._close_browser()
+            self._launch()
+            self.stats['recycles'] += 1
+
+    def _count_page(self, page):
+        self._pages_since_launch += 1
+        self.stats['pages'] += 1
+
+    @contextmanager
+    def context(self, **context_options):
+        """
+        Wydaje nowy, izolowany kontekst przeglądarki i zamyka go po użyciu.
+        Wszystkie strony otwarte w kontekście są liczone do limitu recyklingu.
+        Na czas pracy kontekstu zajmujemy jeden ze wspólnych slotów przeglądarek (browser_slot).
+        """
+        with browser_slot():
+            self.start()
+            self._maybe_recycle()
+            options = {'user_agent': USER_AGENT, **context_options}
+            context = self._browser.new_context(**options)
+            context.set_default_navigation_timeout(30000)  # limit czasu na nawigację
+            context.set_default_timeout(10000)  # limit na oczekiwanie elementów
+            context.on('page', self._count_page)
+            self._active_contexts += 1
+            try:
+                yield context
+            finally:
+                self._active_contexts -= 1
+                try:
+                    context.close()
+                except Exception as e:
+                    logger.warning(f"Nie udało się zamknąć kontekstu przeglądarki: {e}")
+
+
+# Obiekty sync API Playwright są związane z wątkiem, który je utworzył,
+# dlatego każdy wątek (w praktyce: główny wątek procesu workera) ma własną pulę.
+_local = threading.local()
+
+
+def get_browser_pool() -> BrowserPool:
+    pool = getattr(_local, 'pool', None)
+    if pool is None:
+        pool = BrowserPool(
+            headless=settings.SCRAPER_BROWSER_HEADLESS,
+            max_pages=settings.SCRAPER_BROWSER_MAX_PAGES,
+            max_rss_mb=settings.SCRAPER_BROWSER_MAX_RSS_MB,
+        )
+        _local.pool = pool
+    return pool
+
+
+def shutdown_browser_pool():
+    pool = getattr(_local, 'pool', None)
+    if pool is not None:
+        pool.stop()
+        _local.pool = None
+
+
+def _is_retryable_navigation(response, error):
+    if error is not None:
+        return isinstance(error, PlaywrightTimeoutError), None
+    if response is not None and response.status in RETRY_STATUSES:
+        return True, response.headers.get('retry-after')
+    return False, None
+
+
+def navigate(page, url: str, **goto_options):
+    """page.goto z limitem żądań dla hosta i ponawianiem po 429/5xx oraz timeoutach."""
+    return retrying(url, lambda: page.goto(url, **goto_options), _is_retryable_navigation)
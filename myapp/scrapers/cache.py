@@ -0,0 +1,74 @@
+from datetime import timedelta
+from django.conf import settings
+from django.utils import timezone
+import logging
+
+from ..models import OfferDetailCache
+
+logger = logging.getLogger(__name__)
+
+
+def lookup(urls) -> dict:
+    """Zwraca wpisy cache dla podanych URL-i jako słownik {url: OfferDetailCache}."""
+    if not settings.SCRAPER_DETAIL_CACHE_ENABLED:
+        return {}
+    urls = list(urls)
+    return {entry.url: entry for entry in OfferDetailCache.objects.filter(url__in=urls)}
+
+
+def is_fresh(entry: OfferDetailCache) -> bool:
+    """Świeże wpisy są używane bez żadnego żądania, starsze trzeba potwierdzić u serwera."""
+    ttl = timedelta(hours=settings.SCRAPER_DETAIL_CACHE_TTL_HOURS)
+    return entry.fetched_at >= timezone.now() - ttl
+
+
+def touch(urls):
+    """Oznacza wpisy jako użyte, żeby nie zostały usunięte jako najdawniej używane."""
+    if urls:
+        OfferDetailCache.objects.filter(url__in=list(urls)).update(last_used=timezone.now())
+
+
+def store(results: dict):
+    """
+    Zapisuje wyniki pobrania stron szczegółów.
+
+    Args:
+        results (dict): {url: DetailResult} dla rozstrzygniętych pobrań.
+    """
+    if not settings.SCRAPER_DETAIL_CACHE_ENABLED or not results:
+        return
+    now = timezone.now()
+    entries = [
+        OfferDetailCache(
+            url=url,
+            date_posted=result.date_posted,
+            etag=result.etag or '',
+            last_modified=result.last_modified or '',
+            fetched_at=now,
+            last_used=now,
+        )
+        for url, result in results.items()
+    ]
+    OfferDetailCache.objects.bulk_create(
+        entries,
+        update_conflicts=True,
+        unique_fields=['url'],
+        update_fields=['date_posted', 'etag', 'last_modified', 'fetched_at', 'last_used'],
+    )
+    evict()
+
+
+def evict():
+    """Usuwa najdawniej używane wpisy ponad limit SCRAPER_DETAIL_CACHE_MAX_ENTRIES."""
+    max_entries = settings.SCRAPER_DETAIL_CACHE_MAX_ENTRIES
+    if not max_entries:
+        return
+    # Szukamy progu last_used, poniżej którego wpisy wypadają z cache.
+    cutoff = (OfferDetailCache.objects.order_by('-last_used', '-id')
+              .values_list('last_used', 'id')[max_entries:max_entries + 1])
+    if not cutoff:
+        return
+    last_used, entry_id = cutoff[0]
+    deleted, _ = OfferDetailCache.objects.filter(last_used__lte=last_used).exclude(
+        last_used=last_used, id__gt=entry_id).delete()
+    logger.info(f"Usunięto {deleted} najdawniej używanych wpisów z cache stron ofert.")
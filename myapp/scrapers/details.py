@@ -0,0 +1,215 @@
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from django.conf import settings
+import json
+import logging
+import re
+import requests
+
+from . import cache
+from ..dedup import known_duplicate_dates
+from .browser import navigate
+from .http_client import http_get
+from .profiling import count, phase
+
+logger = logging.getLogger(__name__)
+
+JSON_LD_SELECTOR = 'script[type="application/ld+json"]'
+JSON_LD_RE = re.compile(
+    r'<script[^>]*type=["\']application/ld\+json["\'][^>]*>(.*?)</script>',
+    re.IGNORECASE | re.DOTALL,
+)
+# Dla tych statusów przeglądarka też nic nie znajdzie, więc nie ma sensu jej uruchamiać.
+NO_FALLBACK_STATUSES = {404, 410}
+
+# Wynik pobrania strony szczegółów: czy jest rozstrzygający, data publikacji
+# oraz walidatory HTTP do późniejszego żądania warunkowego.
+DetailResult = namedtuple(
+    'DetailResult', ['resolved', 'date_posted', 'etag', 'last_modified', 'not_modified'],
+    defaults=['', '', False],
+)
+
+
+def extract_date_posted(parsed_json):
+    """
+    Wyciąga datę publikacji (YYYY-MM-DD) z danych JSON-LD.
+    JustJoin.IT zwraca listę obiektów, a NoFluffJobs obiekt z kluczem '@graph',
+    dlatego obsługujemy obie postacie (oraz pojedynczy obiekt).
+    """
+    if isinstance(parsed_json, list):
+        candidates = parsed_json
+    elif isinstance(parsed_json, dict) and '@graph' in parsed_json:
+        candidates = parsed_json['@graph']
+    else:
+        candidates = [parsed_json]
+
+    candidates = [item for item in candidates if isinstance(item, dict)]
+    job_posting = next((item for item in candidates if item.get('@type') == 'JobPosting'), None)
+    if job_posting is None:
+        job_posting = next((item for item in candidates if 'datePosted' in item), None)
+
+    date_string = job_posting.get('datePosted') if job_posting else None
+    return date_string.split('T')[0] if date_string else None
+
+
+def parse_date_posted(html: str):
+    """
+    Szuka daty publikacji w tagach <script type="application/ld+json"> bez renderowania strony.
+
+    Returns:
+        tuple: (czy znaleziono JSON-LD, data w formacie YYYY-MM-DD albo None)
+    """
+    found = False
+    for script_content in JSON_LD_RE.findall(html):
+        try:
+            parsed_json = json.loads(script_content)
+        except json.JSONDecodeError:
+            continue
+        found = True
+        date_posted = extract_date_posted(parsed_json)
+        if date_posted:
+            return True, date_posted
+    return found, None
+
+
+def fetch_detail(url: str, etag: str = '', last_modified: str = '') -> DetailResult:
+    """
+    Pobiera stronę oferty przez współdzieloną sesję HTTP. Jeśli znamy ETag lub
+    Last-Modified z poprzedniego pobrania, wysyłamy żądanie warunkowe.
+
+    Wynik nierozstrzygający (resolved=False) oznacza, że trzeba spróbować jeszcze raz w przeglądarce.
+    """
+    headers = {}
+    if etag:
+        headers['If-None-Match'] = etag
+    if last_modified:
+        headers['If-Modified-Since'] = last_modified
+    try:
+        with phase('detail_fetch'):
+            response = http_get(url, headers=headers)
+    except requests.RequestException as e:
+        logger.debug(f"Nie udało się pobrać {url} przez HTTP: {e}")
+        return DetailResult(False, None)
+
+    if response.status_code == 304:
+        return DetailResult(True, None, etag, last_modified, not_modified=True)
+    if response.status_code in NO_FALLBACK_STATUSES:
+        return DetailResult(True, None)
+    if not response.ok:
+        logger.debug(f"Strona {url} zwróciła status {response.status_code}.")
+        return DetailResult(False, None)
+
+    found, date_posted = parse_date_posted(response.text)
+    return DetailResult(found, date_posted, response.headers.get('ETag', ''),
+                        response.headers.get('Last-Modified', ''))
+
+
+def iter_details(urls, validators=None, concurrency=None):
+    """
+    Pobiera strony szczegółów równolegle, z ograniczoną liczbą jednoczesnych żądań.
+    Zwraca pary (url, DetailResult) w kolejności ukończenia pobierania.
+
+    Args:
+        urls: adresy stron ofert.
+        validators (dict): opcjonalnie {url: (etag, last_modified)} do żądań warunkowych.
+        concurrency (int): liczba równoległych żądań (domyślnie SCRAPER_DETAIL_CONCURRENCY).
+    """
+    urls = list(dict.fromkeys(urls))
+    if not urls:
+        return
+    validators = validators or {}
+    concurrency = concurrency or settings.SCRAPER_DETAIL_CONCURRENCY
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = {executor.submit(fetch_detail, url, *validators.get(url, ())): url for url in urls}
+        for future in as_completed(futures):
+            url = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                logger.warning(f"Nie udało się pobrać daty dla {url}: {e}")
+                count('errors')
+                result = DetailResult(False, None)
+            yield url, result
+
+
+def browser_date_posted(context, url: str):
+    """Zapasowa ścieżka: renderuje stronę oferty w przeglądarce i czyta JSON-LD z DOM."""
+    details_page = context.new_page()
+    try:
+        with phase('detail_browser_fallback'):
+            navigate(details_page, url, wait_until='domcontentloaded')
+            script_handle = details_page.wait_for_selector(JSON_LD_SELECTOR, state='attached', timeout=5000)
+            if script_handle:
+                return extract_date_posted(json.loads(script_handle.inner_text()))
+    except Exception as e:
+        logger.warning(f"Nie udało się pobrać daty dla {url}: {e}")
+        count('errors')
+    finally:
+        details_page.close()
+    return None
+
+
+def _isoformat(value):
+    return value.isoformat() if value else None
+
+
+def iter_with_dates(offers, context):
+    """
+    Uzupełnia klucz 'date_posted' w ofertach i zwraca je po kolei, gdy tylko data jest znana.
+    Świeże dane bierzemy z cache bez żadnego żądania, a dla duplikatów ofert z drugiego portalu
+    datę zapisanej już oferty. Nieświeże wpisy cache potwierdzamy żądaniem
+    warunkowym, a pozostałe strony pobieramy równolegle po HTTP. Przeglądarka jest używana
+    tylko dla ofert bez JSON-LD.
+    """
+    offers_by_url = {offer['url']: offer for offer in offers}
+    with phase('detail_cache'):
+        cached = cache.lookup(offers_by_url)
+
+    fresh_urls = {url for url, entry in cached.items() if cache.is_fresh(entry)}
+    cache.touch(fresh_urls)
+    if fresh_urls:
+        logger.info(f"Daty {len(fresh_urls)} ofert wzięte z cache, bez pobierania stron.")
+    for url in fresh_urls:
+        offers_by_url[url]['date_posted'] = _isoformat(cached[url].date_posted)
+        yield offers_by_url[url]
+
+    # Ta sama oferta zapisana już z drugiego portalu ma tę samą datę publikacji.
+    duplicate_dates = {}
+    if settings.SCRAPER_DEDUP_SKIP_DETAILS:
+        with phase('detail_cache'):
+            duplicate_dates = known_duplicate_dates(
+                offer for url, offer in offers_by_url.items() if url not in fresh_urls)
+    if duplicate_dates:
+        logger.info(f"Daty {len(duplicate_dates)} ofert wzięte ze znanych duplikatów, bez pobierania stron.")
+        count('detail_duplicates', len(duplicate_dates))
+    for url, date_posted in duplicate_dates.items():
+        offers_by_url[url]['date_posted'] = _isoformat(date_posted)
+        yield offers_by_url[url]
+
+    to_fetch = [url for url in offers_by_url if url not in fresh_urls and url not in duplicate_dates]
+    validators = {url: (cached[url].etag, cached[url].last_modified) for url in to_fetch if url in cached}
+
+    resolved = {}
+    try:
+        fallback_urls = []
+        for url, result in iter_details(to_fetch, validators):
+            if not result.resolved:
+                fallback_urls.append(url)
+                continue
+            if result.not_modified:
+                result = result._replace(date_posted=_isoformat(cached[url].date_posted))
+            offers_by_url[url]['date_posted'] = result.date_posted
+            resolved[url] = result
+            yield offers_by_url[url]
+
+        if fallback_urls:
+            logger.info(f"Brak JSON-LD w odpowiedzi HTTP dla {len(fallback_urls)} ofert, używam przeglądarki.")
+        for url in fallback_urls:
+            date_posted = browser_date_posted(context, url)
+            offers_by_url[url]['date_posted'] = date_posted
+            if date_posted:
+                resolved[url] = DetailResult(True, date_posted)
+            yield offers_by_url[url]
+    finally:
+        # Zapisujemy to, co udało się pobrać, nawet jeśli przetwarzanie zostało przerwane.
+        cache.store(resolved)
@@ -0,0 +1,48 @@
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+import os
+import requests
+
+from .browser import USER_AGENT
+from .throttle import RETRY_STATUSES, retrying
+
+_session = None
+_session_pid = None
+
+
+def get_session() -> requests.Session:
+    """
+    Zwraca współdzieloną sesję HTTP z pulą połączeń keep-alive.
+    Sesja jest tworzona osobno w każdym procesie (po forku workera Celery
+    nie wolno dzielić gniazd z procesem-rodzicem).
+    """
+    global _session, _session_pid
+    if _session is None or _session_pid != os.getpid():
+        session = requests.Session()
+        pool_size = max(settings.SCRAPER_DETAIL_CONCURRENCY, 1)
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers.update({
+            'User-Agent': USER_AGENT,
+            'Accept-Language': 'pl-PL,pl;q=0.9,en;q=0.8',
+        })
+        _session, _session_pid = session, os.getpid()
+    return _session
+
+
+def _is_retryable(response, error):
+    if error is not None:
+        return isinstance(error, (requests.Timeout, requests.ConnectionError)), None
+    if response.status_code in RETRY_STATUSES:
+        return True, response.headers.get('Retry-After')
+    return False, None
+
+
+def http_get(url: str, **kwargs) -> requests.Response:
+    """
+    GET przez współdzieloną sesję z limitem żądań dla hosta. Po 429/5xx i błędach
+    połączenia ponawia żądanie z losowym opóźnieniem (ostatnia odpowiedź lub wyjątek wraca do wywołującego).
+    """
+    kwargs.setdefault('timeout', settings.SCRAPER_HTTP_TIMEOUT)
+    return retrying(url, lambda: get_session().get(url, **kwargs), _is_retryable)
@@ -0,0 +1,31 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def skip_known(offers, seen_urls, stop_after=None):
+    """
+    Przepuszcza tylko oferty, których URL nie ma w `seen_urls`.
+
+    Jeśli listing jest posortowany od najnowszych, po `stop_after` znanych ofertach
+    z rzędu dalsza część listingu też jest już w bazie, więc przestajemy go przeglądać.
+
+    Args:
+        offers: iterowalny zbiór słowników ofert (może być generatorem, np. kolejnych stron API).
+        seen_urls (set): URL-e ofert, które już mamy w bazie.
+        stop_after (int): liczba znanych ofert z rzędu, po której przerywamy (None = nie przerywamy).
+    """
+    skipped = 0
+    known_in_a_row = 0
+    for offer in offers:
+        if offer['url'] in seen_urls:
+            skipped += 1
+            known_in_a_row += 1
+            if stop_after and known_in_a_row >= stop_after:
+                logger.info(f"{known_in_a_row} znanych ofert z rzędu, kończę przeglądanie listingu.")
+                break
+            continue
+        known_in_a_row = 0
+        yield offer
+    if skipped:
+        logger.info(f"Pominięto {skipped} ofert, które są już w bazie.")
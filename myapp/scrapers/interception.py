@@ -0,0 +1,104 @@
+from django.conf import settings
+from urllib.parse import urlparse
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Typy zasobów, które nie są potrzebne do odczytania danych ofert z DOM.
+HEAVY_RESOURCE_TYPES = {'image', 'media', 'font', 'stylesheet'}
+
+# Skrypty analityczne i reklamowe ładowane przez oba portale.
+TRACKER_DOMAINS = {
+    'googletagmanager.com', 'google-analytics.com', 'analytics.google.com', 'doubleclick.net',
+    'googlesyndication.com', 'googleadservices.com', 'facebook.net', 'facebook.com',
+    'hotjar.com', 'hotjar.io', 'clarity.ms', 'licdn.com', 'bat.bing.com', 'criteo.com',
+    'criteo.net', 'tiktok.com', 'snapchat.com', 'hubspot.com', 'hs-scripts.com', 'newrelic.com',
+    'nr-data.net', 'sentry.io', 'intercom.io', 'intercomcdn.com', 'onesignal.com',
+}
+
+
+def _matches(host: str, domains) -> bool:
+    return any(host == domain or host.endswith(f'.{domain}') for domain in domains)
+
+
+class InterceptionPolicy:
+    """
+    Reguły przechwytywania żądań w kontekście przeglądarki: blokuje zasoby
+    wybranych typów oraz domeny spoza listy dozwolonych lub z listy zabronionych.
+    """
+
+    def __init__(self, blocked_resource_types=(), blocked_domains=(), allowed_domains=None):
+        self.blocked_resource_types = set(blocked_resource_types)
+        self.blocked_domains = set(blocked_domains)
+        # None oznacza brak listy dozwolonych domen (dozwolone wszystko, czego nie blokujemy).
+        self.allowed_domains = set(allowed_domains) if allowed_domains is not None else None
+
+    def block_reason(self, resource_type: str, url: str):
+        """Zwraca powód zablokowania żądania albo None, jeśli żądanie ma przejść."""
+        if resource_type in self.blocked_resource_types:
+            return resource_type
+        host = (urlparse(url).hostname or '').lower()
+        if not host:
+            return None
+        if _matches(host, self.blocked_domains):
+            return 'domain'
+        if self.allowed_domains is not None and not _matches(host, self.allowed_domains):
+            return 'domain'
+        return None
+
+    def install(self, context) -> dict:
+        """
+        Podpina politykę pod kontekst przeglądarki i zwraca słownik ze statystykami,
+        aktualizowany na bieżąco w trakcie działania scrapera.
+        """
+        stats = {'blocked_requests': 0, 'blocked_by_reason': {}, 'allowed_requests': 0, 'allowed_bytes': 0}
+
+        def handle_route(route, request):
+            reason = self.block_reason(request.resource_type, request.url)
+            if reason is None:
+                stats['allowed_requests'] += 1
+                route.continue_()
+                return
+            stats['blocked_requests'] += 1
+            stats['blocked_by_reason'][reason] = stats['blocked_by_reason'].get(reason, 0) + 1
+            route.abort('blockedbyclient')
+
+        def count_response(response):
+            try:
+                stats['allowed_bytes'] += int(response.headers.get('content-length', 0))
+            except (TypeError, ValueError):
+                pass
+
+        context.route('**/*', handle_route)
+        context.on('response', count_response)
+        return stats
+
+
+# Polityki per platforma. Skrypt banera cookie (cookie-script.com) zostawiamy,
+# bo scraper czeka na jego przycisk akceptacji.
+POLICIES = {
+    'justjoinit': InterceptionPolicy(
+        blocked_resource_types=HEAVY_RESOURCE_TYPES,
+        blocked_domains=TRACKER_DOMAINS,
+    ),
+    'nofluffjobs': InterceptionPolicy(
+        blocked_resource_types=HEAVY_RESOURCE_TYPES,
+        blocked_domains=TRACKER_DOMAINS,
+    ),
+}
+
+
+def install_policy(context, platform: str):
+    """Włącza politykę przechwytywania dla platformy. Zwraca statystyki albo None, gdy blokowanie jest wyłączone."""
+    policy = POLICIES.get(platform)
+    if not settings.SCRAPER_BLOCK_RESOURCES or policy is None:
+        return None
+    return policy.install(context)
+
+
+def log_stats(platform: str, stats):
+    if stats:
+        logger.info(
+            f"[{platform}] Zablokowano {stats['blocked_requests']} żądań {stats['blocked_by_reason']}, "
+            f"przepuszczono {stats['allowed_requests']} ({stats['allowed_bytes'] / 1024:.0f} KB)."
+        )
@@ -1,12 +1,235 @@
-from playwright.sync_api import sync_playwright
+from django.conf import settings
+from .browser import get_browser_pool, navigate
+from .details import iter_with_dates
+from .interception import install_policy, log_stats
+from .http_client import http_get
+from .incremental import skip_known
+from .profiling import count, phase
 import logging
-import json
 import re
 
 logger = logging.getLogger(__name__)
 
+# Selektory kart ofert. Przekazujemy je do skryptu w przeglądarce,
+# dzięki czemu przy zmianie klas MUI poprawiamy je tylko w jednym miejscu.
+CARD_SELECTORS = {
+    'card': "a[href^='/job-offer/']",
+    'title': 'h3',
+    'company_icon': 'svg[data-testid="ApartmentRoundedIcon"]',
+    'location': 'span.mui-1o4wo1x',
+    'multilocation_button': 'button[name="multilocation_button"]',
+    'tooltip': 'div.MuiPopper-root',
+    'tooltip_location': 'span.mui-1jh5lol',
+    'salary': 'span.mui-13a157h',
+    'skill': 'div.mui-jikuwi',
+}
 
-def scrape_justjoinit(technology: str, experience: str = 'all') -> list:
+# Jedno wywołanie page.evaluate zwraca dane wszystkich kart naraz, zamiast kilku
+# round-tripów Playwright na każdą kartę. Listę lokalizacji z tooltipa także
+# czytamy w przeglądarce, czekając tylko tyle, ile trzeba na pojawienie się tooltipa.
+EXTRACT_CARDS_JS = """
+async (sel) => {
+    const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+    const text = (root, selector) => {
+        const el = root.querySelector(selector);
+        return el ? el.innerText.trim() : null;
+    };
+    const companyOf = (card) => {
+        const icon = card.querySelector(sel.company_icon);
+        let node = icon ? icon.parentElement : null;
+        while (node && node !== card && !node.querySelector('p')) {
+            node = node.parentElement;
+        }
+        const p = node ? node.querySelector('p') : null;
+        return p ? p.innerText.trim() : null;
+    };
+    // Tooltip poprzedniej karty może jeszcze być w DOM, więc czekamy na nowy (albo zmieniony) popper,
+    // a po odczytaniu zamykamy tooltip, żeby nie pomylić go z tooltipem następnej karty.
+    const closeTooltip = async (button, tooltip) => {
+        document.dispatchEvent(new KeyboardEvent('keydown', {key: 'Escape', bubbles: true}));
+        for (let attempt = 0; attempt < 12 && tooltip.isConnected; attempt++) {
+            // Jeśli Escape nie zamknął tooltipa (po animacji zamykania), przełączamy go przyciskiem.
+            if (attempt === 6) {
+                button.click();
+            }
+            await sleep(50);
+        }
+    };
+    const tooltipLocations = async (button) => {
+        const before = new Map(Array.from(document.querySelectorAll(sel.tooltip), (el) => [el, el.innerText]));
+        button.click();
+        for (let attempt = 0; attempt < 60; attempt++) {
+            const tooltip = Array.from(document.querySelectorAll(sel.tooltip))
+                .find((el) => !before.has(el) || before.get(el) !== el.innerText);
+            const spans = tooltip ? tooltip.querySelectorAll(sel.tooltip_location) : [];
+            if (spans.length) {
+                const locations = Array.from(spans, (span) => span.innerText.trim());
+                await closeTooltip(button, tooltip);
+                return locations;
+            }
+            await sleep(50);
+        }
+        return [];
+    };
+
+    const cards = [];
+    for (const card of document.querySelectorAll(sel.card)) {
+        const button = card.querySelector(sel.multilocation_button);
+        cards.push({
+            href: card.getAttribute('href'),
+            title: text(card, sel.title),
+            company: companyOf(card),
+            location: text(card, sel.location),
+            tooltip_locations: button ? await tooltipLocations(button) : [],
+            salary: text(card, sel.salary),
+            skills: Array.from(card.querySelectorAll(sel.skill), (el) => el.innerText.trim()),
+        });
+    }
+    return cards;
+}
+"""
+
+UNWANTED_SKILL_PATTERNS = {r'^new$', r'^1-click Apply$', r'^\d+d left$', r'^Expires tomorrow$'}
+
+
+def _build_offer(card: dict):
+    """Zamienia surowe dane karty z przeglądarki na słownik oferty (albo None, gdy brakuje danych)."""
+    href = card.get('href')
+    link = f"{settings.SCRAPER_JJIT_BASE_URL}{href}" if href else None
+    title = card.get('title')
+    company = card.get('company')
+
+    # Z widocznej lokalizacji bierzemy tylko fragment przed przecinkiem.
+    location = (card.get('location') or '').split(',')[0].strip()
+    tooltip_locations = card.get('tooltip_locations') or []
+    if tooltip_locations:
+        cleaned_locations = {loc.split(',')[0].strip() for loc in tooltip_locations}
+        # Dodajemy również oczyszczoną lokalizację początkową, aby mieć pewność, że jest w zestawie.
+        cleaned_locations.add(location)
+        cleaned_locations.discard('')
+        location = ", ".join(sorted(cleaned_locations))
+
+    skills_list = [
+        skill for skill in card.get('skills') or []
+        if not any(re.match(pattern, skill, re.IGNORECASE) for pattern in UNWANTED_SKILL_PATTERNS)
+    ]
+
+    if not all([title, company, link, location]):
+        return None
+
+    return {
+        "title": title,
+        "company": company,
+        "location": location,
+        "salary": card.get('salary') or "Nie podano",
+        "skills": ", ".join(skills_list),
+        "url": link,
+        "source": "JustJoin.IT",
+        "date_posted": None,
+    }
+
+
+# Nagłówki, z którymi frontend JustJoin.it odpytuje swoje API z ofertami.
+API_HEADERS = {'Accept': 'application/json', 'Version': '2'}
+API_PAGE_SIZE = 100
+
+
+def _format_salary(employment_types: list) -> str:
+    """Buduje tekst widełek w formacie listingu, np. '15 000 - 20 000 PLN/month (b2b)'."""
+    for employment in employment_types or []:
+        salary_from, salary_to = employment.get('from'), employment.get('to')
+        if not salary_from and not salary_to:
+            continue
+        amounts = [f"{int(value):,}".replace(',', ' ') for value in (salary_from, salary_to) if value]
+        currency = (employment.get('currency') or '').upper()
+        unit = employment.get('unit') or 'month'
+        # Rodzaj umowy (b2b, permanent, ...) dopisujemy, żeby trafił do kolumny salary_contract.
+        contract = f" ({employment['type']})" if employment.get('type') else ''
+        return f"{' - '.join(amounts)} {currency}/{unit}{contract}".strip()
+    return "Nie podano"
+
+
+def _build_api_offer(item: dict):
+    """Zamienia ofertę z API JustJoin.it na słownik w tym samym formacie co tryb przeglądarkowy."""
+    slug = item.get('slug')
+    title = item.get('title')
+    company = item.get('companyName')
+
+    locations = {loc.get('city') for loc in item.get('multilocation') or [] if loc.get('city')}
+    if item.get('city'):
+        locations.add(item['city'])
+    if item.get('workplaceType') == 'remote':
+        locations.add('Remote')
+    location = ", ".join(sorted(locations))
+
+    if not all([slug, title, company, location]):
+        return None
+
+    published_at = item.get('publishedAt')
+    return {
+        "title": title,
+        "company": company,
+        "location": location,
+        "salary": _format_salary(item.get('employmentTypes')),
+        "skills": ", ".join(item.get('requiredSkills') or []),
+        "url": f"{settings.SCRAPER_JJIT_BASE_URL}/job-offer/{slug}",
+        "source": "JustJoin.IT",
+        # API zwraca datę publikacji, więc strony szczegółów nie są potrzebne.
+        "date_posted": published_at.split('T')[0] if published_at else None,
+    }
+
+
+def _iter_api_offers(technology: str, experience: str):
+    """Pobiera listing JustJoin.it z API JSON strona po stronie, zwracając oferty od najnowszych."""
+    params = {'perPage': API_PAGE_SIZE, 'sortBy': 'published', 'orderBy': 'DESC'}
+    if technology and technology.lower() != 'all':
+        params['categories[]'] = technology.lower()
+    if experience and experience.lower() != 'all':
+        params['experienceLevels[]'] = experience.lower()
+
+    page_number = 1
+    while page_number and page_number <= settings.SCRAPER_JJIT_API_MAX_PAGES:
+        try:
+            logger.info(f"Pobieram stronę {page_number} listingu z API JustJoin.IT.")
+            with phase('listing_extraction'):
+                response = http_get(settings.SCRAPER_JJIT_API_URL, params={**params, 'page': page_number},
+                                    headers=API_HEADERS)
+                response.raise_for_status()
+                payload = response.json()
+        except Exception as e:
+            logger.error(f"Nie udało się pobrać strony {page_number} z API JustJoin.IT: {e}")
+            count('errors')
+            return
+
+        for item in payload.get('data') or []:
+            try:
+                offer_data = _build_api_offer(item)
+            except Exception as e:
+                logger.warning(f"Pominięto ofertę z API z powodu błędu podczas parsowania: {e}")
+                count('errors')
+                continue
+            if offer_data:
+                yield offer_data
+
+        if not payload.get('data'):
+            return
+        page_number = (payload.get('meta') or {}).get('nextPage')
+
+
+def _scrape_justjoinit_api(technology: str, experience: str, seen_urls=None):
+    """Pobiera listing JustJoin.it bezpośrednio z API JSON, bez przeglądarki."""
+    offers = _iter_api_offers(technology, experience)
+    if seen_urls is not None:
+        # Kolejne strony są pobierane leniwie, więc po serii znanych ofert nie pobieramy już następnych.
+        offers = skip_known(offers, seen_urls, stop_after=settings.SCRAPER_INCREMENTAL_STOP_AFTER)
+    found = 0
+    for offer_data in offers:
+        found += 1
+        yield offer_data
+    logger.info(f"Znaleziono {found} ofert na JustJoin.IT (API).")
+
+
+def scrape_justjoinit(technology: str, experience: str = 'all', mode: str = None, seen_urls=None):
     """
     Scraper ofert pracy z portalu JustJoin.it.
     To jest synchroniczna wersja Twojego oryginalnego skryptu.
@@ -14,170 +237,91 @@ def scrape_justjoinit(technology: str, experience: str = 'all') -> list:
     Args:
         technology (str): Technologia do wyszukania (np. 'python').
         experience (str): Poziom doświadczenia (np. 'junior', 'mid', 'senior', 'all').
+        mode (str): 'browser' (listing renderowany w Chromium) albo 'api' (dane JSON bez przeglądarki).
+            Domyślnie wartość z ustawienia SCRAPER_MODES['justjoinit'].
+        seen_urls (set): tryb przyrostowy - URL-e ofert, które już są w bazie. Takie oferty są
+            pomijane, a listing (posortowany od najnowszych) przeglądamy tylko do serii znanych ofert.
 
-    Returns:
-        list: Lista słowników z danymi ofert pracy.
+    Yields:
+        dict: Słowniki z danymi ofert pracy, zwracane na bieżąco, gdy tylko oferta jest kompletna.
     """
-    with sync_playwright() as p:
-        headless_mode = True
-        browser = p.chromium.launch(headless=headless_mode, args=['--disable-blink-features=AutomationControlled'])
-        context = browser.new_context(user_agent=(
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-            "AppleWebKit/537.36 (KHTML, like Gecko) "
-            "Chrome/117.0.0.0 Safari/537.36"
-        ))
-        context.set_default_navigation_timeout(30000)  # limit czasu na nawigację
-        context.set_default_timeout(10000)  # limit na oczekiwanie elementów
-        page = browser.new_page()
-        base_url = "https://justjoin.it/job-offers/all-locations"
+    mode = mode or settings.SCRAPER_MODES.get('justjoinit', 'browser')
+    if mode == 'api':
+        yield from _scrape_justjoinit_api(technology, experience, seen_urls)
+        return
+
+    # Przeglądarka jest współdzielona w ramach procesu workera, dostajemy tylko świeży kontekst.
+    with get_browser_pool().context() as context:
+        interception_stats = install_policy(context, 'justjoinit')
+        page = context.new_page()
+        base_url = f"{settings.SCRAPER_JJIT_BASE_URL}/job-offers/all-locations"
 
         if technology and technology.lower() != 'all':
             url = f"{base_url}/{technology.lower()}"
         else:
             url = base_url
 
+        query = []
         if experience and experience.lower() != 'all':
-            url += f"?experience-level={experience.lower()}"
+            query.append(f"experience-level={experience.lower()}")
+        if seen_urls is not None:
+            # W trybie przyrostowym potrzebujemy listingu posortowanego od najnowszych.
+            query.append("orderBy=DESC&sortBy=published")
+        if query:
+            url += "?" + "&".join(query)
 
         try:
             logger.info(f"Przechodzę do URL: {url}")
             # ZMIANA: 'networkidle' jest często zawodne. Zmieniamy na 'domcontentloaded',
             # co oznacza, że czekamy tylko na załadowanie struktury HTML.
             # Następnie i tak czekamy na konkretny selektor, co jest bardziej niezawodne.
-            page.goto(url, wait_until='domcontentloaded')
+            with phase('navigation'):
+                navigate(page, url, wait_until='domcontentloaded')
 
             # --- OBSŁUGA BANNERA COOKIE ---
             # Banner cookie może blokować kliknięcia. Szukamy przycisku akceptacji i go klikamy.
             try:
-                accept_button = page.locator('#cookiescript_accept')
-                logger.info("Próbuję znaleźć przycisk akceptacji cookie...")
-                accept_button.wait_for(state='visible', timeout=5000)
-                logger.info("Przycisk znaleziony, próbuję kliknąć...")
-                accept_button.click()
-                logger.info("Banner cookie został zaakceptowany.")
+                with phase('cookie_banner'):
+                    accept_button = page.locator('#cookiescript_accept')
+                    logger.info("Próbuję znaleźć przycisk akceptacji cookie...")
+                    accept_button.wait_for(state='visible', timeout=5000)
+                    logger.info("Przycisk znaleziony, próbuję kliknąć...")
+                    accept_button.click()
+                    logger.info("Banner cookie został zaakceptowany.")
             except Exception as e:
                 # Zmieniamy logowanie, aby zobaczyć DOKŁADNY błąd, jeśli akceptacja się nie uda
                 logger.warning(f"Nie udało się automatycznie zaakceptować cookies: {e}")
 
-            # ZMIANA: Czekamy na link, którego atrybut href zaczyna się od "/job-offer/".
-            # To jest obecnie najbardziej stabilny identyfikator oferty.
-            page.wait_for_selector("a[href^='/job-offer/']", timeout=20000)
-            # ZMIANA: Lokalizujemy wszystkie oferty na podstawie tego samego, stabilnego selektora.
-            jobs = page.locator("a[href^='/job-offer/']").all()
+            with phase('listing_extraction'):
+                # ZMIANA: Czekamy na link, którego atrybut href zaczyna się od "/job-offer/".
+                # To jest obecnie najbardziej stabilny identyfikator oferty.
+                page.wait_for_selector(CARD_SELECTORS['card'], timeout=20000)
+                # Wszystkie karty (razem z pełnymi listami lokalizacji) pobieramy jednym wywołaniem.
+                cards = page.evaluate(EXTRACT_CARDS_JS, CARD_SELECTORS)
         except Exception as e:
             logger.error(f"Nie udało się załadować strony lub znaleźć ofert: {e}")
-            browser.close()
-            return []
+            count('errors')
+            return
 
         results = []
-        for job in jobs:
+        for card in cards:
             try:
-                # Link do oferty
-                href = job.get_attribute("href")
-                link = f"https://justjoin.it{href}" if href else None
-
-                title = job.locator('h3').inner_text()
-                company = job.locator('p:near(svg[data-testid="ApartmentRoundedIcon"])').inner_text()
-
-                # Zaawansowane pobieranie lokalizacji
-                # KROK 1: Zawsze pobieramy początkową, widoczną lokalizację.
-                # Od razu ją oczyszczamy, biorąc tylko fragment przed przecinkiem.
-                initial_location_text = job.locator('span.mui-1o4wo1x').inner_text()
-                # Ustawiamy ją jako domyślną.
-                location = initial_location_text.split(',')[0].strip()
-
-                # Szukamy przycisku z atrybutem name="multilocation_button"
-                multilocation_button = job.locator('button[name="multilocation_button"]')
-                if multilocation_button.count() > 0:
-                    # Jeśli przycisk istnieje, to znaczy, że jest wiele lokalizacji
-                    try:
-                        # OSTATECZNA STRATEGIA: Prosta i niezawodna.
-                        # 1. Klikamy w przycisk.
-                        multilocation_button.click()
-                        logger.info(f"[{title}] Kliknięto przycisk multi-lokalizacji. Czekam na pojawienie się listy...")
-
-                        # 2. Czekamy na pojawienie się kontenera z listą (tooltipa).
-                        # Używamy selektora klasy, który jest bardziej stabilny.
-                        tooltip_locator = page.locator("div.MuiPopper-root").last
-                        tooltip_locator.wait_for(state='visible', timeout=3000)
-
-                        # 3. Pobieramy wszystkie lokalizacje z tooltipa, celując w poprawny element.
-                        # Na podstawie dostarczonego HTML, wiemy, że lokalizacje są w <span class="mui-1jh5lol">
-                        tooltip_locations_raw = tooltip_locator.locator('span.mui-1jh5lol').all_inner_texts()
-
-                        # KROK 2: Oczyszczamy każdą lokalizację z tooltipa.
-                        cleaned_locations = {loc.split(',')[0].strip() for loc in tooltip_locations_raw}
-                        # Dodajemy również oczyszczoną lokalizację początkową, aby mieć pewność, że jest w zestawie.
-                        cleaned_locations.add(location)
-
-                        logger.info(f"[{title}] Znaleziono i oczyszczono {len(cleaned_locations)} unikalnych lokalizacji: {cleaned_locations}")
-                        if cleaned_locations:
-                            location = ", ".join(sorted(list(cleaned_locations)))
-                    except Exception as e:
-                        logger.warning(f"Nie udało się rozwinąć listy lokalizacji dla oferty '{title}': {e}. Używam domyślnej.")
-                        # W razie błędu, domyślna (już oczyszczona) lokalizacja pozostaje.
-                else:
-                    # Jeśli nie ma przycisku, pobieramy standardową, pojedynczą lokalizację
-                    pass
-
-                salary_el = job.locator('span.mui-13a157h').first
-                salary = salary_el.inner_text() if salary_el else "Nie podano"
-                unwanted_patterns = {r'^new$', r'^'
-                                               r'1-click Apply$', r'^\d+d left$', r'^Expires tomorrow$'}
-                skill_elements = job.locator('div.mui-jikuwi').all()
-                skills_list = []
-                for skill_el in skill_elements:
-                    skill_text = skill_el.inner_text()
-                    if not any(re.match(pattern, skill_text, re.IGNORECASE) for pattern in unwanted_patterns):
-                        skills_list.append(skill_text)
-                skills_str = ", ".join(skills_list)
-
-                date_posted = None
-                logger.debug(f"JJIT: Processing link: {link}")
-                if link:
-                    details_page = browser.new_page()
-                    try:
-                        details_page.goto(link, wait_until='domcontentloaded')
-
-                        script_selector = 'script[type="application/ld+json"]'
-                        script_handle = details_page.wait_for_selector(script_selector, state='attached', timeout=5000)
-                        if script_handle:
-                            script_content = script_handle.inner_text()
-                            # POPRAWKA: Sprawdzamy, czy dane są listą, czy pojedynczym obiektem.
-                            parsed_json = json.loads(script_content)
-                            if isinstance(parsed_json, list):
-                                # Jeśli to lista, bierzemy pierwszy element.
-                                data = parsed_json[0]
-                            else:
-                                # Jeśli to pojedynczy obiekt, używamy go bezpośrednio.
-                                data = parsed_json
-                            logger.debug(f"JJIT: Raw data from JSON-LD: {data}")
-                            date_string = data.get('datePosted')
-                            date_posted = date_string.split('T')[0] if date_string else None
-                    except Exception as e:
-                        logger.warning(f"Nie udało się pobrać daty dla {link}: {e}")
-                    finally:
-                        details_page.close()
-
-                if not all([title, company, link, location]):
-                    continue
-
-                # Dodaj wynik
-                offer_data = {
-                    "title": title,
-                    "company": company,
-                    "location": location,
-                    "salary": salary,
-                    "skills": skills_str,
-                    "url": link,
-                    "source": "JustJoin.IT",
-                    "date_posted": date_posted,
-                }
-                results.append(offer_data)
-                logger.debug(f"JJIT: Final offer data for {link}: {{'date_posted': {offer_data.get('date_posted')}}}")
+                offer_data = _build_offer(card)
             except Exception as e:
                 logger.warning(f"Pominięto ofertę z powodu błędu podczas parsowania: {e}")
+                count('errors')
+                continue
+            if offer_data:
+                results.append(offer_data)
+
+        if seen_urls is not None:
+            results = list(skip_known(results, seen_urls, stop_after=settings.SCRAPER_INCREMENTAL_STOP_AFTER))
 
-        browser.close()
-        logger.info(f"Znaleziono {len(results)} ofert na JustJoin.IT.")
-        return results
\ No newline at end of file
+        # Daty publikacji pobieramy równolegle po HTTP (przeglądarka tylko awaryjnie),
+        # a każdą ofertę oddajemy od razu, gdy jej data jest znana.
+        found = 0
+        for offer_data in iter_with_dates(results, context):
+            found += 1
+            yield offer_data
+        log_stats('justjoinit', interception_stats)
+        logger.info(f"Znaleziono {found} ofert na JustJoin.IT.")
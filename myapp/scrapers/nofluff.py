@@ -1,24 +1,122 @@
-from playwright.sync_api import sync_playwright
+from django.conf import settings
+from .browser import get_browser_pool, navigate
+from .details import iter_with_dates
+from .incremental import skip_known
+from .interception import install_policy, log_stats
+from .profiling import count, phase
 import logging
-import json
 
 logger = logging.getLogger(__name__)
 
-
-def scrape_nofluffjobs(technology: str, experience: str = 'all') -> list:
-    with sync_playwright() as p:
-        headless_mode = True
-        browser = p.chromium.launch(headless=headless_mode, args=['--disable-blink-features=AutomationControlled'])
-        context = browser.new_context(user_agent=(
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-            "AppleWebKit/537.36 (KHTML, like Gecko) "
-            "Chrome/117.0.0.0 Safari/537.36"
-        ))
-        context.set_default_navigation_timeout(30000)  # limit czasu na nawigację
-        context.set_default_timeout(10000)  # limit na oczekiwanie elementów
+CARD_SELECTORS = {
+    'container': 'div.list-container',
+    'card': 'a[nfj-postings-item]',
+    'title': 'h3.posting-title__position',
+    'company': 'h4.company-name',
+    'location': '[data-cy="location on the job offer listing"]',
+    'popover': 'popover-content .popover-body',
+    'salary': '[data-cy="salary ranges on the job offer listing"]',
+    'skill': 'nfj-posting-item-tiles span',
+}
+# Liczba kontenerów z wynikami, które bierzemy pod uwagę (dalsze to np. oferty polecane).
+RESULT_CONTAINERS = 2
+
+# Jedno wywołanie page.evaluate zwraca dane wszystkich kart naraz. Pop-over z pełną
+# listą lokalizacji otwieramy zdarzeniem najechania tylko dla kart ze skrótem typu
+# „Zdalnie +5” i czekamy wyłącznie do jego pojawienia się, zamiast stałych 500 ms na kartę.
+EXTRACT_CARDS_JS = """
+async ([sel, containerLimit]) => {
+    const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+    const clean = (value) => (value || '').replace(/\\u00a0/g, ' ').trim();
+    const text = (root, selector) => {
+        const el = root.querySelector(selector);
+        return el ? clean(el.innerText) : null;
+    };
+    const popoverLocations = async (card, locationEl) => {
+        for (const type of ['mouseenter', 'mouseover']) {
+            locationEl.dispatchEvent(new MouseEvent(type, {bubbles: true}));
+        }
+        let locations = [];
+        for (let attempt = 0; attempt < 40; attempt++) {
+            const body = card.querySelector(sel.popover);
+            if (body) {
+                locations = Array.from(body.querySelectorAll('a'), (a) => clean(a.textContent)).filter(Boolean);
+                if (!locations.length) {
+                    locations = clean(body.innerText).split('\\n').map(clean).filter(Boolean);
+                }
+                if (locations.length) {
+                    break;
+                }
+            }
+            await sleep(25);
+        }
+        for (const type of ['mouseleave', 'mouseout']) {
+            locationEl.dispatchEvent(new MouseEvent(type, {bubbles: true}));
+        }
+        return locations;
+    };
+
+    const containers = Array.from(document.querySelectorAll(sel.container)).slice(0, containerLimit);
+    const cards = [];
+    for (const container of containers) {
+        for (const card of container.querySelectorAll(sel.card)) {
+            const locationEl = card.querySelector(sel.location);
+            const location = locationEl ? clean(locationEl.innerText) : null;
+            const hasMore = location !== null && /\\+\\s*\\d+/.test(location);
+            cards.push({
+                href: card.getAttribute('href'),
+                title: text(card, sel.title),
+                company: text(card, sel.company),
+                location: location,
+                popover_locations: hasMore ? await popoverLocations(card, locationEl) : [],
+                salary: text(card, sel.salary),
+                skills: Array.from(card.querySelectorAll(sel.skill), (el) => el.innerText.trim()),
+            });
+        }
+    }
+    return cards;
+}
+"""
+
+
+def _build_offer(card: dict):
+    """Zamienia surowe dane karty z przeglądarki na słownik oferty (albo None, gdy brakuje danych)."""
+    href = card.get('href')
+    link = f"{settings.SCRAPER_NFJ_BASE_URL}{href}" if href else None
+    title = (card.get('title') or '').replace('NOWA', '').strip()
+    company = card.get('company')
+
+    # Domyślnie używamy skróconego tekstu (np. „Zdalnie +5” albo nazwy miasta),
+    # a jeśli udało się otworzyć pop-over, pełnej listy lokalizacji.
+    location = card.get('location')
+    popover_locations = card.get('popover_locations') or []
+    if popover_locations:
+        location = ", ".join(sorted(set(popover_locations)))
+
+    if not all([title, company, link, location]):
+        return None
+
+    return {
+        "title": title, "company": company, "location": location,
+        "salary": card.get('salary'),
+        "skills": ", ".join(card.get('skills') or []),
+        "url": link,
+        "source": "NoFluffJobs",
+        "date_posted": None,
+    }
+
+
+def scrape_nofluffjobs(technology: str, experience: str = 'all', seen_urls=None):
+    """
+    Scraper ofert pracy z portalu NoFluffJobs.
+    Oferty są zwracane na bieżąco (generator), gdy tylko oferta jest kompletna.
+    """
+    # Przeglądarka jest współdzielona w ramach procesu workera, dostajemy tylko świeży kontekst.
+    with get_browser_pool().context() as context:
+        interception_stats = install_policy(context, 'nofluffjobs')
         page = context.new_page()
 
-        base_url = f"https://nofluffjobs.com/pl/{technology.capitalize()}"
+        base_url = f"{settings.SCRAPER_NFJ_BASE_URL}/pl/{technology.capitalize()}"
 
         if experience and experience.lower() != 'all':
             url = f"{base_url}?criteria=seniority%3D{experience.lower()}"
@@ -27,122 +125,50 @@ def scrape_nofluffjobs(technology: str, experience: str = 'all') -> list:
 
         try:
             logger.info(f"Przechodzę do URL: {url}")
-            page.goto(url, wait_until='domcontentloaded')
+            with phase('navigation'):
+                navigate(page, url, wait_until='domcontentloaded')
             """" Obsługa cookies na NFJ w tybie headless_mode=False warto zatrzymac na 7s """
             try:
-                page.wait_for_timeout(7000)
-                accept_button = page.locator('.accept')
-                if accept_button and accept_button.is_visible():
-                    accept_button.click()
-                    logger.info("Banner cookie na NoFluffJobs został zaakceptowany.")
+                with phase('cookie_banner'):
+                    page.wait_for_timeout(7000)
+                    accept_button = page.locator('.accept')
+                    if accept_button and accept_button.is_visible():
+                        accept_button.click()
+                        logger.info("Banner cookie na NoFluffJobs został zaakceptowany.")
             except Exception as e:
                 logger.warning(f"Nie udało się automatycznie zaakceptować cookies na NFJ: {e}")
 
-            all_containers = page.locator("div.list-container").all()
-            results_container = all_containers[:2]
-
-            jobs = []
-            for container in results_container:
-                container.wait_for(state='visible', timeout=15000)
-                jobs_container = container.locator("a[nfj-postings-item]").all()
-                jobs.extend(jobs_container)
+            with phase('listing_extraction'):
+                page.wait_for_selector(f"{CARD_SELECTORS['container']} {CARD_SELECTORS['card']}", timeout=15000)
+                # Wszystkie karty (razem z pełnymi listami lokalizacji) pobieramy jednym wywołaniem.
+                cards = page.evaluate(EXTRACT_CARDS_JS, [CARD_SELECTORS, RESULT_CONTAINERS])
 
         except Exception as e:
             logger.error(f"Nie udało się załadować strony NoFluffJobs lub znaleźć ofert: {e}")
-            browser.close()
-            return []
+            count('errors')
+            return
 
         results = []
-        for job_item in jobs:
+        for card in cards:
             try:
-                href = job_item.get_attribute("href")
-                link = f"https://nofluffjobs.com{href}" if href else None
-
-                raw_title = job_item.locator('h3.posting-title__position').inner_text()
-                title = raw_title.replace('NOWA', '').strip()
-                company = job_item.locator('h4.company-name').inner_text().strip()
-
-                # --- NOWA LOGIKA POBIERANIA LOKALIZACJI ---
-                location_element = job_item.locator('[data-cy="location on the job offer listing"]')
-                # Domyślnie używamy skróconego tekstu (np. „Zdalnie +5” albo nazwy miasta)
-                summary_text = location_element.inner_text().replace('\xa0', ' ').strip()
-                location = summary_text
-                try:
-                    # Upewniamy się, że element jest w zasięgu widoku i najeżdżamy na niego
-                    location_element.scroll_into_view_if_needed()
-                    location_element.hover()
-                    # Czekamy chwilę, aby pop‑over zdążył się pojawić
-                    page.wait_for_timeout(500)
-                    # Pop‑over jest osadzony wewnątrz danego elementu oferty
-                    popover_body = job_item.locator('popover-content .popover-body')
-                    if popover_body.count() > 0:
-                        # Najpierw próbujemy pobrać wszystkie linki z pop‑overa – każdy link to osobna lokalizacja
-                        anchor_texts = [
-                            text.replace('\xa0', ' ').strip()
-                            for text in popover_body.locator('a').all_text_contents()
-                            if text.strip()
-                        ]
-                        if anchor_texts:
-                            location = ", ".join(sorted(set(anchor_texts)))
-                        else:
-                            # Jeżeli nie ma linków, czytamy cały tekst pop‑overa i dzielimy po nowych liniach
-                            pop_text = popover_body.inner_text().replace('\xa0', ' ').strip()
-                            if pop_text:
-                                lines = [line.strip() for line in pop_text.split('\n') if line.strip()]
-                                if lines:
-                                    location = ", ".join(sorted(set(lines)))
-                except Exception as e:
-                    logger.debug(f"Nie udało się pobrać pełnej listy lokalizacji dla '{title}': {e}")
-                # --- KONIEC NOWEJ LOGIKI POBIERANIA LOKALIZACJI ---
-
-                salary = job_item.locator('[data-cy="salary ranges on the job offer listing"]').inner_text().strip()
-
-                skill_elements = job_item.locator('nfj-posting-item-tiles span').all()
-                skills_list = [el.inner_text() for el in skill_elements]
-                skills_str = ", ".join(skills_list)
-
-                date_posted = None
-                logger.debug(f"NFJ: Processing link: {link}")
-                if link:
-                    details_page = browser.new_page()
-                    try:
-                        details_page.goto(link, wait_until='domcontentloaded')
-
-                        script_selector = 'script[type="application/ld+json"]'
-                        script_handle = details_page.wait_for_selector(script_selector, state='attached', timeout=5000)
-                        if script_handle:
-                            script_content = script_handle.inner_text()
-                            parsed_json = json.loads(script_content)
-                            job_posting_data = None
-                            if isinstance(parsed_json, dict) and '@graph' in parsed_json:
-                                for item in parsed_json['@graph']:
-                                    if isinstance(item, dict) and item.get('@type') == 'JobPosting':
-                                        job_posting_data = item
-                                        break
-                            date_string = job_posting_data.get('datePosted') if job_posting_data else None
-                            logger.debug(f"NFJ: Raw datePosted from JSON-LD: {date_string}")
-                            date_posted = date_string.split('T')[0] if date_string else None
-                    except Exception as e:
-                        logger.warning(f"Nie udało się pobrać daty dla {link}: {e}")
-                    finally:
-                        details_page.close()
-
-                if not all([title, company, link, location]):
-                    continue
-
-                offer_data = {
-                    "title": title, "company": company, "location": location,
-                    "salary": salary,
-                    "skills": skills_str,
-                    "url": link,
-                    "source": "NoFluffJobs",
-                    "date_posted": date_posted,
-                }
-                results.append(offer_data)
-                logger.debug(f"NFJ: Final offer data for {link}: {{'date_posted': {offer_data.get('date_posted')}}}")
+                offer_data = _build_offer(card)
             except Exception as e:
                 logger.warning(f"Pominięto ofertę z NoFluffJobs z powodu błędu: {e}")
+                count('errors')
+                continue
+            if offer_data:
+                results.append(offer_data)
 
-        browser.close()
-        logger.info(f"Znaleziono {len(results)} ofert na NoFluffJobs.")
-        return results
\ No newline at end of file
+        if seen_urls is not None:
+            # Listing NFJ nie jest posortowany po dacie (oferty promowane są na górze),
+            # więc tylko pomijamy znane oferty, bez przerywania przy serii znanych.
+            results = list(skip_known(results, seen_urls))
+
+        # Daty publikacji pobieramy równolegle po HTTP (przeglądarka tylko awaryjnie),
+        # a każdą ofertę oddajemy od razu, gdy jej data jest znana.
+        found = 0
+        for offer_data in iter_with_dates(results, context):
+            found += 1
+            yield offer_data
+        log_stats('nofluffjobs', interception_stats)
+        logger.info(f"Znaleziono {found} ofert na NoFluffJobs.")
@@ -0,0 +1,79 @@
+from contextlib import contextmanager
+import threading
+import time
+
+# Aktywny profil jest wspólny dla całego procesu (nie dla wątku), bo strony szczegółów
+# są pobierane w wątkach puli. Worker Celery (prefork) wykonuje jedno zadanie naraz.
+_active = None
+
+
+class Profile:
+    """Czasy poszczególnych faz scrapowania oraz proste liczniki."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.phases = {}
+        self.counters = {}
+
+    def record(self, name: str, seconds: float):
+        with self._lock:
+            self.phases.setdefault(name, []).append(seconds)
+
+    def count(self, name: str, value: int = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def summary(self) -> dict:
+        """Zwięzłe podsumowanie (liczba wywołań, suma i maksimum w sekundach) dla każdej fazy."""
+        with self._lock:
+            return {
+                name: {
+                    'count': len(durations),
+                    'total': round(sum(durations), 4),
+                    'max': round(max(durations), 4),
+                }
+                for name, durations in self.phases.items()
+            }
+
+
+@contextmanager
+def profiling(profile: Profile = None):
+    """Włącza zbieranie czasów faz na czas bloku i zwraca profil."""
+    global _active
+    previous = _active
+    _active = profile or Profile()
+    try:
+        yield _active
+    finally:
+        _active = previous
+
+
+@contextmanager
+def phase(name: str):
+    """Mierzy czas bloku jako fazę `name`. Bez aktywnego profilu nic nie robi."""
+    profile = _active
+    if profile is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.record(name, time.perf_counter() - started)
+
+
+def count(name: str, value: int = 1):
+    if _active is not None:
+        _active.count(name, value)
+
+
+def merge_summaries(summaries) -> dict:
+    """Łączy podsumowania faz z kilku profili (np. z podzadań poszczególnych platform)."""
+    merged = {}
+    for summary in summaries:
+        for name, timing in (summary or {}).items():
+            current = merged.setdefault(name, {'count': 0, 'total': 0.0, 'max': 0.0})
+            current['count'] += timing['count']
+            current['total'] = round(current['total'] + timing['total'], 4)
+            current['max'] = max(current['max'], timing['max'])
+    return merged
@@ -0,0 +1,212 @@
+from contextlib import contextmanager
+from django.conf import settings
+from urllib.parse import urlparse
+import logging
+import os
+import random
+import time
+import uuid
+
+import redis
+
+from .profiling import count, phase
+
+logger = logging.getLogger(__name__)
+
+RATE_KEY_PREFIX = 'scraper:rate:'
+BROWSER_SLOTS_KEY = 'scraper:browser-slots'
+# Statusy, po których warto spróbować ponownie (przeciążenie lub chwilowy błąd serwera).
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Po błędzie połączenia przez chwilę nie próbujemy łączyć się z Redis, żeby każde
+# żądanie nie czekało na timeout połączenia.
+REDIS_RETRY_AFTER = 30
+
+_client = None
+_client_pid = None
+_unavailable_until = 0.0
+
+
+def get_redis():
+    """
+    Klient Redis (ten sam serwer co broker Celery), tworzony osobno w każdym procesie.
+    Dzięki temu limity są wspólne dla wszystkich workerów.
+    """
+    global _client, _client_pid
+    if _client is None or _client_pid != os.getpid():
+        _client = redis.Redis.from_url(settings.SCRAPER_THROTTLE_REDIS_URL, socket_timeout=2,
+                                       socket_connect_timeout=2)
+        _client_pid = os.getpid()
+    return _client
+
+
+def _redis_available() -> bool:
+    return time.monotonic() >= _unavailable_until
+
+
+def _mark_unavailable(error):
+    global _unavailable_until
+    _unavailable_until = time.monotonic() + REDIS_RETRY_AFTER
+    logger.warning(f"Redis niedostępny dla limitów scrapera ({error}), "
+                   f"przez {REDIS_RETRY_AFTER} s działam bez limitów.")
+
+
+def _redis_now(client) -> float:
+    # Czas serwera Redis, żeby workery na różnych maszynach liczyły limity według jednego zegara.
+    seconds, microseconds = client.time()
+    return seconds + microseconds / 1_000_000
+
+
+def _rate_limit(host: str):
+    """Zwraca (liczba żądań na sekundę, wielkość zrywu) dla hosta."""
+    return settings.SCRAPER_RATE_LIMITS.get(host, settings.SCRAPER_DEFAULT_RATE_LIMIT)
+
+
+def reserve(host: str, rate: float, burst: int) -> float:
+    """
+    Próbuje pobrać żeton z kubełka hosta. Zwraca 0, gdy żeton został pobrany,
+    albo liczbę sekund, po której warto spróbować ponownie.
+
+    Kubełek jest zapisany jako jedna liczba w Redis: teoretyczny czas przybycia następnego
+    żądania (GCRA). Przy `rate` żądań na sekundę kubełek mieści `burst` żetonów.
+    Odczyt i zapis są objęte WATCH/MULTI, więc równoległe workery nie pobiorą tego samego żetonu.
+    """
+    client = get_redis()
+    key = f'{RATE_KEY_PREFIX}{host}'
+    interval = 1.0 / rate
+    tolerance = interval * (burst - 1)
+    with client.pipeline() as pipe:
+        while True:
+            try:
+                pipe.watch(key)
+                now = _redis_now(pipe)
+                stored = pipe.get(key)
+                arrival = max(float(stored) if stored else now, now)
+                if arrival - tolerance > now:
+                    pipe.unwatch()
+                    return arrival - tolerance - now
+                pipe.multi()
+                pipe.set(key, arrival + interval, px=int((arrival + interval - now + tolerance) * 1000) + 1000)
+                pipe.execute()
+                return 0.0
+            except redis.WatchError:
+                continue
+
+
+def wait_for_slot(url: str):
+    """
+    Czeka, aż limit żądań dla hosta z `url` pozwoli na kolejne żądanie.
+    Gdy Redis jest niedostępny, nie blokujemy scrapowania (limit po prostu nie działa).
+    """
+    if not settings.SCRAPER_RATE_LIMIT_ENABLED:
+        return
+    host = urlparse(url).hostname or ''
+    rate, burst = _rate_limit(host)
+    if not rate or not _redis_available():
+        return
+    with phase('rate_limit_wait'):
+        while True:
+            try:
+                delay = reserve(host, rate, burst)
+            except redis.RedisError as e:
+                _mark_unavailable(e)
+                return
+            if not delay:
+                return
+            time.sleep(delay)
+
+
+def backoff_delay(attempt: int, retry_after=None) -> float:
+    """
+    Czas oczekiwania przed kolejną próbą: wykładniczy z pełnym losowym rozrzutem (full jitter),
+    żeby workery nie ponawiały żądań jednocześnie. Nagłówek Retry-After ma pierwszeństwo.
+    """
+    if retry_after is not None:
+        try:
+            return min(float(retry_after), settings.SCRAPER_RETRY_MAX_DELAY)
+        except (TypeError, ValueError):
+            pass
+    ceiling = min(settings.SCRAPER_RETRY_MAX_DELAY, settings.SCRAPER_RETRY_BASE_DELAY * 2 ** attempt)
+    return random.uniform(0, ceiling)
+
+
+def retrying(url: str, send, is_retryable):
+    """
+    Wykonuje `send()` z limitem żądań dla hosta i ponawia próbę z losowym opóźnieniem,
+    gdy wynik lub wyjątek kwalifikuje się do ponowienia.
+
+    Args:
+        send: funkcja bez argumentów wykonująca żądanie.
+        is_retryable: funkcja (wynik, wyjątek) -> (czy ponowić, wartość Retry-After albo None).
+    """
+    attempts = settings.SCRAPER_RETRY_ATTEMPTS
+    for attempt in range(attempts):
+        wait_for_slot(url)
+        result, error = None, None
+        try:
+            result = send()
+        except Exception as e:
+            error = e
+        retry, retry_after = is_retryable(result, error)
+        if not retry or attempt == attempts - 1:
+            if error is not None:
+                raise error
+            return result
+        delay = backoff_delay(attempt, retry_after)
+        count('retries')
+        logger.info(f"Ponawiam żądanie {url} za {delay:.1f} s (próba {attempt + 2}/{attempts}).")
+        with phase('retry_backoff'):
+            time.sleep(delay)
+
+
+@contextmanager
+def browser_slot():
+    """
+    Globalny (dla wszystkich workerów) limit jednocześnie pracujących przeglądarek.
+    Sloty są wpisami w posortowanym zbiorze Redis z czasem wygaśnięcia, więc slot
+    procesu, który padł, zwalnia się sam po SCRAPER_BROWSER_SLOT_TTL sekundach.
+    """
+    limit = settings.SCRAPER_BROWSER_MAX_CONCURRENCY
+    if not limit or not _redis_available():
+        yield
+        return
+
+    token = uuid.uuid4().hex
+    acquired = False
+    try:
+        with phase('browser_slot_wait'):
+            acquired = _acquire_browser_slot(token, limit)
+    except redis.RedisError as e:
+        _mark_unavailable(e)
+    try:
+        yield
+    finally:
+        if acquired:
+            try:
+                get_redis().zrem(BROWSER_SLOTS_KEY, token)
+            except redis.RedisError as e:
+                logger.warning(f"Nie udało się zwolnić slotu przeglądarki: {e}")
+
+
+def _acquire_browser_slot(token: str, limit: int) -> bool:
+    client = get_redis()
+    deadline = time.monotonic() + settings.SCRAPER_BROWSER_SLOT_WAIT
+    with client.pipeline() as pipe:
+        while True:
+            try:
+                pipe.watch(BROWSER_SLOTS_KEY)
+                now = _redis_now(pipe)
+                # Liczymy tylko niewygasłe sloty, wygasłe usuwamy przy okazji zajęcia nowego.
+                if pipe.zcount(BROWSER_SLOTS_KEY, now, '+inf') < limit:
+                    pipe.multi()
+                    pipe.zremrangebyscore(BROWSER_SLOTS_KEY, '-inf', now)
+                    pipe.zadd(BROWSER_SLOTS_KEY, {token: now + settings.SCRAPER_BROWSER_SLOT_TTL})
+                    pipe.expire(BROWSER_SLOTS_KEY, int(settings.SCRAPER_BROWSER_SLOT_TTL) + 60)
+                    pipe.execute()
+                    return True
+                pipe.unwatch()
+            except redis.WatchError:
+                continue
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"Brak wolnego slotu przeglądarki po {settings.SCRAPER_BROWSER_SLOT_WAIT} s.")
+            time.sleep(0.5)
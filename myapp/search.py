@@ -0,0 +1,152 @@
+from django.db import connection
+from django.db.models import Q
+from .locations import fold
+from .models import JobOffer
+import re
+
+# Indeks pełnotekstowy ofert (tytuł, firma, umiejętności) jest utrzymywany przez samą bazę:
+# w PostgreSQL jako generowana kolumna tsvector z indeksem GIN, w SQLite jako tabela FTS5
+# z wyzwalaczami na myapp_joboffer. Zapis ofert (także upsert w ingest) nie wymaga więc
+# dodatkowych zapytań. Tworzy go migracja 0016_offer_search_index funkcją install_search_index.
+FTS_TABLE = 'myapp_joboffer_fts'
+SEARCH_COLUMN = 'search_vector'
+# Ranking jest liczony tylko dla SEARCH_RANK_WINDOW najnowszych trafień. Ogólne słowa ('python',
+# 'developer') pasują do dziesiątek tysięcy ofert, a ocena każdej z nich kosztuje ~100 ms na 300 tys. ofert.
+SEARCH_RANK_WINDOW = 2000
+# Liczba najlepszych trafień zwracanych z indeksu - dalsze filtry działają już na tej liście.
+SEARCH_MAX_CANDIDATES = 500
+MAX_TERMS = 8
+
+_TERM_RE = re.compile(r'\w+')
+
+# Polskie litery bez rozkładu w Unicode (ł) i z rozkładem sprowadzamy do liter łacińskich,
+# tak jak locations.fold robi to z zapytaniem. W PostgreSQL translate() jest IMMUTABLE,
+# więc może być częścią kolumny generowanej (unaccent nie może).
+_POLISH_LETTERS = ('ąćęłńóśźżĄĆĘŁŃÓŚŹŻ', 'acelnoszzACELNOSZZ')
+
+
+def _pg_vector(column: str, weight: str) -> str:
+    source, target = _POLISH_LETTERS
+    return f"setweight(to_tsvector('simple', translate(coalesce({column}, ''), '{source}', '{target}')), '{weight}')"
+
+
+_POSTGRES_INSTALL = [
+    # Wagi: tytuł (A) liczy się bardziej niż firma (B) i umiejętności (C).
+    f"""
+    ALTER TABLE myapp_joboffer ADD COLUMN IF NOT EXISTS {SEARCH_COLUMN} tsvector GENERATED ALWAYS AS (
+        {_pg_vector('title', 'A')} || {_pg_vector('company', 'B')} || {_pg_vector('skills', 'C')}
+    ) STORED
+    """,
+    f"CREATE INDEX IF NOT EXISTS myapp_joboffer_search_gin ON myapp_joboffer USING GIN ({SEARCH_COLUMN})",
+]
+_POSTGRES_UNINSTALL = [
+    "DROP INDEX IF EXISTS myapp_joboffer_search_gin",
+    f"ALTER TABLE myapp_joboffer DROP COLUMN IF EXISTS {SEARCH_COLUMN}",
+]
+
+
+def _sqlite_values(row: str) -> str:
+    # 'remove_diacritics 2' usuwa znaki diakrytyczne (ó -> o), ale ł nie ma rozkładu w Unicode.
+    return ', '.join(f"replace(replace({row}.{column}, 'ł', 'l'), 'Ł', 'L')" for column in ('title', 'company', 'skills'))
+
+
+# Tabela FTS5 z zewnętrzną treścią (content=) nie kopiuje tekstu ofert, tylko indeks. Tekst trafia
+# do indeksu wyłącznie przez wyzwalacze (i przebudowę poniżej), więc 'delete' dostaje te same wartości
+# co wcześniejsze wstawienie. Wyzwalacz aktualizacji działa tylko przy zmianie indeksowanych kolumn,
+# więc odświeżanie last_seen go nie uruchamia.
+_SQLITE_INSTALL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, company, skills, content='myapp_joboffer', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_insert AFTER INSERT ON myapp_joboffer BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, company, skills) VALUES (new.id, {_sqlite_values('new')});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_delete AFTER DELETE ON myapp_joboffer BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, company, skills)
+        VALUES ('delete', old.id, {_sqlite_values('old')});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_update AFTER UPDATE OF title, company, skills ON myapp_joboffer BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, company, skills)
+        VALUES ('delete', old.id, {_sqlite_values('old')});
+        INSERT INTO {FTS_TABLE}(rowid, title, company, skills) VALUES (new.id, {_sqlite_values('new')});
+    END
+    """,
+    # Indeksuje od nowa wszystkie zapisane oferty ('rebuild' czytałby tekst bez zamiany ł).
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('delete-all')",
+    f"""
+    INSERT INTO {FTS_TABLE}(rowid, title, company, skills)
+    SELECT id, {_sqlite_values('myapp_joboffer')} FROM myapp_joboffer
+    """,
+]
+_SQLITE_UNINSTALL = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_insert",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_delete",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_update",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+
+def install_search_index(schema_editor):
+    """
+    Tworzy (lub odtwarza) indeks pełnotekstowy dla bazy z `schema_editor`. Wywołanie jest idempotentne,
+    więc można je powtórzyć np. po migracji, w której SQLite przebudował tabelę myapp_joboffer
+    (przebudowa usuwa wyzwalacze). Dla innych baz nic nie robi - wyszukiwanie użyje wtedy icontains.
+    """
+    vendor = schema_editor.connection.vendor
+    for sql in {'postgresql': _POSTGRES_INSTALL, 'sqlite': _SQLITE_INSTALL}.get(vendor, []):
+        schema_editor.execute(sql)
+
+
+def uninstall_search_index(schema_editor):
+    vendor = schema_editor.connection.vendor
+    for sql in {'postgresql': _POSTGRES_UNINSTALL, 'sqlite': _SQLITE_UNINSTALL}.get(vendor, []):
+        schema_editor.execute(sql)
+
+
+def search_terms(query: str) -> list:
+    """Słowa zapytania bez polskich znaków (jak w indeksie) i bez operatorów składni FTS."""
+    return _TERM_RE.findall(fold(query))[:MAX_TERMS]
+
+
+def search_offer_ids(query: str, limit: int = SEARCH_MAX_CANDIDATES) -> list:
+    """
+    Id ofert pasujących do wszystkich słów zapytania (każde słowo także jako prefiks),
+    od najlepiej dopasowanych spośród SEARCH_RANK_WINDOW najnowszych trafień.
+    Zapytanie korzysta wyłącznie z indeksu pełnotekstowego.
+
+    Returns:
+        list: id ofert w kolejności rankingu (najwyżej `limit`).
+    """
+    terms = search_terms(query)
+    if not terms:
+        return []
+    vendor = connection.vendor
+    if vendor == 'postgresql':
+        tsquery = ' & '.join(f'{term}:*' for term in terms)
+        sql = (f"SELECT id FROM (SELECT id, ts_rank({SEARCH_COLUMN}, query) AS score "
+               f"FROM myapp_joboffer, to_tsquery('simple', %s) AS query WHERE {SEARCH_COLUMN} @@ query "
+               f"ORDER BY id DESC LIMIT %s) AS recent ORDER BY score DESC, id DESC LIMIT %s")
+        params = [tsquery, SEARCH_RANK_WINDOW, limit]
+    elif vendor == 'sqlite':
+        # bm25 zwraca wartości ujemne (im mniejsza, tym lepsze dopasowanie); wagi kolumn jak w PostgreSQL.
+        sql = (f"SELECT rowid FROM (SELECT rowid, bm25({FTS_TABLE}, 10.0, 4.0, 2.0) AS score "
+               f"FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s ORDER BY rowid DESC LIMIT %s) "
+               f"ORDER BY score, rowid DESC LIMIT %s")
+        params = [' '.join(f'"{term}"*' for term in terms), SEARCH_RANK_WINDOW, limit]
+    else:
+        offers = JobOffer.objects.all()
+        for term in terms:
+            offers = offers.filter(Q(title__icontains=term) | Q(company__icontains=term) | Q(skills__icontains=term))
+        return list(offers.order_by('-id').values_list('id', flat=True)[:limit])
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
@@ -1,60 +1,233 @@
-from celery import shared_task
-from .models import JobOffer
+from celery import chord, shared_task
+from celery.exceptions import Ignore
+from celery.signals import worker_process_init, worker_process_shutdown
+from django.conf import settings
+from django.utils import timezone
+from .analytics import warm_reports
+from .charts import refresh_platform_chart
+from .ingest import chunked, expire_unseen, persist_offers
+from .models import JobOffer, ScrapeRun, SearchQuery
+from .progress import (PHASE_FAILED, PHASE_FINISHED, PHASE_PLATFORM_DONE, PHASE_SCRAPING, PHASE_STARTED,
+                       publish_progress)
+from .rollups import affected_technologies, refresh_daily_stats
+from .scrapers.browser import get_browser_pool, shutdown_browser_pool
 from .scrapers.justjoinit import scrape_justjoinit
 from .scrapers.nofluff import scrape_nofluffjobs
+from .scrapers.profiling import merge_summaries, profiling
 import logging
 
 # Ustawienie loggera, aby widzieć postępy w konsoli workera Celery
 logger = logging.getLogger(__name__)
 
+# Nazwy źródeł, pod którymi scrapery zapisują oferty (pole JobOffer.source).
+PLATFORM_SOURCES = {
+    'justjoinit': 'JustJoin.IT',
+    'nofluffjobs': 'NoFluffJobs',
+}
 
-@shared_task
-def scrape_jobs_task(technology, experience='all', platforms=None):
+
+@worker_process_init.connect
+def warm_up_browser(**kwargs):
+    """Uruchamia Chromium raz na proces workera, zanim przyjdzie pierwsze zadanie."""
+    if not settings.SCRAPER_BROWSER_PREWARM:
+        return
+    try:
+        get_browser_pool().start()
+    except Exception as e:
+        # Scrapery i tak uruchomią przeglądarkę leniwie przy pierwszym użyciu.
+        logger.warning(f"Nie udało się wstępnie uruchomić przeglądarki: {e}")
+
+
+@worker_process_shutdown.connect
+def close_browser(**kwargs):
+    shutdown_browser_pool()
+
+
+def _get_scraper(platform):
+    # Słownik budujemy przy wywołaniu, żeby zawsze sięgać po aktualne funkcje modułu.
+    return {
+        'justjoinit': scrape_justjoinit,
+        'nofluffjobs': scrape_nofluffjobs,
+    }[platform]
+
+
+@shared_task(bind=True)
+def scrape_jobs_task(self, technology, experience='all', platforms=None, incremental=False):
     """
     Zadanie Celery do scrapowania ofert pracy.
-    Wywołuje dedykowane scrapery i zapisuje wyniki do bazy danych.
+    Rozdziela pracę na osobne podzadania (po jednym na platformę), uruchamiane równolegle
+    jako chord Celery, i zastępuje się tym chordem. Wynik zadania (pod tym samym task_id)
+    to zbiorczy status zwrócony przez merge_scrape_results.
+
+    Oferty nie są usuwane: trafiają do zbioru wyników wyszukiwania (SearchQuery) z datą last_seen,
+    a pełne (nieprzyrostowe) uruchomienie oznacza jako wygasłe te, których portal już nie pokazuje.
+    W trybie przyrostowym (incremental=True) scrapery pomijają oferty, które już są w wynikach
+    tego wyszukiwania, i nic nie jest wygaszane.
+
+    Każde uruchomienie zapisuje wiersz ScrapeRun, uzupełniany czasami faz i licznikami w merge_scrape_results.
+    Postęp (faza, platforma, liczba ofert) jest publikowany pod task_id tego zadania (progress.publish_progress),
+    skąd strona czyta go przez Server-Sent Events.
+    """
+    platforms = [platform for platform in platforms or [] if platform in PLATFORM_SOURCES]
+    search = SearchQuery.for_params(technology, experience, platforms)
+    search.last_run_at = timezone.now()
+    search.save(update_fields=['last_run_at'])
+    run = ScrapeRun.objects.create(task_id=self.request.id or '', technology=technology, experience=experience,
+                                   platforms=platforms, incremental=incremental, search=search)
+    logger.info(f"Rozpoczynam scraping dla: {technology}, poziom: {experience}, na platformach: {platforms}"
+                f"{' (tryb przyrostowy)' if incremental else ''}")
+
+    progress_id = self.request.id or ''
+    publish_progress(progress_id, PHASE_STARTED, platforms=platforms)
+
+    if not platforms:
+        return merge_scrape_results([], technology, experience, run.pk, progress_id=progress_id)
+
+    # Podzadania same zapisują swoje oferty, więc między zadaniami przesyłamy tylko krótkie podsumowania.
+    header = [scrape_platform_task.s(platform, technology, experience, incremental, search.pk,
+                                     progress_id=progress_id)
+              for platform in platforms]
+    # Błąd podzadania, którego nie obsłużyło samo podzadanie (np. utrata workera), kończy chord bez
+    # wywołania merge_scrape_results - wtedy errback zamyka wpis ScrapeRun jako nieudany.
+    body = merge_scrape_results.s(technology, experience, run.pk, progress_id=progress_id)
+    body.on_error(mark_scrape_run_failed.s(run.pk))
+    try:
+        return self.replace(chord(header, body))
+    except Ignore:
+        # Tak replace kończy zadanie po podmianie na chord (poza trybem eager).
+        raise
+    except Exception as e:
+        _fail_run(run.pk, e)
+        raise
+
+
+@shared_task
+def scrape_platform_task(platform, technology, experience='all', incremental=False, search_id=None, progress_id=''):
+    """
+    Scrapuje jedną platformę dla jednej technologii i poziomu doświadczenia,
+    zapisując oferty do bazy paczkami po SCRAPER_PERSIST_CHUNK_SIZE w trakcie scrapowania.
+    Znalezione oferty trafiają do zbioru wyników wyszukiwania `search_id`,
+    a postęp po każdej paczce jest publikowany pod `progress_id` (task_id zadania głównego).
+
+    Returns:
+        dict: podsumowanie dla platformy (liczba znalezionych i dodanych ofert, liczba błędów,
+            ewentualny błąd przerywający scraping oraz czasy faz).
     """
-    if platforms is None:
-        platforms = []
-    logger.info(f"Rozpoczynam scraping dla: {technology}, poziom: {experience}, na platformach: {platforms}")
-    all_offers = []
-
-    # 1. Wywołaj scraper i zbierz dane
-    if 'justjoinit' in platforms:
-        all_offers.extend(scrape_justjoinit(technology, experience))
-    if 'nofluffjobs' in platforms:
-        all_offers.extend(scrape_nofluffjobs(technology, experience))
-
-    logger.info(f"Łącznie znaleziono {len(all_offers)} ofert.")
-
-    # 2. Zapisz dane do bazy danych
-    # USUŃ POPRZEDNIE WYNIKI WYSZUKIWANIA
-    deleted_count, _ = JobOffer.objects.all().delete()
-    logger.info(f"Usunięto {deleted_count} poprzednich ofert pracy.")
-
-    offers_added = 0
-    for offer_data in all_offers:
-        # Używamy update_or_create, aby unikać duplikatów na podstawie unikalnego URL
-        # Debugging: Log the offer_data before processing date_posted
-        logger.debug(f"TASK: Processing offer_data (raw): {offer_data}")
-        
-        # Kluczowe: Wyciągamy 'date_posted' ze słownika, aby Django poprawnie
-        # zinterpretowało typ danych przy aktualizacji pola DateField.
-        date_posted_value = offer_data.pop('date_posted', None)
-        logger.debug(f"TASK: Extracted date_posted_value: {date_posted_value}")
-
-        obj, created = JobOffer.objects.update_or_create(
-            url=offer_data['url'],
-            defaults={
-                **offer_data,
-                'main_technology': technology,
-                'experience_level': experience if experience != 'all' else "Nie określono",
-                'date_posted': date_posted_value,  # Jawnie przypisujemy przetworzoną datę
-            }
-        )
-        if created:
-            offers_added += 1
+    source = PLATFORM_SOURCES[platform]
+    summary = {'platform': platform, 'offers_found': 0, 'offers_added': 0, 'errors': 0, 'error': None}
+    search = SearchQuery.objects.filter(pk=search_id).first() if search_id else None
+    with profiling() as profile:
+        _scrape_platform(platform, source, technology, experience, incremental, search, summary, progress_id)
+    summary['phases'] = profile.summary()
+    summary['errors'] = profile.counters.get('errors', 0) + (1 if summary['error'] else 0)
+    publish_progress(progress_id, PHASE_PLATFORM_DONE, platform=platform, offers_found=summary['offers_found'],
+                     offers_added=summary['offers_added'], error=summary['error'])
+    return summary
+
+
+def _scrape_platform(platform, source, technology, experience, incremental, search, summary, progress_id=''):
+    """Właściwe scrapowanie jednej platformy, uzupełniające `summary` w miejscu."""
+    started = timezone.now()
+    scraper_kwargs = {}
+    if incremental:
+        # Znane oferty tego wyszukiwania: jedno zapytanie, sprawdzanie w zbiorze w pamięci.
+        known = search.active_offers() if search is not None else JobOffer.objects.all()
+        scraper_kwargs['seen_urls'] = set(known.filter(source=source).values_list('url', flat=True).iterator())
+        logger.info(f"[{platform}] W wynikach jest {len(scraper_kwargs['seen_urls'])} znanych ofert.")
+
+    try:
+        # Scraper zwraca oferty na bieżąco (generator), a my zapisujemy je paczkami.
+        offers = _get_scraper(platform)(technology, experience, **scraper_kwargs)
+        for chunk in chunked(offers, settings.SCRAPER_PERSIST_CHUNK_SIZE):
+            summary['offers_found'] += len(chunk)
+            summary['offers_added'] += persist_offers(chunk, technology, experience, search)
+            logger.info(f"[{platform}] Zapisano {summary['offers_found']} ofert (paczka {len(chunk)}).")
+            publish_progress(progress_id, PHASE_SCRAPING, platform=platform, offers_found=summary['offers_found'],
+                             offers_added=summary['offers_added'])
+    except Exception as e:
+        # Błąd jednej platformy nie może zatrzymać chordu, raportujemy go w podsumowaniu.
+        logger.exception(f"[{platform}] Scraping przerwany błędem: {e}")
+        summary['error'] = str(e)
+        return
+
+    # Wygaszamy tylko po pełnym, udanym przebiegu, który coś znalazł, dzięki czemu
+    # nieudany scraping nie zostawia pustej listy wyników.
+    if search is not None and not incremental and summary['offers_found']:
+        expired = expire_unseen(search, source, started)
+        logger.info(f"[{platform}] Oznaczono {expired} ofert jako wygasłe.")
+
+
+@shared_task
+def merge_scrape_results(summaries, technology, experience='all', run_id=None, progress_id=''):
+    """
+    Łączy podsumowania podzadań w jeden status widoczny pod task_id zadania głównego
+    i zamyka wpis ScrapeRun danego uruchomienia. Na koniec publikuje zdarzenie 'finished'
+    (już po odświeżeniu statystyk, więc strona może od razu pobrać nową listę ofert).
+    """
+    offers_found = sum(summary['offers_found'] for summary in summaries)
+    offers_added = sum(summary['offers_added'] for summary in summaries)
+    logger.info(f"Łącznie znaleziono {offers_found} ofert dla: {technology}, poziom: {experience}.")
+
+    if run_id is not None:
+        _finish_run(run_id, summaries, offers_found, offers_added)
+
+    try:
+        refresh_daily_stats(technologies=affected_technologies(technology))
+        refresh_platform_chart()
+        warm_reports()
+    except Exception as e:
+        # Statystyki można przeliczyć później komendą rebuild_offer_stats, wynik scrapowania jest ważniejszy.
+        logger.error(f"Nie udało się odświeżyć dziennych statystyk i raportów ofert: {e}")
 
     final_message = f"Scraping zakończony. Dodano {offers_added} nowych ofert."
     logger.info(final_message)
-    return final_message
+    publish_progress(progress_id, PHASE_FINISHED, message=final_message, offers_found=offers_found,
+                     offers_added=offers_added)
+    return {
+        'message': final_message,
+        'offers_found': offers_found,
+        'offers_added': offers_added,
+        'platforms': {summary['platform']: summary for summary in summaries},
+    }
+
+
+@shared_task
+def mark_scrape_run_failed(request, exc, traceback, run_id):
+    """Errback chordu scrapowania: oznacza uruchomienie jako nieudane, gdy merge_scrape_results się nie wykona."""
+    _fail_run(run_id, exc)
+
+
+def _fail_run(run_id, error):
+    logger.error(f"Uruchomienie scrapera {run_id} zakończone błędem: {error}")
+    run = ScrapeRun.objects.filter(pk=run_id, status=ScrapeRun.STATUS_RUNNING).first()
+    if run is None:
+        return
+    run.status = ScrapeRun.STATUS_FAILED
+    run.finished_at = timezone.now()
+    run.duration_seconds = round((run.finished_at - run.started_at).total_seconds(), 3)
+    run.error_count += 1
+    run.save()
+    # Strona czekająca na postęp zadania dostaje zdarzenie końcowe także wtedy, gdy merge się nie wykonał.
+    publish_progress(run.task_id, PHASE_FAILED, error=str(error))
+
+
+def _finish_run(run_id, summaries, offers_found, offers_added):
+    run = ScrapeRun.objects.filter(pk=run_id).first()
+    if run is None:
+        logger.warning(f"Nie znaleziono wpisu ScrapeRun {run_id}.")
+        return
+    failed = [summary for summary in summaries if summary.get('error')]
+    if summaries and len(failed) == len(summaries):
+        run.status = ScrapeRun.STATUS_FAILED
+    elif failed or any(summary.get('errors') for summary in summaries):
+        run.status = ScrapeRun.STATUS_PARTIAL
+    else:
+        run.status = ScrapeRun.STATUS_SUCCESS
+    run.finished_at = timezone.now()
+    run.duration_seconds = round((run.finished_at - run.started_at).total_seconds(), 3)
+    run.offers_found = offers_found
+    run.offers_added = offers_added
+    run.error_count = sum(summary.get('errors', 0) for summary in summaries)
+    run.platform_stats = {summary['platform']: summary for summary in summaries}
+    run.phase_timings = merge_summaries(summary.get('phases') for summary in summaries)
+    run.save()
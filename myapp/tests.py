@@ -1,13 +1,83 @@
-from django.test import TestCase
-from unittest.mock import patch, MagicMock
-from datetime import date
-from .tasks import scrape_jobs_task
-from .models import JobOffer
+from django.core.management import CommandError, call_command
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from unittest.mock import patch, MagicMock, PropertyMock
+from celery.backends.base import DisabledBackend
+from datetime import date, timedelta
+from django.utils import timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from decimal import Decimal
+from io import StringIO
+import csv
+import gzip
+import os
+import tempfile
+import fakeredis
+import numpy as np
+import json
+import redis
+import requests
+import threading
+from demo.celery import app as celery_app
+from .analytics import grouped_percentiles
+from .benchmarks.runner import compare_with_baseline, run_scenario
+from .benchmarks.server import FixtureServer
+from .dedup import offer_fingerprint
+from .ingest import chunked, persist_offers
+from .locations import parse_locations
+from .progress import progress_stream, publish_progress
+from .rollups import affected_technologies, refresh_daily_stats
+from .salary import parse_salary
+from .tasks import mark_scrape_run_failed, scrape_jobs_task
+from .models import (City, DailyOfferStats, JobOffer, OfferDetailCache, OfferSkill, PersonalInfo, ScrapeRun, SearchQuery,
+                     SearchResult)
+from .scrapers import cache as detail_cache
+from .scrapers.browser import BrowserPool
+from .scrapers.details import iter_with_dates, parse_date_posted
+from .scrapers.incremental import skip_known
+from .scrapers.interception import InterceptionPolicy
+from .scrapers.justjoinit import scrape_justjoinit, _build_offer as justjoinit_build_offer
+from .scrapers.nofluff import _build_offer as nofluff_build_offer
+from .scrapers import throttle
+from .scrapers.http_client import http_get
+from .scrapers.profiling import profiling
+from .skills import normalize_skill, parse_skills
 
 # Create your tests here.
 
 
-class ScraperTaskTest(TestCase):
+def make_offer(number=0, **overrides):
+    """Słownik oferty w formacie zwracanym przez scrapery; pola można nadpisać argumentami."""
+    return {
+        "title": f"Offer {number}", "company": "TestCorp", "location": "Kraków, Remote", "salary": "Nie podano",
+        "skills": "Python, Django", "url": f"https://justjoin.it/offers/{number}", "source": "JustJoin.IT",
+        "date_posted": "2025-10-01", **overrides,
+    }
+
+
+class EagerCeleryMixin:
+    """
+    Zadanie główne rozdziela pracę na chord podzadań. W trybie synchronicznym (.apply())
+    Celery łączy wyniki grupy przez backend wyników, więc w testach zamiast Redisa
+    używamy backendu, który czyta wyniki bezpośrednio z wykonanych lokalnie zadań.
+    Postęp zadań trafia do fakeredis (self.progress_server) zamiast do prawdziwego Redisa.
+    """
+
+    def setUp(self):
+        super().setUp()
+        patcher = patch.object(type(celery_app), 'backend', new_callable=PropertyMock,
+                               return_value=DisabledBackend(celery_app))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.progress_server = fakeredis.FakeServer()
+        progress_patcher = patch('myapp.progress.get_redis',
+                                 return_value=fakeredis.FakeRedis(server=self.progress_server))
+        progress_patcher.start()
+        self.addCleanup(progress_patcher.stop)
+
+
+class ScraperTaskTest(EagerCeleryMixin, TestCase):
 
     # Używamy @patch, aby "zaślepić" (zamienić na atrapy) nasze funkcje scrapujące.
     # Dzięki temu test nie będzie łączył się z prawdziwymi stronami internetowymi.
@@ -63,3 +133,1207 @@ class ScraperTaskTest(TestCase):
 
         offer2 = JobOffer.objects.get(url="https://nofluffjobs.com/pl/job/test2")
         self.assertEqual(offer2.source, "NoFluffJobs")
+
+
+class BrowserPoolTest(TestCase):
+
+    def _make_pool(self, mock_sync_playwright, **kwargs):
+        playwright = mock_sync_playwright.return_value.start.return_value
+        playwright.chromium.launch.side_effect = lambda **kw: MagicMock()
+        return BrowserPool(**kwargs), playwright
+
+    @patch('myapp.scrapers.browser.sync_playwright')
+    def test_browser_is_launched_once_and_reused(self, mock_sync_playwright):
+        """Kolejne konteksty korzystają z tej samej, raz uruchomionej przeglądarki."""
+        pool, playwright = self._make_pool(mock_sync_playwright, max_pages=100, max_rss_mb=0)
+
+        with pool.context():
+            pass
+        with pool.context():
+            pass
+
+        self.assertEqual(playwright.chromium.launch.call_count, 1)
+        self.assertEqual(pool.stats['launches'], 1)
+
+    @patch('myapp.scrapers.browser.sync_playwright')
+    def test_browser_is_recycled_after_page_limit(self, mock_sync_playwright):
+        """Po przekroczeniu limitu stron przeglądarka jest zamykana i uruchamiana ponownie."""
+        pool, playwright = self._make_pool(mock_sync_playwright, max_pages=2, max_rss_mb=0)
+
+        with pool.context() as context:
+            first_browser = pool._browser
+            # Symulujemy otwarcie dwóch stron w kontekście.
+            page_handler = context.on.call_args[0][1]
+            page_handler(MagicMock())
+            page_handler(MagicMock())
+
+        with pool.context():
+            pass
+
+        first_browser.close.assert_called_once()
+        self.assertEqual(playwright.chromium.launch.call_count, 2)
+        self.assertEqual(pool.stats['recycles'], 1)
+
+    @patch('myapp.scrapers.browser._process_tree_rss_mb', return_value=2048)
+    @patch('myapp.scrapers.browser.sync_playwright')
+    def test_browser_is_recycled_after_rss_limit(self, mock_sync_playwright, mock_rss):
+        pool, playwright = self._make_pool(mock_sync_playwright, max_pages=0, max_rss_mb=1024)
+
+        with pool.context() as context:
+            context.on.call_args[0][1](MagicMock())
+        with pool.context():
+            pass
+
+        self.assertEqual(pool.stats['recycles'], 1)
+
+
+class DetailFetchTest(TestCase):
+
+    JJIT_HTML = (
+        '<html><head><script type="application/ld+json">'
+        '[{"@type": "JobPosting", "datePosted": "2025-10-08T10:00:00Z"}]'
+        '</script></head></html>'
+    )
+    NFJ_HTML = (
+        '<html><head><script type="application/ld+json">'
+        '{"@graph": [{"@type": "Organization"}, {"@type": "JobPosting", "datePosted": "2025-10-07"}]}'
+        '</script></head></html>'
+    )
+
+    def test_parse_date_posted_handles_both_platforms(self):
+        self.assertEqual(parse_date_posted(self.JJIT_HTML), (True, "2025-10-08"))
+        self.assertEqual(parse_date_posted(self.NFJ_HTML), (True, "2025-10-07"))
+        self.assertEqual(parse_date_posted("<html></html>"), (False, None))
+
+    @patch('myapp.scrapers.details.browser_date_posted', return_value="2025-10-01")
+    @patch('myapp.scrapers.http_client.get_session')
+    def test_iter_with_dates_falls_back_to_browser_without_json_ld(self, mock_get_session, mock_browser):
+        """Przeglądarka jest używana tylko dla stron, w których nie ma JSON-LD."""
+        pages = {
+            "https://justjoin.it/job-offer/a": self.JJIT_HTML,
+            "https://justjoin.it/job-offer/b": "<html></html>",
+        }
+        mock_get_session.return_value.get.side_effect = lambda url, **kwargs: MagicMock(
+            ok=True, status_code=200, text=pages[url], headers={})
+        offers = [{"url": url, "date_posted": None} for url in pages]
+        context = MagicMock()
+
+        list(iter_with_dates(offers, context))
+
+        self.assertEqual(offers[0]["date_posted"], "2025-10-08")
+        self.assertEqual(offers[1]["date_posted"], "2025-10-01")
+        mock_browser.assert_called_once_with(context, "https://justjoin.it/job-offer/b")
+
+    @patch('myapp.scrapers.http_client.get_session')
+    def test_fresh_cache_entries_skip_detail_fetch(self, mock_get_session):
+        now = timezone.now()
+        OfferDetailCache.objects.create(url="https://justjoin.it/job-offer/a", date_posted=date(2025, 10, 8),
+                                        fetched_at=now, last_used=now)
+        offers = [{"url": "https://justjoin.it/job-offer/a", "date_posted": None}]
+
+        list(iter_with_dates(offers, MagicMock()))
+
+        self.assertEqual(offers[0]["date_posted"], "2025-10-08")
+        mock_get_session.return_value.get.assert_not_called()
+
+    @patch('myapp.scrapers.http_client.get_session')
+    def test_known_duplicates_skip_detail_fetch(self, mock_get_session):
+        persist_offers([{"title": "Senior Python Developer", "company": "Acme Sp. z o.o.", "location": "Kraków",
+                         "salary": None, "skills": "", "url": "https://nofluffjobs.com/pl/job/acme-python",
+                         "source": "NoFluffJobs", "date_posted": "2025-10-05"}], 'python', 'all')
+        offers = [{"url": "https://justjoin.it/job-offer/acme-python", "title": "Senior Python Developer",
+                   "company": "ACME", "location": "Kraków", "date_posted": None}]
+
+        list(iter_with_dates(offers, MagicMock()))
+
+        self.assertEqual(offers[0]["date_posted"], "2025-10-05")
+        mock_get_session.return_value.get.assert_not_called()
+
+    @patch('myapp.scrapers.http_client.get_session')
+    def test_stale_cache_entries_are_revalidated(self, mock_get_session):
+        """Nieświeży wpis jest potwierdzany żądaniem warunkowym, a 304 zachowuje zapisaną datę."""
+        stale = timezone.now() - timedelta(days=365)
+        OfferDetailCache.objects.create(url="https://justjoin.it/job-offer/a", date_posted=date(2025, 10, 8),
+                                        etag='"v1"', fetched_at=stale, last_used=stale)
+        mock_get_session.return_value.get.return_value = MagicMock(ok=False, status_code=304, headers={})
+        offers = [{"url": "https://justjoin.it/job-offer/a", "date_posted": None}]
+
+        list(iter_with_dates(offers, MagicMock()))
+
+        self.assertEqual(offers[0]["date_posted"], "2025-10-08")
+        sent_headers = mock_get_session.return_value.get.call_args.kwargs['headers']
+        self.assertEqual(sent_headers['If-None-Match'], '"v1"')
+        self.assertGreater(OfferDetailCache.objects.get().fetched_at, stale)
+
+    @override_settings(SCRAPER_DETAIL_CACHE_MAX_ENTRIES=2)
+    def test_cache_evicts_least_recently_used_entries(self):
+        now = timezone.now()
+        for days_ago in (3, 2, 1):
+            OfferDetailCache.objects.create(url=f"https://justjoin.it/job-offer/{days_ago}",
+                                            fetched_at=now, last_used=now - timedelta(days=days_ago))
+
+        detail_cache.evict()
+
+        self.assertEqual(sorted(OfferDetailCache.objects.values_list('url', flat=True)),
+                         ["https://justjoin.it/job-offer/1", "https://justjoin.it/job-offer/2"])
+
+
+class ListingExtractionTest(TestCase):
+
+    def test_justjoinit_card_merges_tooltip_locations_and_filters_badges(self):
+        offer = justjoinit_build_offer({
+            "href": "/job-offer/testcorp-python",
+            "title": "Python Developer",
+            "company": "TestCorp",
+            "location": "Warszawa, Mokotów",
+            "tooltip_locations": ["Kraków, Stare Miasto", "Gdańsk"],
+            "salary": "15 000 - 20 000 PLN",
+            "skills": ["Python", "new", "Django", "3d left"],
+        })
+        self.assertEqual(offer["url"], "https://justjoin.it/job-offer/testcorp-python")
+        self.assertEqual(offer["location"], "Gdańsk, Kraków, Warszawa")
+        self.assertEqual(offer["skills"], "Python, Django")
+
+    def test_nofluff_card_uses_popover_locations(self):
+        offer = nofluff_build_offer({
+            "href": "/pl/job/python-testcorp",
+            "title": "Python Developer NOWA",
+            "company": "TestCorp",
+            "location": "Zdalnie +2",
+            "popover_locations": ["Zdalnie", "Wrocław", "Poznań"],
+            "salary": "10 000 – 15 000 PLN",
+            "skills": ["Python"],
+        })
+        self.assertEqual(offer["title"], "Python Developer")
+        self.assertEqual(offer["location"], "Poznań, Wrocław, Zdalnie")
+
+    def test_card_without_required_fields_is_skipped(self):
+        self.assertIsNone(justjoinit_build_offer({"href": "/job-offer/x", "title": "X"}))
+
+    @patch('myapp.scrapers.justjoinit.iter_with_dates', side_effect=lambda offers, context: iter(offers))
+    @patch('myapp.scrapers.justjoinit.get_browser_pool')
+    def test_listing_is_extracted_with_a_single_evaluate_call(self, mock_get_pool, mock_iter_with_dates):
+        context = mock_get_pool.return_value.context.return_value.__enter__.return_value
+        page = context.new_page.return_value
+        page.evaluate.return_value = [
+            {"href": f"/job-offer/offer-{i}", "title": f"Offer {i}", "company": "TestCorp",
+             "location": "Remote", "tooltip_locations": [], "salary": None, "skills": []}
+            for i in range(3)
+        ]
+
+        offers = list(scrape_justjoinit('python', 'junior'))
+
+        self.assertEqual(len(offers), 3)
+        page.evaluate.assert_called_once()
+        page.locator.return_value.all.assert_not_called()
+
+
+class _JustJoinApiHandler(BaseHTTPRequestHandler):
+    """Lokalny serwer z fikcyjnym API JustJoin.it, zwracający dwie strony ofert."""
+
+    pages = {
+        '1': {
+            "data": [{
+                "slug": "testcorp-python-developer",
+                "title": "Python Developer",
+                "companyName": "TestCorp",
+                "city": "Warszawa",
+                "multilocation": [{"city": "Warszawa"}, {"city": "Kraków"}],
+                "workplaceType": "hybrid",
+                "employmentTypes": [{"from": 15000, "to": 20000, "currency": "pln", "unit": "month"}],
+                "requiredSkills": ["Python", "Django"],
+                "publishedAt": "2025-10-08T10:00:00.000Z",
+            }],
+            "meta": {"page": 1, "nextPage": 2},
+        },
+        '2': {
+            "data": [{
+                "slug": "othercorp-backend",
+                "title": "Backend Engineer",
+                "companyName": "OtherCorp",
+                "city": "Gdańsk",
+                "workplaceType": "remote",
+                "employmentTypes": [{"from": None, "to": None}],
+                "requiredSkills": ["Python"],
+                "publishedAt": "2025-10-07T08:00:00.000Z",
+            }],
+            "meta": {"page": 2, "nextPage": None},
+        },
+    }
+    requests_seen = []
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        self.requests_seen.append(query)
+        body = json.dumps(self.pages[query['page'][0]]).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class JustJoinApiModeTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), _JustJoinApiHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    @patch('myapp.scrapers.justjoinit.get_browser_pool')
+    def test_api_mode_follows_pagination_without_browser(self, mock_get_pool):
+        api_url = f"http://127.0.0.1:{self.server.server_port}/offers"
+        _JustJoinApiHandler.requests_seen = []
+
+        with override_settings(SCRAPER_JJIT_API_URL=api_url):
+            offers = list(scrape_justjoinit('python', 'junior', mode='api'))
+
+        mock_get_pool.assert_not_called()
+        self.assertEqual([offer["url"] for offer in offers], [
+            "https://justjoin.it/job-offer/testcorp-python-developer",
+            "https://justjoin.it/job-offer/othercorp-backend",
+        ])
+        self.assertEqual(offers[0]["location"], "Kraków, Warszawa")
+        self.assertEqual(offers[0]["salary"], "15 000 - 20 000 PLN/month")
+        self.assertEqual(offers[0]["date_posted"], "2025-10-08")
+        self.assertEqual(offers[1]["location"], "Gdańsk, Remote")
+        self.assertEqual(offers[1]["salary"], "Nie podano")
+        self.assertEqual(_JustJoinApiHandler.requests_seen[0]['categories[]'], ['python'])
+        self.assertEqual(_JustJoinApiHandler.requests_seen[0]['experienceLevels[]'], ['junior'])
+
+
+class InterceptionPolicyTest(TestCase):
+
+    def test_block_reason_by_resource_type_and_domain(self):
+        policy = InterceptionPolicy(blocked_resource_types={'image'}, blocked_domains={'google-analytics.com'})
+        self.assertEqual(policy.block_reason('image', 'https://justjoin.it/logo.png'), 'image')
+        self.assertEqual(policy.block_reason('script', 'https://www.google-analytics.com/analytics.js'), 'domain')
+        self.assertIsNone(policy.block_reason('document', 'https://justjoin.it/job-offers'))
+
+    def test_allowed_domains_block_everything_else(self):
+        policy = InterceptionPolicy(allowed_domains={'nofluffjobs.com'})
+        self.assertIsNone(policy.block_reason('script', 'https://static.nofluffjobs.com/app.js'))
+        self.assertEqual(policy.block_reason('script', 'https://cdn.example.com/app.js'), 'domain')
+
+    def test_installed_policy_aborts_requests_and_counts_them(self):
+        policy = InterceptionPolicy(blocked_resource_types={'font'})
+        context = MagicMock()
+        stats = policy.install(context)
+        handle_route = context.route.call_args[0][1]
+        count_response = context.on.call_args[0][1]
+
+        blocked_route, allowed_route = MagicMock(), MagicMock()
+        handle_route(blocked_route, MagicMock(resource_type='font', url='https://justjoin.it/font.woff2'))
+        handle_route(allowed_route, MagicMock(resource_type='document', url='https://justjoin.it/'))
+        count_response(MagicMock(headers={'content-length': '2048'}))
+
+        blocked_route.abort.assert_called_once()
+        allowed_route.continue_.assert_called_once()
+        self.assertEqual(stats['blocked_requests'], 1)
+        self.assertEqual(stats['blocked_by_reason'], {'font': 1})
+        self.assertEqual(stats['allowed_bytes'], 2048)
+
+
+class IncrementalScrapingTest(EagerCeleryMixin, TestCase):
+
+    def test_skip_known_stops_after_a_run_of_known_offers(self):
+        offers = [{"url": url} for url in ["new-1", "known-1", "new-2", "known-2", "known-3", "new-3"]]
+        seen = {"known-1", "known-2", "known-3"}
+
+        result = list(skip_known(iter(offers), seen, stop_after=2))
+
+        self.assertEqual([offer["url"] for offer in result], ["new-1", "new-2"])
+
+    @patch('myapp.tasks.scrape_nofluffjobs')
+    @patch('myapp.tasks.scrape_justjoinit')
+    def test_incremental_task_keeps_offers_and_passes_seen_urls(self, mock_scrape_justjoinit, mock_scrape_nofluffjobs):
+        old = JobOffer.objects.create(title="Old", company="TestCorp", url="https://justjoin.it/offers/old",
+                                      source="JustJoin.IT")
+        SearchResult.objects.create(search=SearchQuery.for_params('python', 'all', ['justjoinit']), offer=old,
+                                    last_seen=timezone.now())
+        mock_scrape_justjoinit.return_value = [{
+            "title": "New", "company": "TestCorp", "location": "Remote", "salary": "Nie podano",
+            "skills": "Python", "url": "https://justjoin.it/offers/new", "source": "JustJoin.IT",
+            "date_posted": None,
+        }]
+
+        scrape_jobs_task.s('python', 'all', ['justjoinit'], True).apply()
+
+        self.assertEqual(JobOffer.objects.count(), 2)
+        seen_urls = mock_scrape_justjoinit.call_args.kwargs['seen_urls']
+        self.assertEqual(seen_urls, {"https://justjoin.it/offers/old"})
+        mock_scrape_nofluffjobs.assert_not_called()
+
+
+class StreamingPersistenceTest(EagerCeleryMixin, TestCase):
+
+    @override_settings(SCRAPER_PERSIST_CHUNK_SIZE=2)
+    @patch('myapp.tasks.scrape_justjoinit')
+    def test_offers_are_persisted_in_chunks_while_scraping(self, mock_scrape_justjoinit):
+        """Oferty zapisane przed awarią scrapera zostają w bazie."""
+        def failing_scraper(technology, experience):
+            for number in range(3):
+                yield make_offer(number)
+            # Po zapisaniu pierwszej paczki baza zawiera już jej oferty.
+            assert JobOffer.objects.count() == 2
+            raise RuntimeError("scraper crashed")
+
+        mock_scrape_justjoinit.side_effect = failing_scraper
+
+        result = scrape_jobs_task.s('python', 'all', ['justjoinit']).apply()
+
+        self.assertEqual(result.result['platforms']['justjoinit']['error'], "scraper crashed")
+        self.assertEqual(JobOffer.objects.count(), 2)
+
+    def test_chunked_splits_generators(self):
+        self.assertEqual(list(chunked(iter(range(5)), 2)), [[0, 1], [2, 3], [4]])
+
+
+class ScrapeFanOutTest(EagerCeleryMixin, TestCase):
+
+    @patch('myapp.tasks.scrape_nofluffjobs')
+    @patch('myapp.tasks.scrape_justjoinit')
+    def test_platforms_run_as_subtasks_with_one_aggregated_status(self, mock_scrape_justjoinit,
+                                                                  mock_scrape_nofluffjobs):
+        mock_scrape_justjoinit.return_value = [make_offer(1)]
+        mock_scrape_nofluffjobs.side_effect = RuntimeError("NFJ down")
+
+        result = scrape_jobs_task.s('python', 'all', ['justjoinit', 'nofluffjobs']).apply()
+
+        status = result.result
+        self.assertEqual(status['offers_added'], 1)
+        self.assertEqual(status['platforms']['justjoinit']['offers_found'], 1)
+        self.assertEqual(status['platforms']['nofluffjobs']['error'], "NFJ down")
+        self.assertEqual(status['message'], "Scraping zakończony. Dodano 1 nowych ofert.")
+
+    @patch('myapp.tasks.scrape_justjoinit')
+    def test_offers_of_other_searches_are_kept(self, mock_scrape_justjoinit):
+        JobOffer.objects.create(title="Old NFJ", company="TestCorp", url="https://nofluffjobs.com/pl/job/old",
+                                source="NoFluffJobs")
+        mock_scrape_justjoinit.return_value = [make_offer(1)]
+
+        scrape_jobs_task.s('python', 'all', ['justjoinit']).apply()
+
+        self.assertEqual(JobOffer.objects.count(), 2)
+        search = SearchQuery.objects.get()
+        self.assertEqual(list(search.active_offers().values_list('source', flat=True)), ["JustJoin.IT"])
+
+
+class ScraperBenchmarkTest(TestCase):
+
+    def test_api_scenario_runs_against_fixture_server_and_rolls_back(self):
+        with FixtureServer(offers=30) as server:
+            result = run_scenario('justjoinit-api', server)
+
+        self.assertEqual(result['offers'], 30)
+        self.assertEqual(result['browser_pages'], 0)
+        self.assertEqual(result['requests'], {'justjoinit_api': 1})
+        self.assertIn('listing_extraction', result['phases'])
+        self.assertEqual(result['phases']['db_write']['count'], 2)
+        self.assertGreater(result['peak_rss_mb'], 0)
+        self.assertFalse(JobOffer.objects.exists())
+
+    @override_settings(SCRAPER_DETAIL_CACHE_ENABLED=False)
+    def test_fixture_detail_pages_resolve_over_http_except_client_side_json_ld(self):
+        context = MagicMock()
+        with FixtureServer(offers=20) as server, profiling() as profile:
+            offers = [{'url': f"{server.url}/pl/job/{offer['slug']}", 'date_posted': None}
+                      for offer in server.renderer.offers]
+            dated = {offer['url']: offer['date_posted'] for offer in iter_with_dates(offers, context)}
+
+        # Oferty 9 i 19 dokładają JSON-LD dopiero skryptem, więc trafiają do przeglądarki.
+        self.assertEqual(context.new_page.call_count, 2)
+        self.assertEqual(dated[offers[0]['url']], '2025-10-15')
+        self.assertEqual(sum(1 for value in dated.values() if value), 18)
+        self.assertEqual(profile.summary()['detail_fetch']['count'], 20)
+
+    def test_compare_with_baseline_reports_regressions(self):
+        baseline = {'nofluffjobs-browser': {'offers': 40, 'offers_per_sec': 10.0, 'peak_rss_mb': 400.0,
+                                            'browser_pages': 5}}
+        within = {'scenario': 'nofluffjobs-browser', 'offers': 40, 'offers_per_sec': 8.0,
+                  'peak_rss_mb': 480.0, 'browser_pages': 5}
+        slower = {**within, 'offers': 38, 'offers_per_sec': 7.0, 'peak_rss_mb': 520.0, 'browser_pages': 9}
+
+        self.assertEqual(compare_with_baseline([within], baseline, tolerance=0.25), [])
+        self.assertEqual(len(compare_with_baseline([slower], baseline, tolerance=0.25)), 4)
+        self.assertEqual(compare_with_baseline([{**slower, 'scenario': 'justjoinit-api'}], baseline), [])
+
+
+class ScrapeRunHistoryTest(EagerCeleryMixin, TestCase):
+
+    @patch('myapp.tasks.scrape_nofluffjobs')
+    @patch('myapp.tasks.scrape_justjoinit')
+    def test_run_records_counts_errors_and_phase_timings(self, mock_scrape_justjoinit, mock_scrape_nofluffjobs):
+        mock_scrape_justjoinit.return_value = [make_offer(1), make_offer(2)]
+        mock_scrape_nofluffjobs.side_effect = RuntimeError("NFJ down")
+
+        scrape_jobs_task.s('python', 'junior', ['justjoinit', 'nofluffjobs']).apply()
+
+        run = ScrapeRun.objects.get()
+        self.assertEqual(run.status, ScrapeRun.STATUS_PARTIAL)
+        self.assertEqual((run.offers_found, run.offers_added, run.error_count), (2, 2, 1))
+        self.assertEqual(run.platform_stats['nofluffjobs']['error'], "NFJ down")
+        self.assertEqual(run.platform_stats['justjoinit']['errors'], 0)
+        # Zapis jednej paczki i wygaszenie niewidzianych ofert.
+        self.assertEqual(run.phase_timings['db_write']['count'], 2)
+        self.assertIsNotNone(run.duration_seconds)
+
+    def test_trends_endpoint_returns_finished_runs_oldest_first(self):
+        ScrapeRun.objects.create(technology='python', status=ScrapeRun.STATUS_RUNNING)
+        first = ScrapeRun.objects.create(technology='python', status=ScrapeRun.STATUS_SUCCESS, offers_found=5,
+                                         phase_timings={'navigation': {'count': 1, 'total': 1.5, 'max': 1.5}})
+        second = ScrapeRun.objects.create(technology='python', status=ScrapeRun.STATUS_SUCCESS, offers_found=7,
+                                          phase_timings={'db_write': {'count': 2, 'total': 0.2, 'max': 0.1}})
+        ScrapeRun.objects.create(technology='java', status=ScrapeRun.STATUS_SUCCESS)
+
+        response = self.client.get('/job-scraper/api/scrape-runs/', {'technology': 'python'})
+
+        payload = response.json()
+        self.assertEqual(payload['phases'], ['db_write', 'navigation'])
+        self.assertEqual([run['id'] for run in payload['runs']], [first.pk, second.pk])
+        self.assertEqual(payload['runs'][0]['phases'], {'db_write': 0, 'navigation': 1.5})
+
+    @patch('myapp.tasks.chord', side_effect=RuntimeError("broker down"))
+    def test_run_is_failed_when_chord_cannot_be_dispatched(self, mock_chord):
+        result = scrape_jobs_task.s('python', 'junior', ['justjoinit']).apply()
+
+        self.assertIsInstance(result.result, RuntimeError)
+        run = ScrapeRun.objects.get()
+        self.assertEqual((run.status, run.error_count), (ScrapeRun.STATUS_FAILED, 1))
+        self.assertIsNotNone(run.finished_at)
+
+    def test_chord_errback_fails_only_running_runs(self):
+        running = ScrapeRun.objects.create(technology='python')
+        finished = ScrapeRun.objects.create(technology='python', status=ScrapeRun.STATUS_SUCCESS)
+
+        mark_scrape_run_failed(None, RuntimeError("worker lost"), None, running.pk)
+        mark_scrape_run_failed(None, RuntimeError("worker lost"), None, finished.pk)
+
+        running.refresh_from_db()
+        finished.refresh_from_db()
+        self.assertEqual(running.status, ScrapeRun.STATUS_FAILED)
+        self.assertEqual(finished.status, ScrapeRun.STATUS_SUCCESS)
+
+
+class OfferSkillTest(TestCase):
+
+    def test_aliases_and_case_are_folded(self):
+        self.assertEqual(normalize_skill(' js '), ('javascript', 'JavaScript'))
+        self.assertEqual(normalize_skill('Postgres'), ('postgresql', 'PostgreSQL'))
+        self.assertEqual(normalize_skill('Apache  Kafka'), ('apache kafka', 'Apache Kafka'))
+        self.assertIsNone(normalize_skill('  '))
+        self.assertEqual(parse_skills('Python, python3, K8s,, Kubernetes'),
+                         [('python', 'Python'), ('kubernetes', 'Kubernetes')])
+
+    def test_ingest_links_skills_and_replaces_them_on_update(self):
+        persist_offers([make_offer(1, skills="Python, JS"), make_offer(2, skills="python, Docker")], 'python', 'all')
+        self.assertEqual(OfferSkill.objects.count(), 3)
+        self.assertEqual(OfferSkill.objects.get(key='python').offers.count(), 2)
+
+        persist_offers([make_offer(1, skills="Go")], 'python', 'all')
+        offer = JobOffer.objects.get(url="https://justjoin.it/offers/1")
+        self.assertEqual(list(offer.skill_tags.values_list('name', flat=True)), ['Go'])
+
+    def test_skills_endpoint_counts_in_one_query(self):
+        persist_offers([make_offer(1, skills="Python, Django"), make_offer(2, skills="Python, Docker"),
+                        make_offer(3, skills="Python, Django, JS")], 'python', 'all')
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/job-scraper/api/skills/', {'technology': 'python'})
+        self.assertEqual(response.json(), {'labels': ['Python', 'Django', 'Docker', 'JavaScript'],
+                                           'data': [3, 2, 1, 1]})
+
+        response = self.client.get('/job-scraper/api/skills/', {'skill': 'django', 'limit': 2})
+        self.assertEqual(response.json(), {'labels': ['Django', 'Python'], 'data': [2, 2]})
+
+
+@override_settings(SCRAPER_RATE_LIMIT_ENABLED=True, SCRAPER_RETRY_ATTEMPTS=3, SCRAPER_RETRY_BASE_DELAY=1,
+                   SCRAPER_RETRY_MAX_DELAY=30, SCRAPER_BROWSER_MAX_CONCURRENCY=1,
+                   SCRAPER_BROWSER_SLOT_TTL=60, SCRAPER_BROWSER_SLOT_WAIT=0)
+class ThrottleTest(TestCase):
+
+    def setUp(self):
+        self.redis = fakeredis.FakeRedis()
+        patcher = patch('myapp.scrapers.throttle.get_redis', return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        throttle._unavailable_until = 0.0
+        self.addCleanup(setattr, throttle, '_unavailable_until', 0.0)
+
+    def test_token_bucket_allows_burst_then_asks_to_wait(self):
+        delays = [throttle.reserve('justjoin.it', rate=10, burst=3) for _ in range(4)]
+
+        self.assertEqual(delays[:3], [0.0, 0.0, 0.0])
+        self.assertAlmostEqual(delays[3], 0.1, delta=0.02)
+        # Kubełki są niezależne dla każdego hosta.
+        self.assertEqual(throttle.reserve('nofluffjobs.com', rate=10, burst=3), 0.0)
+
+    def test_browser_slots_are_capped_and_released(self):
+        with throttle.browser_slot():
+            with self.assertRaises(TimeoutError):
+                with throttle.browser_slot():
+                    pass
+        with throttle.browser_slot():
+            self.assertEqual(self.redis.zcard(throttle.BROWSER_SLOTS_KEY), 1)
+
+    def test_expired_slot_of_dead_worker_does_not_block(self):
+        self.redis.zadd(throttle.BROWSER_SLOTS_KEY, {'dead-worker': 1})
+
+        with throttle.browser_slot():
+            self.assertIsNone(self.redis.zscore(throttle.BROWSER_SLOTS_KEY, 'dead-worker'))
+            self.assertEqual(self.redis.zcard(throttle.BROWSER_SLOTS_KEY), 1)
+
+    @patch('myapp.scrapers.throttle.time.sleep')
+    @patch('myapp.scrapers.http_client.get_session')
+    def test_http_get_retries_throttled_responses_with_backoff(self, mock_get_session, mock_sleep):
+        mock_get_session.return_value.get.side_effect = [
+            MagicMock(status_code=429, headers={'Retry-After': '2'}),
+            MagicMock(status_code=503, headers={}),
+            MagicMock(status_code=200, headers={}),
+        ]
+
+        response = http_get('https://justjoin.it/job-offer/x')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(mock_get_session.return_value.get.call_count, 3)
+        first_delay, second_delay = (call.args[0] for call in mock_sleep.call_args_list)
+        self.assertEqual(first_delay, 2.0)
+        self.assertLessEqual(second_delay, 2.0)
+
+    @patch('myapp.scrapers.throttle.time.sleep')
+    @patch('myapp.scrapers.http_client.get_session')
+    def test_http_get_gives_up_after_last_attempt(self, mock_get_session, mock_sleep):
+        mock_get_session.return_value.get.side_effect = requests.Timeout("timed out")
+
+        with self.assertRaises(requests.Timeout):
+            http_get('https://nofluffjobs.com/pl/job/x')
+        self.assertEqual(mock_get_session.return_value.get.call_count, 3)
+
+    def test_limits_fail_open_when_redis_is_down(self):
+        broken = MagicMock()
+        broken.pipeline.side_effect = redis.ConnectionError("connection refused")
+        with patch('myapp.scrapers.throttle.get_redis', return_value=broken):
+            throttle.wait_for_slot('https://justjoin.it/job-offers')
+            with throttle.browser_slot():
+                pass
+        # Po błędzie przez chwilę w ogóle nie próbujemy łączyć się z Redis.
+        self.assertEqual(broken.pipeline.call_count, 1)
+
+
+class BulkUpsertTest(TestCase):
+
+    def test_query_count_does_not_grow_with_offer_count(self):
+        # Wewnątrz SAVEPOINT: odczyt skrótów, upsert ofert, odczyt id, po 4 zapytania o umiejętności i miasta
+        # oraz 4 o duplikaty (pasy LSH: usunięcie, zapis, wyszukanie kandydatów; zapis ofert kanonicznych).
+        with self.assertNumQueries(17):
+            self.assertEqual(persist_offers([make_offer(number) for number in range(40)], 'python', 'all'), 40)
+
+        self.assertEqual(JobOffer.objects.count(), 40)
+        self.assertEqual(JobOffer.objects.get(url="https://justjoin.it/offers/7").date_posted, date(2025, 10, 1))
+        self.assertEqual(OfferSkill.objects.get(key='django').offers.count(), 40)
+
+    def test_unchanged_offers_skip_the_write(self):
+        persist_offers([make_offer(number) for number in range(50)], 'python', 'all')
+
+        # SAVEPOINT, odczyt skrótów, odświeżenie last_seen, RELEASE SAVEPOINT - bez zapisu treści ofert.
+        with self.assertNumQueries(4):
+            self.assertEqual(persist_offers([make_offer(number) for number in range(50)], 'python', 'all'), 0)
+
+    def test_changed_offers_are_updated_in_place(self):
+        persist_offers([make_offer(number) for number in range(3)], 'python', 'all')
+        first_scraped = JobOffer.objects.get(url="https://justjoin.it/offers/1").scraped_date
+
+        added = persist_offers([make_offer(number, salary="20 000 PLN") for number in range(4)], 'python', 'senior')
+
+        self.assertEqual(added, 1)
+        offer = JobOffer.objects.get(url="https://justjoin.it/offers/1")
+        self.assertEqual((offer.salary, offer.experience_level), ("20 000 PLN", 'senior'))
+        self.assertEqual(offer.scraped_date, first_scraped)
+
+
+class SearchResultSetTest(EagerCeleryMixin, TestCase):
+
+    @patch('myapp.tasks.scrape_justjoinit')
+    def test_full_run_soft_expires_offers_that_disappeared(self, mock_scrape_justjoinit):
+        mock_scrape_justjoinit.return_value = [make_offer(1), make_offer(2)]
+        scrape_jobs_task.s('python', 'all', ['justjoinit']).apply()
+
+        mock_scrape_justjoinit.return_value = [make_offer(2), make_offer(3)]
+        scrape_jobs_task.s('python', 'all', ['justjoinit']).apply()
+
+        search = SearchQuery.objects.get()
+        self.assertEqual(sorted(search.active_offers().values_list('title', flat=True)), ["Offer 2", "Offer 3"])
+        gone = JobOffer.objects.get(title="Offer 1")
+        self.assertIsNotNone(gone.expired_at)
+        self.assertIsNotNone(SearchResult.objects.get(offer=gone).expired_at)
+
+        # Oferta wraca do wyników, gdy znów pojawi się na portalu.
+        mock_scrape_justjoinit.return_value = [make_offer(1)]
+        scrape_jobs_task.s('python', 'all', ['justjoinit']).apply()
+        gone.refresh_from_db()
+        self.assertIsNone(gone.expired_at)
+        self.assertEqual(list(search.active_offers().values_list('title', flat=True)), ["Offer 1"])
+
+    @patch('myapp.tasks.scrape_justjoinit')
+    def test_searches_do_not_expire_each_others_offers(self, mock_scrape_justjoinit):
+        mock_scrape_justjoinit.return_value = [make_offer(1)]
+        scrape_jobs_task.s('python', 'all', ['justjoinit']).apply()
+        mock_scrape_justjoinit.return_value = [make_offer(2)]
+        scrape_jobs_task.s('java', 'all', ['justjoinit']).apply()
+
+        python_search = SearchQuery.objects.get(technology='python')
+        self.assertEqual(list(python_search.active_offers().values_list('title', flat=True)), ["Offer 1"])
+        self.assertFalse(JobOffer.objects.filter(expired_at__isnull=False).exists())
+
+    @patch('myapp.tasks.scrape_justjoinit')
+    def test_page_shows_latest_search_result_set(self, mock_scrape_justjoinit):
+        mock_scrape_justjoinit.return_value = [make_offer(1)]
+        scrape_jobs_task.s('python', 'all', ['justjoinit']).apply()
+        mock_scrape_justjoinit.return_value = [make_offer(2)]
+        scrape_jobs_task.s('java', 'all', ['justjoinit']).apply()
+
+        response = self.client.get('/job-scraper/')
+        self.assertEqual([offer.title for offer in response.context['offers']], ["Offer 2"])
+
+        python_search = SearchQuery.objects.get(technology='python')
+        response = self.client.get('/job-scraper/', {'search': python_search.pk})
+        self.assertEqual([offer.title for offer in response.context['offers']], ["Offer 1"])
+
+
+class DailyOfferStatsTest(EagerCeleryMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    @patch('myapp.tasks.scrape_justjoinit')
+    def test_scrape_refreshes_todays_rollup(self, mock_scrape_justjoinit):
+        offers = [make_offer(1), make_offer(2)]
+        offers[0]["salary"] = "20 000 PLN"
+        mock_scrape_justjoinit.return_value = offers
+        scrape_jobs_task.s('python', 'all', ['justjoinit']).apply()
+
+        mock_scrape_justjoinit.return_value = offers[1:]
+        scrape_jobs_task.s('python', 'all', ['justjoinit']).apply()
+
+        stats = DailyOfferStats.objects.get()
+        self.assertEqual((stats.date, stats.source, stats.main_technology, stats.experience_level),
+                         (timezone.localdate(), "JustJoin.IT", 'python', 'Nie określono'))
+        self.assertEqual((stats.active_offers, stats.new_offers, stats.expired_offers, stats.offers_with_salary),
+                         (1, 2, 1, 0))
+        # Dane wykresu są przeliczane razem ze statystykami, więc strona ich już nie liczy.
+        with self.assertNumQueries(0):
+            chart = self.client.get('/job-scraper/api/chart-data/').json()
+        self.assertEqual(chart, {'labels': ["JustJoin.IT"], 'data': [1]})
+
+    def test_history_is_rebuilt_from_offer_dates(self):
+        today = timezone.localdate()
+        persist_offers([make_offer(number) for number in range(3)], 'python', 'all')
+        JobOffer.objects.filter(url__endswith='/0').update(scraped_date=timezone.now() - timedelta(days=2))
+        JobOffer.objects.filter(url__endswith='/1').update(expired_at=timezone.now())
+
+        refresh_daily_stats(today - timedelta(days=2))
+        refresh_daily_stats(today)
+
+        past = DailyOfferStats.objects.get(date=today - timedelta(days=2))
+        self.assertEqual((past.active_offers, past.new_offers), (1, 1))
+        current = DailyOfferStats.objects.get(date=today)
+        self.assertEqual((current.active_offers, current.new_offers, current.expired_offers), (2, 2, 1))
+
+    def test_scrape_refreshes_only_affected_technologies(self):
+        persist_offers([make_offer(1)], 'python', 'all')
+        persist_offers([make_offer(2, title="Java Developer")], 'java', 'all')
+        refresh_daily_stats()
+        DailyOfferStats.objects.filter(main_technology='java').update(active_offers=99)
+
+        self.assertEqual(affected_technologies('Python'), {'python'})
+        refresh_daily_stats(technologies={'python'})
+        self.assertEqual(DailyOfferStats.objects.get(main_technology='java').active_offers, 99)
+        self.assertEqual(DailyOfferStats.objects.get(main_technology='python').active_offers, 1)
+
+    def test_chart_endpoints_read_rollups_in_one_query(self):
+        today = timezone.localdate()
+        for day, jjit, nfj in ((today - timedelta(days=1), 5, 3), (today, 7, 4)):
+            DailyOfferStats.objects.create(date=day, source="JustJoin.IT", main_technology='python', active_offers=jjit)
+            DailyOfferStats.objects.create(date=day, source="NoFluffJobs", main_technology='python', active_offers=nfj)
+            DailyOfferStats.objects.create(date=day, source="NoFluffJobs", main_technology='java', active_offers=1)
+
+        with self.assertNumQueries(1):
+            chart = self.client.get('/job-scraper/api/chart-data/').json()
+        self.assertEqual(chart, {'labels': ["JustJoin.IT", "NoFluffJobs"], 'data': [7, 5]})
+
+        with self.assertNumQueries(1):
+            trends = self.client.get('/job-scraper/api/market-trends/', {'technology': 'Python'}).json()
+        self.assertEqual(trends['labels'], [(today - timedelta(days=1)).isoformat(), today.isoformat()])
+        self.assertEqual(trends['active'], [8, 11])
+
+
+class SalaryParserTest(TestCase):
+
+    def _parsed(self, text):
+        parsed = parse_salary(text)
+        return (parsed['salary_min'], parsed['salary_max'], parsed['salary_currency'], parsed['salary_period'],
+                parsed['salary_contract'], parsed['salary_min_monthly_pln'], parsed['salary_max_monthly_pln'])
+
+    def test_listing_formats(self):
+        self.assertEqual(self._parsed("15 000 - 20 000 PLN/month (b2b)"),
+                         (15000, 20000, 'PLN', 'month', 'b2b', 15000, 20000))
+        self.assertEqual(self._parsed("10 000 – 15 000 PLN"), (10000, 15000, 'PLN', 'month', '', 10000, 15000))
+        self.assertEqual(self._parsed("120,50 zł/h B2B"),
+                         (Decimal('120.5'), Decimal('120.5'), 'PLN', 'hour', 'b2b', 20244, 20244))
+        self.assertEqual(self._parsed("od 9 000 PLN UoP"), (9000, None, 'PLN', 'month', 'permanent', 9000, None))
+        self.assertEqual(self._parsed("120 000 - 150 000 PLN/year"),
+                         (120000, 150000, 'PLN', 'year', '', 10000, 12500))
+
+    def test_non_breaking_thousands_separators(self):
+        for space in ('\u00a0', '\u202f', '\u2009'):
+            self.assertEqual(self._parsed(f"15{space}000 - 20{space}000 PLN"),
+                             (15000, 20000, 'PLN', 'month', '', 15000, 20000))
+        self.assertEqual(self._parsed("od\u00a012\u00a0000\u00a0PLN"), (12000, None, 'PLN', 'month', '', 12000, None))
+
+    @override_settings(SALARY_EXCHANGE_RATES={'PLN': 1.0, 'EUR': 4.0})
+    def test_foreign_currency_uses_rate_table(self):
+        self.assertEqual(self._parsed("4k - 5k EUR")[5:], (16000, 20000))
+        self.assertEqual(self._parsed("4 000 - 5 000 CHF")[5:], (None, None))
+
+    def test_missing_salary(self):
+        for text in ("Nie podano", "", None):
+            self.assertEqual(self._parsed(text), (None, None, '', '', '', None, None))
+
+    def test_ingest_fills_columns_and_backfill_covers_old_rows(self):
+        persist_offers([make_offer(number, salary="20 000 - 25 000 PLN") for number in range(2)], 'python', 'all')
+        self.assertEqual(JobOffer.objects.filter(salary_min_monthly_pln=20000, salary_max_monthly_pln=25000).count(), 2)
+
+        # Oferty zapisane przed dodaniem kolumn mają tylko tekst.
+        JobOffer.objects.update(salary_min=None, salary_max=None, salary_currency='', salary_period='',
+                                salary_min_monthly_pln=None, salary_max_monthly_pln=None)
+        call_command('backfill_salaries', batch_size=1, stdout=StringIO())
+        self.assertEqual(JobOffer.objects.filter(salary_min_monthly_pln=20000, salary_currency='PLN').count(), 2)
+
+    def test_daily_stats_sum_salaries_of_active_offers(self):
+        persist_offers([make_offer(salary="10 000 - 20 000 PLN")], 'python', 'all')
+        persist_offers([make_offer(1, salary="od 12 000 PLN")], 'python', 'all')
+        persist_offers([make_offer(2)], 'python', 'all')
+        refresh_daily_stats()
+
+        stats = DailyOfferStats.objects.get()
+        self.assertEqual((stats.active_offers, stats.offers_with_salary), (3, 2))
+        self.assertEqual((stats.salary_min_sum, stats.salary_max_sum), (22000, 32000))
+        trends = self.client.get('/job-scraper/api/market-trends/').json()
+        self.assertEqual((trends['salary_min_avg'], trends['salary_max_avg']), ([11000], [16000]))
+
+
+class OfferDuplicateTest(TestCase):
+
+    # Ta sama oferta firmy Acme; testy nadpisują adres, źródło i pola, którymi różnią się portale.
+    ACME_OFFER = {"title": "Senior Python Developer", "company": "Acme Software Sp. z o.o.",
+                  "location": "Kraków, Warszawa", "salary": "20 000 - 25 000 PLN", "skills": "Python"}
+
+    def test_fingerprint_ignores_formatting_differences(self):
+        self.assertEqual(offer_fingerprint("Acme Software Sp. z o.o.", "Senior Python Developer (k/m)", "Kraków, Remote"),
+                         offer_fingerprint("ACME Software", "Python Developer senior", "Zdalnie, Krakow"))
+        self.assertNotEqual(offer_fingerprint("Acme Software", "Senior Python Developer", "Kraków"),
+                            offer_fingerprint("Acme Software", "Junior Python Developer", "Kraków"))
+
+    def test_cross_platform_duplicates_link_to_the_oldest_offer(self):
+        persist_offers([make_offer(url="https://justjoin.it/job-offer/acme-python", **self.ACME_OFFER)], 'python', 'all')
+        persist_offers([
+            # Karta NFJ pokazuje tylko pierwsze miasto i liczbę pozostałych.
+            make_offer(**self.ACME_OFFER | {"url": "https://nofluffjobs.com/pl/job/acme-python",
+                                            "company": "ACME Software", "location": "Kraków +1",
+                                            "source": "NoFluffJobs"}),
+            make_offer(**self.ACME_OFFER | {"url": "https://nofluffjobs.com/pl/job/acme-junior",
+                                            "title": "Junior Python Developer", "source": "NoFluffJobs"}),
+        ], 'python', 'all')
+
+        original = JobOffer.objects.get(url="https://justjoin.it/job-offer/acme-python")
+        self.assertIsNone(original.canonical)
+        self.assertEqual(JobOffer.objects.get(url="https://nofluffjobs.com/pl/job/acme-python").canonical, original)
+        self.assertIsNone(JobOffer.objects.get(url="https://nofluffjobs.com/pl/job/acme-junior").canonical)
+
+    def test_offers_differing_in_seniority_or_from_one_portal_stay_separate(self):
+        persist_offers([make_offer(url="https://justjoin.it/job-offer/acme-python", **self.ACME_OFFER)], 'python', 'all')
+        persist_offers([
+            # Podobieństwo obu par wynosi dokładnie 0.8, ale to różne stanowiska.
+            make_offer(**self.ACME_OFFER | {"url": "https://nofluffjobs.com/pl/job/acme-python-mid",
+                                            "title": "Python Developer", "source": "NoFluffJobs"}),
+            make_offer(**self.ACME_OFFER | {"url": "https://justjoin.it/job-offer/acme-backend",
+                                            "title": "Senior Backend Python Developer"}),
+        ], 'python', 'all')
+        persist_offers([make_offer(**self.ACME_OFFER | {"url": "https://justjoin.it/job-offer/acme-backend-mid",
+                                                        "title": "Mid Backend Python Developer"})], 'python', 'all')
+
+        self.assertFalse(JobOffer.objects.filter(canonical__isnull=False).exists())
+
+    def test_shared_company_and_cities_do_not_outweigh_different_titles(self):
+        sii_cities = "Gdańsk, Kraków, Łódź, Poznań, Warszawa, Wrocław, Remote"
+        capgemini_cities = "Kraków, Warszawa, Wrocław, Katowice, Remote"
+        persist_offers([
+            make_offer(1, title="Python Developer", company="Sii Polska", location=sii_cities),
+            make_offer(2, title="Senior Python Developer", company="Capgemini", location=capgemini_cities),
+        ], 'python', 'all')
+        # Podobieństwo całości wynosi 0.833 i 0.8, ale tytuły opisują inne stanowiska.
+        persist_offers([
+            make_offer(3, title="Java Developer", company="Sii Polska", location=sii_cities, source="NoFluffJobs"),
+            make_offer(4, title="Senior .NET Developer", company="Capgemini", location=capgemini_cities,
+                       source="NoFluffJobs"),
+        ], 'python', 'all')
+
+        self.assertFalse(JobOffer.objects.filter(canonical__isnull=False).exists())
+
+    def test_analytics_count_each_job_once(self):
+        persist_offers([make_offer(url="https://justjoin.it/job-offer/acme-python", **self.ACME_OFFER)], 'python', 'all')
+        persist_offers([make_offer(url="https://nofluffjobs.com/pl/job/acme-python", source="NoFluffJobs",
+                                   **self.ACME_OFFER)], 'python', 'all')
+
+        refresh_daily_stats()
+        self.assertEqual(sum(DailyOfferStats.objects.values_list('active_offers', flat=True)), 1)
+        self.assertEqual(self.client.get('/job-scraper/api/skills/').json(), {'labels': ["Python"], 'data': [1]})
+
+        # Gdy oferta kanoniczna wygaśnie, liczy się jej duplikat.
+        JobOffer.objects.filter(canonical__isnull=True).update(expired_at=timezone.now() - timedelta(days=1))
+        refresh_daily_stats()
+        self.assertEqual(DailyOfferStats.objects.get(active_offers=1).source, "NoFluffJobs")
+
+
+class LocationIndexTest(TestCase):
+
+    def test_listing_location_formats(self):
+        # JJIT: lista z tooltipa, NFJ: skrócona karta albo lista z pop-overu.
+        self.assertEqual(parse_locations("Gdańsk, Kraków, Warszawa"),
+                         ([('gdansk', "Gdańsk"), ('krakow', "Kraków"), ('warszawa', "Warszawa")], False))
+        self.assertEqual(parse_locations("Zdalnie +5"), ([], True))
+        self.assertEqual(parse_locations("Cracow +2, Remote"), ([('krakow', "Kraków")], True))
+        self.assertEqual(parse_locations("Nowy Sącz, warsaw"), ([('nowy sacz', "Nowy Sącz"), ('warszawa', "Warszawa")], False))
+
+    def test_cities_are_indexed_and_counted(self):
+        persist_offers([
+            make_offer(url="https://justjoin.it/offers/a", location="Kraków, Warszawa"),
+            make_offer(url="https://justjoin.it/offers/b", title="Other", location="Krakow, Remote"),
+            make_offer(url="https://justjoin.it/offers/c", title="Third", location="Zdalnie +5"),
+        ], 'python', 'all')
+
+        self.assertEqual(sorted(City.objects.values_list('name', flat=True)), ["Kraków", "Warszawa"])
+        self.assertEqual(list(JobOffer.objects.filter(is_remote=True).order_by('url').values_list('url', flat=True)),
+                         ["https://justjoin.it/offers/b", "https://justjoin.it/offers/c"])
+
+        with self.assertNumQueries(2):
+            counts = self.client.get('/job-scraper/api/cities/').json()
+        self.assertEqual(counts, {'labels': ["Kraków", "Warszawa", "Zdalnie"], 'data': [2, 1, 2]})
+
+        response = self.client.get('/job-scraper/', {'city': "krakow", 'remote': '1'})
+        self.assertEqual([offer.url for offer in response.context['offers']], ["https://justjoin.it/offers/b"])
+
+
+class OffersApiTest(TestCase):
+
+    @staticmethod
+    def _offers():
+        return [
+            make_offer(number, salary=f"{10 + number} 000 - {15 + number} 000 PLN", source=source)
+            for number, source in enumerate(["JustJoin.IT", "NoFluffJobs", "JustJoin.IT", "NoFluffJobs", "JustJoin.IT"])
+        ]
+
+    def setUp(self):
+        persist_offers(self._offers(), 'Python', 'senior')
+        # Dwie oferty z tą samą datą: kolejność rozstrzyga id.
+        same_time = timezone.now() - timedelta(days=1)
+        JobOffer.objects.filter(title__in=["Offer 1", "Offer 2"]).update(scraped_date=same_time)
+        JobOffer.objects.filter(title="Offer 0").update(scraped_date=timezone.now() - timedelta(days=10))
+
+    def test_keyset_pages_cover_all_offers_once(self):
+        with self.assertNumQueries(5):
+            first = self.client.get('/job-scraper/api/offers/', {'limit': 2}).json()
+        self.assertEqual(first['facets']['total'], 5)
+        self.assertEqual(first['facets']['source'], {"JustJoin.IT": 3, "NoFluffJobs": 2})
+        self.assertEqual(first['facets']['technology'], {'python': 5})
+
+        titles = [offer['title'] for offer in first['results']]
+        cursor = first['next_cursor']
+        while cursor:
+            with self.assertNumQueries(1):
+                page = self.client.get('/job-scraper/api/offers/', {'limit': 2, 'cursor': cursor}).json()
+            self.assertNotIn('facets', page)
+            titles += [offer['title'] for offer in page['results']]
+            cursor = page['next_cursor']
+        self.assertEqual(titles, ["Offer 4", "Offer 3", "Offer 2", "Offer 1", "Offer 0"])
+
+    def test_filters(self):
+        def titles(**params):
+            return [offer['title'] for offer in self.client.get('/job-scraper/api/offers/', params).json()['results']]
+
+        self.assertEqual(titles(source="NoFluffJobs", technology="PYTHON"), ["Offer 3", "Offer 1"])
+        self.assertEqual(titles(salary_min=18000), ["Offer 4", "Offer 3"])
+        self.assertEqual(titles(salary_max=11000, experience='senior'), ["Offer 1", "Offer 0"])
+        self.assertEqual(titles(date_to=(timezone.localdate() - timedelta(days=5)).isoformat()), ["Offer 0"])
+        self.assertEqual(titles(city="krakow", remote='1', technology='java'), [])
+
+    def test_invalid_parameters_return_400(self):
+        for params in ({'cursor': 'nie-kursor'}, {'salary_min': 'dużo'}, {'date_from': '2025-13-01'}):
+            self.assertEqual(self.client.get('/job-scraper/api/offers/', params).status_code, 400)
+
+
+class OfferSearchTest(TestCase):
+
+    def setUp(self):
+        persist_offers([
+            make_offer(url="https://justjoin.it/offers/django", title="Senior Django Developer",
+                       company="Łódzka Firma", skills="Python, PostgreSQL"),
+            make_offer(url="https://justjoin.it/offers/backend", title="Backend Developer",
+                       company="Django Software", skills="Python, Go"),
+            make_offer(url="https://justjoin.it/offers/java", title="Java Developer", skills="Java, Spring"),
+        ], 'Python', 'senior')
+
+    def _titles(self, query, **params):
+        data = self.client.get('/job-scraper/api/search/', {'q': query, **params}).json()
+        return [offer['title'] for offer in data['results']]
+
+    def test_ranked_prefix_and_diacritics(self):
+        # Trafienie w tytule waży więcej niż w nazwie firmy. Ranking z indeksu i pobranie ofert.
+        with self.assertNumQueries(2):
+            self.assertEqual(self._titles("djan"), ["Senior Django Developer", "Backend Developer"])
+        self.assertEqual(self._titles("ŁÓDZKA"), ["Senior Django Developer"])
+        self.assertEqual(self._titles("python developer lodzka"), ["Senior Django Developer"])
+        self.assertEqual(self._titles("spring", source="NoFluffJobs"), [])
+        self.assertEqual(self.client.get('/job-scraper/api/search/', {'q': '"*'}).json()['results'], [])
+
+    def test_index_follows_ingest_updates(self):
+        persist_offers([make_offer(url="https://justjoin.it/offers/java", title="Kotlin Developer", skills="Kotlin")],
+                       'Python', 'senior')
+        self.assertEqual(self._titles("kotlin"), ["Kotlin Developer"])
+        self.assertEqual(self._titles("java"), [])
+
+        JobOffer.objects.filter(title="Kotlin Developer").delete()
+        self.assertEqual(self._titles("kotlin"), [])
+
+
+class OfferExportTest(TestCase):
+
+    def setUp(self):
+        persist_offers(OffersApiTest._offers(), 'Python', 'senior')
+
+    def _body(self, response):
+        return b''.join(response.streaming_content)
+
+    @override_settings(EXPORT_CHUNK_SIZE=2)
+    def test_csv_stream_reads_rows_with_one_cursor(self):
+        # Kolejne paczki po EXPORT_CHUNK_SIZE wierszy pochodzą z tego samego kursora, a nie z nowych zapytań.
+        with self.assertNumQueries(1):
+            response = self.client.get('/job-scraper/api/offers/export/', {'source': 'JustJoin.IT'})
+            body = self._body(response)
+        self.assertTrue(response.streaming)
+        self.assertIn('attachment; filename="oferty-', response['Content-Disposition'])
+        rows = list(csv.DictReader(body.decode('utf-8').splitlines()))
+        self.assertEqual([row['title'] for row in rows], ["Offer 0", "Offer 2", "Offer 4"])
+        self.assertEqual(rows[0]['salary_min_monthly_pln'], '10000')
+        self.assertEqual(rows[0]['expired_at'], '')
+
+    def test_gzipped_ndjson(self):
+        response = self.client.get('/job-scraper/api/offers/export/', {'format': 'ndjson', 'gzip': '1'})
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        lines = gzip.decompress(self._body(response)).decode('utf-8').splitlines()
+        offers = [json.loads(line) for line in lines]
+        self.assertEqual(len(offers), 5)
+        self.assertEqual(offers[0]['salary_min'], '10000.00')
+        self.assertEqual(self.client.get('/job-scraper/api/offers/export/', {'format': 'xml'}).status_code, 400)
+
+    @patch('myapp.export.EXPORT_BUFFER_SIZE', 100)
+    async def test_asgi_export_streams_through_an_async_iterator(self):
+        response = await self.async_client.get('/job-scraper/api/offers/export/', {'format': 'ndjson'})
+        # Iterator synchroniczny Django pod ASGI czytałby w całości przed wysłaniem pierwszego kawałka.
+        self.assertTrue(response.is_async)
+        chunks = [chunk async for chunk in response.streaming_content]
+        self.assertEqual(len(chunks), 5)
+        self.assertEqual([json.loads(line)['title'] for line in b''.join(chunks).decode('utf-8').splitlines()],
+                         [f"Offer {number}" for number in range(5)])
+
+    def test_management_command(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'oferty.csv.gz')
+            call_command('export_offers', '--gzip', '--output', path, '--source', 'NoFluffJobs', stdout=StringIO())
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                rows = list(csv.DictReader(f))
+        self.assertEqual([row['title'] for row in rows], ["Offer 1", "Offer 3"])
+
+    def test_management_command_writes_to_given_stdout(self):
+        out = StringIO()
+        call_command('export_offers', '--format', 'ndjson', '--source', 'NoFluffJobs', stdout=out)
+        self.assertEqual([json.loads(line)['title'] for line in out.getvalue().splitlines()], ["Offer 1", "Offer 3"])
+        with self.assertRaises(CommandError):
+            call_command('export_offers', '--gzip', stdout=StringIO())
+
+
+class CachedChartTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        DailyOfferStats.objects.create(date=timezone.localdate(), source="JustJoin.IT", active_offers=3)
+
+    def test_repeat_requests_are_served_from_cache_with_304(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/job-scraper/api/chart-data/')
+        self.assertEqual(response.json(), {'labels': ["JustJoin.IT"], 'data': [3]})
+        self.assertIn('no-cache', response['Cache-Control'])
+
+        with self.assertNumQueries(0):
+            repeat = self.client.get('/job-scraper/api/chart-data/', HTTP_IF_NONE_MATCH=response['ETag'])
+            since = self.client.get('/job-scraper/api/chart-data/', HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual((repeat.status_code, since.status_code), (304, 304))
+
+        # Po przeliczeniu statystyk dane i ETag się zmieniają.
+        DailyOfferStats.objects.update(active_offers=4)
+        call_command('rebuild_offer_stats', '--days', '1', stdout=StringIO())
+        refreshed = self.client.get('/job-scraper/api/chart-data/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(refreshed.status_code, 200)
+        self.assertNotEqual(refreshed['ETag'], response['ETag'])
+
+    def test_analysis_page_embeds_chart_without_queries(self):
+        self.client.get('/job-scraper/analysis/')
+        with self.assertNumQueries(0):
+            response = self.client.get('/job-scraper/analysis/')
+        self.assertContains(response, '<script id="chart-data" type="application/json">')
+        self.assertContains(response, '"JustJoin.IT"')
+        self.assertEqual(self.client.get('/job-scraper/analysis/', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+        # Zmiana danych w stopce (PersonalInfo) czyści ich cache i zmienia ETag strony.
+        info = PersonalInfo.objects.create(first_name="Jan", last_name="Kowalski", title="Dev", email="jan@example.com",
+                                           bio="")
+        changed = self.client.get('/job-scraper/analysis/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertContains(changed, "Jan Kowalski")
+        info.last_name = "Nowak"
+        info.save()
+        renamed = self.client.get('/job-scraper/analysis/', HTTP_IF_NONE_MATCH=changed['ETag'],
+                                  HTTP_IF_MODIFIED_SINCE=changed['Last-Modified'])
+        self.assertContains(renamed, "Jan Nowak")
+
+
+class SalaryAnalyticsTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+        def offers(prefix, salaries, skills):
+            return [make_offer(url=f"https://justjoin.it/offers/{prefix}-{number}", title=f"{prefix} developer {number}",
+                               company=f"{prefix} corp {number}", salary=salary, skills=skills)
+                    for number, salary in enumerate(salaries)]
+
+        persist_offers(offers("senior", ["20 000 PLN", "30 000 PLN", "38 000 - 42 000 PLN"], "Python, Django, SQL"),
+                       'python', 'senior')
+        persist_offers(offers("junior", ["8 000 PLN", "do 10 000 PLN", "Nie podano"], "Python, Git"), 'python', 'junior')
+        persist_offers(offers("java", ["25 000 PLN"], "Java, Spring, SQL"), 'java', 'senior')
+
+    def test_grouped_percentiles_match_numpy(self):
+        values = np.array([5.0, 1.0, 3.0, 10.0, 20.0, 7.0])
+        group_ids = np.array([0, 0, 0, 1, 1, 2])
+        result = grouped_percentiles(values, group_ids, 3, (10, 50, 90))
+        for group in range(3):
+            np.testing.assert_allclose(result[group], np.percentile(values[group_ids == group], [10, 50, 90]))
+
+    def test_salary_percentiles_by_technology_and_experience(self):
+        with self.assertNumQueries(2):
+            report = self.client.get('/job-scraper/api/salary-stats/', {'group_by': 'technology,experience'}).json()
+        self.assertEqual(report['offers'], 6)
+        self.assertEqual(report['groups'][0], {'technology': 'python', 'experience': 'senior', 'offers': 3,
+                                               'p10': 22000, 'p50': 30000, 'p90': 38000})
+        self.assertEqual([(group['experience'], group['p50']) for group in report['groups'][1:]],
+                         [('junior', 9000), ('senior', 25000)])
+        self.assertEqual(sum(report['histogram']['data']), 6)
+        self.assertEqual(report['histogram']['bins'][:2], [0, 2500])
+
+        # Ponowne żądanie czyta raport z cache.
+        with self.assertNumQueries(0):
+            self.client.get('/job-scraper/api/salary-stats/', {'group_by': 'technology,experience'})
+        self.assertEqual(self.client.get('/job-scraper/api/salary-stats/', {'group_by': 'city'}).status_code, 400)
+
+    def test_top_skills_per_group(self):
+        report = self.client.get('/job-scraper/api/top-skills/', {'limit': 2}).json()
+        self.assertEqual(report['groups'], [
+            {'technology': 'python', 'experience': 'junior', 'offers': 3,
+             'skills': [{'name': 'Git', 'count': 3}, {'name': 'Python', 'count': 3}]},
+            {'technology': 'python', 'experience': 'senior', 'offers': 3,
+             'skills': [{'name': 'Django', 'count': 3}, {'name': 'Python', 'count': 3}]},
+            {'technology': 'java', 'experience': 'senior', 'offers': 1,
+             'skills': [{'name': 'Java', 'count': 1}, {'name': 'SQL', 'count': 1}]},
+        ])
+        sql = self.client.get('/job-scraper/api/top-skills/', {'group_by': 'experience', 'limit': 1,
+                                                                'technology': 'java'}).json()
+        self.assertEqual(sql['groups'], [{'experience': 'senior', 'offers': 1, 'skills': [{'name': 'Java', 'count': 1}]}])
+
+
+class ScrapeProgressTest(EagerCeleryMixin, TestCase):
+
+    def _events(self, body: bytes) -> list:
+        return [json.loads(line[len('data: '):]) for line in body.decode('utf-8').splitlines()
+                if line.startswith('data: ')]
+
+    @patch('myapp.tasks.scrape_justjoinit')
+    def test_task_publishes_progress(self, mock_scrape_justjoinit):
+        mock_scrape_justjoinit.return_value = [make_offer(1)]
+        pubsub = fakeredis.FakeRedis(server=self.progress_server).pubsub()
+        pubsub.psubscribe('scraper:progress:*')
+        pubsub.get_message()
+
+        result = scrape_jobs_task.s('python', 'all', ['justjoinit']).apply()
+
+        events = []
+        while (message := pubsub.get_message()) is not None:
+            self.assertEqual(message['channel'].decode(), f'scraper:progress:{result.id}')
+            events.append(json.loads(message['data']))
+        self.assertEqual([event['phase'] for event in events], ['started', 'scraping', 'platform_done', 'finished'])
+        self.assertEqual(events[1]['platform'], 'justjoinit')
+        self.assertEqual((events[2]['offers_found'], events[2]['offers_added'], events[2]['error']), (1, 1, None))
+        self.assertEqual(events[3]['message'], "Scraping zakończony. Dodano 1 nowych ofert.")
+        snapshot = fakeredis.FakeRedis(server=self.progress_server).get(f'scraper:progress-last:{result.id}')
+        self.assertEqual(json.loads(snapshot)['phase'], 'finished')
+
+    async def test_stream_starts_from_snapshot_and_ends_after_finish(self):
+        publish_progress('task-1', 'finished', message="Scraping zakończony. Dodano 3 nowych ofert.")
+        with patch('myapp.progress.get_async_redis',
+                   return_value=fakeredis.FakeAsyncRedis(server=self.progress_server)):
+            response = await self.async_client.get('/job-scraper/task-progress/task-1/')
+            body = b''.join([chunk async for chunk in response.streaming_content])
+
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+        self.assertEqual([event['phase'] for event in self._events(body)], ['finished'])
+
+    @override_settings(SCRAPER_PROGRESS_HEARTBEAT=0.05)
+    async def test_stream_forwards_published_events(self):
+        stream = progress_stream('task-2', fakeredis.FakeAsyncRedis(server=self.progress_server))
+        # Bez zapisanego stanu pierwszą wiadomością jest komentarz podtrzymujący (już po subskrypcji).
+        self.assertEqual(await anext(stream), ': keep-alive\n\n')
+        publish_progress('task-2', 'scraping', platform='justjoinit', offers_found=25, offers_added=20)
+        publish_progress('task-2', 'finished', offers_found=25, offers_added=20)
+
+        body = ''.join([chunk async for chunk in stream if not chunk.startswith(':')]).encode('utf-8')
+        self.assertEqual([(event['phase'], event['offers_found']) for event in self._events(body)],
+                         [('scraping', 25), ('finished', 25)])
+
+    async def test_stream_reports_unavailable_redis(self):
+        self.progress_server.connected = False
+        stream = progress_stream('task-3', fakeredis.FakeAsyncRedis(server=self.progress_server))
+        self.assertEqual([chunk async for chunk in stream], ['event: unavailable\ndata: {}\n\n'])
+
+    def test_failed_run_ends_the_stream(self):
+        run = ScrapeRun.objects.create(technology='python', task_id='task-4')
+        mark_scrape_run_failed(None, RuntimeError("worker lost"), None, run.pk)
+
+        snapshot = fakeredis.FakeRedis(server=self.progress_server).get('scraper:progress-last:task-4')
+        self.assertEqual(json.loads(snapshot)['phase'], 'failed')
+        self.assertEqual(json.loads(snapshot)['error'], "worker lost")
+
+    def test_offer_results_fragment(self):
+        persist_offers([make_offer()], 'python', 'all')
+        response = self.client.get('/job-scraper/offers/')
+        self.assertContains(response, "Offer 0")
+        self.assertNotContains(response, '<form')
@@ -8,6 +8,17 @@ urlpatterns = [
     path('about/', views.about, name='about'),
     path('job-scraper/', views.job_scraper, name='job_scraper'),
     path('job-scraper/task-status/<str:task_id>/', views.check_task_status, name='check_task_status'),
+    path('job-scraper/task-progress/<str:task_id>/', views.task_progress_stream, name='task_progress_stream'),
+    path('job-scraper/offers/', views.offer_results, name='offer_results'),
     path('job-scraper/analysis/', views.job_analysis, name='job_analysis'),
-    path('job-scraper/api/chart-data/', views.chart_data_api, name='chart_data_api')
+    path('job-scraper/api/offers/', views.offers_api, name='offers_api'),
+    path('job-scraper/api/offers/export/', views.offers_export, name='offers_export'),
+    path('job-scraper/api/search/', views.search_api, name='search_api'),
+    path('job-scraper/api/chart-data/', views.chart_data_api, name='chart_data_api'),
+    path('job-scraper/api/market-trends/', views.market_trends_api, name='market_trends_api'),
+    path('job-scraper/api/salary-stats/', views.salary_stats_api, name='salary_stats_api'),
+    path('job-scraper/api/top-skills/', views.top_skills_api, name='top_skills_api'),
+    path('job-scraper/api/scrape-runs/', views.scrape_runs_api, name='scrape_runs_api'),
+    path('job-scraper/api/skills/', views.skills_api, name='skills_api'),
+    path('job-scraper/api/cities/', views.cities_api, name='cities_api'),
 ]
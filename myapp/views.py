@@ -1,10 +1,26 @@
 from django.shortcuts import render, HttpResponse, get_object_or_404, redirect
 from django.contrib import messages
-from django.db.models import Count
-from django.http import JsonResponse
+from django.db.models import Count, Q, Sum
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
 from celery.result import AsyncResult
 from django.urls import reverse
-from .models import Project, Skill, JourneyStep, JobOffer, ScraperTechnology
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+from django.utils import timezone
+from datetime import datetime, timedelta
+import base64
+from .models import Project, Skill, JourneyStep, JobOffer, ScraperTechnology, ScrapeRun, SearchQuery, DailyOfferStats
+from .analytics import (DEFAULT_SALARY_GROUP_BY, DEFAULT_SKILLS_GROUP_BY, TOP_SKILLS_DEFAULT_LIMIT, TOP_SKILLS_MAX_LIMIT,
+                        cached_report, parse_group_by, salary_report, top_skills_report)
+from .charts import platform_chart
+from .context_processors import get_personal_info
+from .export import EXPORT_FORMATS, async_chunks, export_chunks
+from .filters import filter_offers
+from .locations import city_key
+from .progress import progress_stream
+from .search import SEARCH_MAX_CANDIDATES, search_offer_ids
+from .skills import skill_key
 from .tasks import scrape_jobs_task
 
 # Stałe dla widoku job_scraper, przeniesione poza funkcję dla lepszej wydajności.
@@ -20,6 +36,22 @@ PLATFORMS = [
     ('nofluffjobs', 'NoFluffJobs'),
 ]
 
+SKILLS_DEFAULT_LIMIT = 30
+CITIES_DEFAULT_LIMIT = 30
+SCRAPE_RUNS_DEFAULT_LIMIT = 50
+SCRAPE_RUNS_MAX_LIMIT = 500
+TRENDS_DEFAULT_DAYS = 30
+TRENDS_MAX_DAYS = 365
+OFFERS_DEFAULT_LIMIT = 20
+OFFERS_MAX_LIMIT = 100
+# Pola ofert zwracane przez API (jedno zapytanie .values(), bez tworzenia obiektów modelu).
+OFFER_API_FIELDS = ['id', 'title', 'company', 'location', 'is_remote', 'url', 'source', 'main_technology',
+                    'experience_level', 'salary', 'salary_min_monthly_pln', 'salary_max_monthly_pln',
+                    'salary_contract', 'date_posted', 'scraped_date']
+# Liczniki zwracane razem z pierwszą stroną wyników: {nazwa: pole modelu}.
+OFFER_FACETS = {'source': 'source', 'technology': 'main_technology', 'experience': 'experience_level'}
+SEARCH_DEFAULT_LIMIT = 20
+
 def home(request):
     """Strona główna - wyświetla podstawowe informacje i najnowsze projekty"""
     # Jawne sortowanie gwarantuje pobranie najnowszych projektów.
@@ -76,28 +108,60 @@ def job_scraper(request):
         technology = request.POST.get('technology', '')
         experience = request.POST.get('experience', 'all')
         selected_platforms = request.POST.getlist('platforms')
+        incremental = request.POST.get('incremental') == 'on'
         if technology and experience and selected_platforms:
-            task = scrape_jobs_task.delay(technology, experience, selected_platforms) # odpala zadanie w tle
+            task = scrape_jobs_task.delay(technology, experience, selected_platforms, incremental) # odpala zadanie w tle
             messages.success(request, f"Rozpoczęto wyszukiwanie ofert dla technologii '{technology}' "
                                       f"poziom: {experience} na platformie/ach: {', '.join(selected_platforms)}. "
-                                      f"Strona odświeży się automatycznie po zakończeniu" )
+                                      f"Lista ofert odświeży się automatycznie po zakończeniu" )
             return redirect(f"{reverse('job_scraper')}?task_id={task.id}")
 
     # Ten kod wykona się dla żądania GET (gdy wejdziesz na stronę lub po przekierowaniu)
     # Pobieramy wszystkie technologie z naszego nowego modelu, aby weyświetlić je w formualrzu.
     available_technologies = ScraperTechnology.objects.all()
-    # Jawne sortowanie gwarantuje pobranie najnowszych ofert.
-    latest_offers = JobOffer.objects.order_by('-scraped_date')[:20]
     context = {
         'available_technologies': available_technologies,
         'experience_levels': EXPERIENCE_LEVELS,
         'platforms': PLATFORMS,
-        'offers': latest_offers,
-        'task_id': task_id
+        'task_id': task_id,
+        **_offer_results_context(request),
     }
     return render(request, 'job_scraper.html', context)
 
 
+def _offer_results_context(request) -> dict:
+    # Pokazujemy aktualny zbiór wyników wybranego wyszukiwania (domyślnie ostatnio uruchomionego).
+    recent_searches = list(SearchQuery.objects.filter(last_run_at__isnull=False).order_by('-last_run_at')[:10])
+    search = None
+    search_id = request.GET.get('search')
+    if search_id and search_id.isdigit():
+        search = SearchQuery.objects.filter(pk=search_id).first()
+    elif recent_searches:
+        search = recent_searches[0]
+
+    if search is not None:
+        offers = search.active_offers()
+    else:
+        offers = JobOffer.objects.filter(expired_at__isnull=True)
+    # Filtry po mieście i pracy zdalnej korzystają z indeksów tabeli miast i kolumny is_remote.
+    if request.GET.get('city'):
+        offers = offers.filter(cities__key=city_key(request.GET['city']))
+    if request.GET.get('remote') == '1':
+        offers = offers.filter(is_remote=True)
+    # Jawne sortowanie gwarantuje pobranie najnowszych ofert.
+    latest_offers = offers.order_by('-scraped_date')[:20]
+    return {
+        'offers': latest_offers,
+        'search': search,
+        'recent_searches': recent_searches,
+    }
+
+
+def offer_results(request):
+    """Sama sekcja z ofertami strony Job Scrapera - strona podmienia ją po zakończeniu scrapowania."""
+    return render(request, 'job_scraper_offers.html', _offer_results_context(request))
+
+
 def check_task_status(request, task_id):
     """sprawdz status zadania Celery i zwraca go jako JSON"""
     task_result = AsyncResult(task_id)
@@ -105,22 +169,334 @@ def check_task_status(request, task_id):
     return JsonResponse(result)
 
 
+async def task_progress_stream(request, task_id):
+    """
+    Postęp zadania scrapowania jako Server-Sent Events (text/event-stream).
+    Widok asynchroniczny: czekanie na zdarzenia z Redis nie zajmuje wątku serwera,
+    o ile aplikacja działa przez ASGI (demo/asgi.py). Pod WSGI (np. runserver) Django czyta strumień
+    w całości przed wysłaniem, więc strona dostaje zdarzenia dopiero po zakończeniu zadania.
+    """
+    response = StreamingHttpResponse(progress_stream(task_id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Wyłącza buforowanie odpowiedzi w nginx, żeby zdarzenia docierały od razu.
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def _chart(request) -> dict:
+    # Dane wykresu raz na żądanie (ETag, Last-Modified i treść odpowiedzi).
+    if not hasattr(request, '_platform_chart'):
+        request._platform_chart = platform_chart()
+    return request._platform_chart
+
+
+def _chart_etag(request):
+    return _chart(request)['etag']
+
+
+def _chart_last_modified(request):
+    return _chart(request)['last_modified']
+
+
+def _analysis_page_etag(request):
+    # Strona zawiera też stopkę z PersonalInfo, więc jej zmiana też zmienia ETag.
+    personal_info = get_personal_info()
+    footer = personal_info.updated_at.strftime('%Y%m%d%H%M%S%f') if personal_info else 'none'
+    return f"page-{_chart(request)['etag']}-{footer}"
+
+
+def _analysis_page_last_modified(request):
+    personal_info = get_personal_info()
+    last_modified = _chart(request)['last_modified']
+    return max(last_modified, personal_info.updated_at) if personal_info else last_modified
+
+
+@cache_control(no_cache=True)
+@condition(etag_func=_analysis_page_etag, last_modified_func=_analysis_page_last_modified)
 def job_analysis(request):
+    """Strona z wykresami. Dane wykresu są osadzone w stronie, więc nie trzeba osobno wołać chart_data_api."""
     context = {
-        'page_title': 'Analiza Rynku Pracy'
+        'page_title': 'Analiza Rynku Pracy',
+        'chart_data': _chart(request)['body'],
     }
     return render(request, 'job_analysis.html', context)
 
 
+def _encode_cursor(scraped_date, offer_id) -> str:
+    return base64.urlsafe_b64encode(f"{scraped_date.isoformat()}|{offer_id}".encode()).decode()
+
+
+def _decode_cursor(cursor: str):
+    """Zwraca (scraped_date, id) ostatniej oferty poprzedniej strony. ValueError dla błędnego kursora."""
+    try:
+        scraped_date, offer_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        return datetime.fromisoformat(scraped_date), int(offer_id)
+    except (UnicodeError, ValueError, TypeError) as e:
+        raise ValueError(f"Nieprawidłowy kursor: {cursor}") from e
+
+
+def offers_api(request):
+    """
+    Lista ofert z filtrami i stronicowaniem po kluczu (scraped_date, id), od najnowszych.
+    Kolejną stronę pobiera się z parametrem cursor=<next_cursor>, więc koszt zapytania nie zależy
+    od numeru strony (bez OFFSET). Pierwsza strona zawiera też liczniki ofert (facets) dla filtrów.
+    Parametry: source, technology, experience, city, remote, search, date_from, date_to,
+    salary_min, salary_max, include_expired, include_duplicates, limit, cursor.
+    """
+    try:
+        limit = max(1, min(int(request.GET.get('limit', OFFERS_DEFAULT_LIMIT)), OFFERS_MAX_LIMIT))
+        offers = filter_offers(request.GET)
+        cursor = _decode_cursor(request.GET['cursor']) if request.GET.get('cursor') else None
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    page = offers
+    if cursor is not None:
+        scraped_date, offer_id = cursor
+        page = page.filter(Q(scraped_date__lt=scraped_date) | Q(scraped_date=scraped_date, id__lt=offer_id))
+    # Jedna oferta więcej niż limit mówi, czy istnieje następna strona.
+    rows = list(page.order_by('-scraped_date', '-id').values(*OFFER_API_FIELDS)[:limit + 1])
+    next_cursor = _encode_cursor(rows[limit - 1]['scraped_date'], rows[limit - 1]['id']) if len(rows) > limit else None
+    rows = rows[:limit]
+    for row in rows:
+        row['scraped_date'] = row['scraped_date'].isoformat()
+        row['date_posted'] = row['date_posted'].isoformat() if row['date_posted'] else None
+
+    data = {'results': rows, 'next_cursor': next_cursor}
+    if cursor is None:
+        facets = {
+            name: dict(offers.values_list(field).annotate(count=Count('id')).order_by())
+            for name, field in OFFER_FACETS.items()
+        }
+        facets.update(offers.aggregate(total=Count('id'), remote=Count('id', filter=Q(is_remote=True))))
+        data['facets'] = facets
+    return JsonResponse(data)
+
+
+def offers_export(request):
+    """
+    Eksport ofert do pliku CSV lub NDJSON (format=csv|ndjson), opcjonalnie skompresowanego gzipem (gzip=1).
+    Filtry jak w offers_api. Odpowiedź jest strumieniowana w trakcie czytania z bazy,
+    więc pamięć serwera nie rośnie razem z liczbą ofert (pod ASGI przez iterator asynchroniczny).
+    """
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        return JsonResponse({'error': f"Nieznany format eksportu: {export_format}"}, status=400)
+    compress = request.GET.get('gzip') == '1'
+    try:
+        offers = filter_offers(request.GET)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    filename = f"oferty-{timezone.localdate():%Y-%m-%d}.{export_format}{'.gz' if compress else ''}"
+    chunks = export_chunks(offers, export_format, compress)
+    if isinstance(request, ASGIRequest):
+        chunks = async_chunks(chunks)
+    response = StreamingHttpResponse(
+        chunks,
+        content_type='application/gzip' if compress else f'{EXPORT_FORMATS[export_format]}; charset=utf-8',
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def search_api(request):
+    """
+    Wyszukiwanie pełnotekstowe ofert (tytuł, firma, umiejętności) z rankingiem trafności.
+    Parametr q to słowa, które muszą wystąpić w ofercie (także jako początek słowa, np. 'djan').
+    Pozostałe parametry jak w offers_api (bez cursor), filtry są nakładane na SEARCH_MAX_CANDIDATES
+    najlepszych trafień z indeksu. Dwa zapytania: ranking z indeksu i pobranie wybranych ofert.
+    """
+    query = request.GET.get('q', '').strip()
+    try:
+        limit = max(1, min(int(request.GET.get('limit', SEARCH_DEFAULT_LIMIT)), OFFERS_MAX_LIMIT))
+        offers = filter_offers(request.GET)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    ranked_ids = search_offer_ids(query, SEARCH_MAX_CANDIDATES)
+    if not ranked_ids:
+        return JsonResponse({'query': query, 'results': []})
+    rows = {row['id']: row for row in offers.filter(id__in=ranked_ids).values(*OFFER_API_FIELDS)}
+    results = [rows[offer_id] for offer_id in ranked_ids if offer_id in rows][:limit]
+    for row in results:
+        row['scraped_date'] = row['scraped_date'].isoformat()
+        row['date_posted'] = row['date_posted'].isoformat() if row['date_posted'] else None
+    return JsonResponse({'query': query, 'results': results})
+
+
+@cache_control(no_cache=True)
+@condition(etag_func=_chart_etag, last_modified_func=_chart_last_modified)
 def chart_data_api(request):
+    """
+    Liczba aktywnych ofert na platformę według najnowszego dziennego podsumowania.
+    Dane pochodzą z cache (przeliczane po każdym scrapowaniu), a przeglądarka z aktualną kopią
+    dostaje 304 Not Modified.
+    """
+    return JsonResponse(_chart(request)['body'])
 
-    # Użycie values_list jest nieco bardziej wydajne, gdy nie potrzebujemy słowników.
-    platform_data = JobOffer.objects.values('source').annotate(count=Count('id')).order_by('-count').values_list('source', 'count')
 
-    labels, data = zip(*platform_data) if platform_data else ([], [])
+def _report_params(request) -> dict:
+    # Parametry wpływające na wynik raportu (część klucza cache).
+    return {key: value for key, value in sorted(request.GET.items()) if value}
 
-    chart_data = {
-        'labels': list(labels),
-        'data': list(data),
-    }
-    return JsonResponse(chart_data)
\ No newline at end of file
+
+def salary_stats_api(request):
+    """
+    Percentyle (p10/p50/p90) i histogram miesięcznych widełek w PLN, w grupach z parametru group_by
+    (technology, experience, source, contract; domyślnie experience). Filtry jak w offers_api.
+    """
+    try:
+        group_by = parse_group_by(request.GET.get('group_by'), DEFAULT_SALARY_GROUP_BY)
+        offers = filter_offers(request.GET)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    report = cached_report('salary', _report_params(request), lambda: salary_report(offers, group_by))
+    return JsonResponse(report)
+
+
+def top_skills_api(request):
+    """
+    Najczęściej wymagane umiejętności w każdej grupie ofert (domyślnie technologia i poziom doświadczenia).
+    Parametry: group_by, limit (umiejętności na grupę) i filtry jak w offers_api.
+    """
+    try:
+        group_by = parse_group_by(request.GET.get('group_by'), DEFAULT_SKILLS_GROUP_BY)
+        limit = max(1, min(int(request.GET.get('limit', TOP_SKILLS_DEFAULT_LIMIT)), TOP_SKILLS_MAX_LIMIT))
+        offers = filter_offers(request.GET)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    report = cached_report('top-skills', _report_params(request), lambda: top_skills_report(offers, group_by, limit))
+    return JsonResponse(report)
+
+
+def market_trends_api(request):
+    """
+    Dzienne trendy rynku z tabeli podsumowań: liczba aktywnych, nowych i wygasłych ofert
+    oraz średnie widełki (PLN miesięcznie).
+    Parametry: technology, experience, source (filtry), days (liczba ostatnich dni).
+    """
+    try:
+        days = max(1, min(int(request.GET.get('days', TRENDS_DEFAULT_DAYS)), TRENDS_MAX_DAYS))
+    except ValueError:
+        days = TRENDS_DEFAULT_DAYS
+
+    stats = DailyOfferStats.objects.filter(date__gt=timezone.localdate() - timedelta(days=days))
+    if request.GET.get('technology'):
+        stats = stats.filter(main_technology__iexact=request.GET['technology'])
+    if request.GET.get('experience'):
+        stats = stats.filter(experience_level__iexact=request.GET['experience'])
+    if request.GET.get('source'):
+        stats = stats.filter(source=request.GET['source'])
+
+    rows = (stats.values('date')
+            .annotate(active=Sum('active_offers'), new=Sum('new_offers'), expired=Sum('expired_offers'),
+                      with_salary=Sum('offers_with_salary'), salary_min_sum=Sum('salary_min_sum'),
+                      salary_max_sum=Sum('salary_max_sum'))
+            .order_by('date'))
+    trends = {'labels': [], 'active': [], 'new': [], 'expired': [], 'salary_min_avg': [], 'salary_max_avg': []}
+    for row in rows:
+        trends['labels'].append(row['date'].isoformat())
+        for key in ('active', 'new', 'expired'):
+            trends[key].append(row[key])
+        # Średnie widełki (PLN miesięcznie) z ofert, które je podają.
+        for key in ('salary_min', 'salary_max'):
+            total = row[f'{key}_sum']
+            trends[f'{key}_avg'].append(round(total / row['with_salary']) if row['with_salary'] else None)
+    return JsonResponse(trends)
+
+
+def scrape_runs_api(request):
+    """
+    Historia uruchomień scrapera (od najstarszego) do wykresów trendów:
+    czas trwania, liczby ofert i błędów oraz łączny czas każdej fazy.
+    Parametry: technology (opcjonalny filtr), limit (liczba ostatnich uruchomień).
+    """
+    try:
+        limit = int(request.GET.get('limit', SCRAPE_RUNS_DEFAULT_LIMIT))
+    except ValueError:
+        limit = SCRAPE_RUNS_DEFAULT_LIMIT
+    limit = max(1, min(limit, SCRAPE_RUNS_MAX_LIMIT))
+
+    runs = ScrapeRun.objects.exclude(status=ScrapeRun.STATUS_RUNNING)
+    technology = request.GET.get('technology')
+    if technology:
+        runs = runs.filter(technology__iexact=technology)
+    runs = list(runs.order_by('-started_at', '-id')[:limit])[::-1]
+
+    phase_names = sorted({name for run in runs for name in run.phase_timings})
+    data = [
+        {
+            'id': run.pk,
+            'started_at': run.started_at.isoformat(),
+            'technology': run.technology,
+            'experience': run.experience,
+            'status': run.status,
+            'duration_seconds': run.duration_seconds,
+            'offers_found': run.offers_found,
+            'offers_added': run.offers_added,
+            'error_count': run.error_count,
+            'platforms': {
+                platform: {key: stats.get(key) for key in ('offers_found', 'offers_added', 'errors')}
+                for platform, stats in run.platform_stats.items()
+            },
+            'phases': {name: run.phase_timings.get(name, {}).get('total', 0) for name in phase_names},
+        }
+        for run in runs
+    ]
+    return JsonResponse({'phases': phase_names, 'runs': data})
+
+
+def cities_api(request):
+    """
+    Liczba aktywnych ofert w poszczególnych miastach, liczona jednym zapytaniem po tabeli
+    powiązań ofert z miastami. Ostatnia pozycja 'Zdalnie' to oferty dopuszczające pracę zdalną.
+    Parametry: technology, source (filtry ofert), limit.
+    """
+    try:
+        limit = max(1, min(int(request.GET.get('limit', CITIES_DEFAULT_LIMIT)), 200))
+    except ValueError:
+        limit = CITIES_DEFAULT_LIMIT
+
+    offers = JobOffer.objects.filter(expired_at__isnull=True, canonical__isnull=True)
+    if request.GET.get('technology'):
+        offers = offers.filter(main_technology__iexact=request.GET['technology'])
+    if request.GET.get('source'):
+        offers = offers.filter(source=request.GET['source'])
+
+    city_counts = (JobOffer.cities.through.objects.filter(joboffer__in=offers)
+                   .values('city__name')
+                   .annotate(count=Count('joboffer_id'))
+                   .order_by('-count', 'city__name')
+                   .values_list('city__name', 'count')[:limit])
+    labels, data = zip(*city_counts) if city_counts else ([], [])
+    return JsonResponse({'labels': list(labels) + ['Zdalnie'],
+                         'data': list(data) + [offers.filter(is_remote=True).count()]})
+
+
+def skills_api(request):
+    """
+    Najczęściej wymagane umiejętności (liczba ofert na umiejętność), liczone jednym zapytaniem
+    po tabeli powiązań ofert z umiejętnościami.
+    Parametry: technology, source (filtry ofert), skill (tylko oferty wymagające tej umiejętności), limit.
+    """
+    try:
+        limit = max(1, min(int(request.GET.get('limit', SKILLS_DEFAULT_LIMIT)), 200))
+    except ValueError:
+        limit = SKILLS_DEFAULT_LIMIT
+
+    # Duplikaty tej samej oferty z drugiego portalu nie są liczone podwójnie.
+    links = JobOffer.skill_tags.through.objects.filter(joboffer__canonical__isnull=True)
+    if request.GET.get('technology'):
+        links = links.filter(joboffer__main_technology__iexact=request.GET['technology'])
+    if request.GET.get('source'):
+        links = links.filter(joboffer__source=request.GET['source'])
+    if request.GET.get('skill'):
+        links = links.filter(joboffer__skill_tags__key=skill_key(request.GET['skill']))
+
+    skill_counts = (links.values('offerskill__name')
+                    .annotate(count=Count('joboffer_id', distinct=True))
+                    .order_by('-count', 'offerskill__name')
+                    .values_list('offerskill__name', 'count')[:limit])
+    labels, data = zip(*skill_counts) if skill_counts else ([], [])
+    return JsonResponse({'labels': list(labels), 'data': list(data)})